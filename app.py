@@ -1,40 +1,86 @@
-from flask import Flask, jsonify, render_template, session, redirect, url_for, request, flash, abort
+from flask import Flask, jsonify, render_template, session, redirect, url_for, request, flash, abort, make_response
+from flask.json.provider import DefaultJSONProvider
+from markupsafe import Markup
 from functools import wraps # 导入 wraps 用于装饰器
+import base64
+import hashlib
 import json
 import os
 import datetime # 导入 datetime 模块
 # 导入 Werkzeug 用于密码哈希 (比明文安全)
 # from werkzeug.security import generate_password_hash, check_password_hash # 移除 Werkzeug security
-import re # 导入 re 用于解析分数线
 from math import ceil # 用于分页计算
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField, IntegerField, BooleanField
 from wtforms.validators import DataRequired, Length, EqualTo, Optional, NumberRange
 import logging # 导入 logging
 from flask_wtf.csrf import CSRFProtect # 导入 CSRFProtect
-import portalocker # 导入 portalocker
 import time # 添加导入
+import threading
 from logging.handlers import RotatingFileHandler
 import pandas as pd # 导入 pandas 用于 replace_nan_with_none 函数
 
 # --- 导入爬虫函数 ---
 from utils.scraper import run_scraper
+from utils.data_store import read_json, save_json, update_json
+from utils.snapshot_cache import FileSnapshotCache, get_file_identity
+from utils.compression import COMPRESSIBLE_MIMETYPES, MIN_COMPRESS_SIZE, CompressedCache, choose_encoding
+from utils.fragment_cache import FragmentCache
+from utils.school_repository import JsonSchoolRepository
+from utils.school_index import ADMIN_SEARCH_FIELDS
+from utils.school_bitsets import positions_from_bits
+from utils.school_orderings import favorites_key
+from utils.major_index import MAJOR_SORT_DEFAULT, MAJOR_SORTS
+from utils.school_suggest import DEFAULT_SUGGEST_LIMIT, MAX_SUGGEST_LIMIT
+from utils.catalog import SCHOOL_FIELDS, SchoolView, thaw
+from utils.binary_snapshot import SNAPSHOT_FILE_NAME, load_data_snapshot
+from utils.favorites_log import FavoritesLedger
+from utils.exam_subjects import EXAM_TYPE_408, EXAM_TYPE_SELF
+from utils import json_codec
+
+# --- JSON provider: jsonify 与模板中的 tojson 都经由 utils/json_codec.py (有 orjson 时使用 orjson) ---
+class CodecJSONProvider(DefaultJSONProvider):
+    ensure_ascii = False # 与数据文件一致，直接输出 UTF-8 中文
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj,
+                                indent=kwargs.get('indent'),
+                                sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                                default=kwargs.get('default', self.default))
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
 
 app = Flask(__name__)
+app.json = CodecJSONProvider(app) # 必须在首次访问 app.jinja_env 之前设置
 app.jinja_env.add_extension('jinja2.ext.loopcontrols') # 启用循环控制扩展
 # 设置一个密钥用于 session 加密，请在实际部署中替换为更安全的随机值
 app.config['SECRET_KEY'] = 'dev_secret_key_please_change'
+# 院校数据存储后端: 'json' (默认, data/schools.json)、'sqlite' (data/schools.db，需先运行 python -m utils.sqlite_repository 迁移)
+# 或 'sharded' (data/schools/，需先运行 python -m utils.sharded_repository 拆分)
+app.config['SCHOOLS_STORAGE_BACKEND'] = os.environ.get('SCHOOLS_STORAGE_BACKEND', 'json')
+# 首页配置、考试类型比例、国家线等小配置文件的缓存复查间隔 (秒)：间隔内不再 stat 文件；
+# 本进程的保存会立即使缓存失效，其他 worker 最迟在该间隔后看到修改
+app.config['CONFIG_CACHE_TTL'] = float(os.environ.get('CONFIG_CACHE_TTL', 5))
+# 按数据版本缓存的压缩响应条数上限 (每个 ETag + 编码一条，见 utils/compression.py)
+app.config['COMPRESSED_CACHE_ENTRIES'] = int(os.environ.get('COMPRESSED_CACHE_ENTRIES', 256))
+# 院校库页面片段 (筛选表单 + 结果表格 + 分页) 的缓存条数上限，每种查询参数组合一条
+app.config['SCHOOL_LIST_CACHE_ENTRIES'] = int(os.environ.get('SCHOOL_LIST_CACHE_ENTRIES', 256))
 csrf = CSRFProtect(app) # 初始化 CSRFProtect
 
 # 定义数据文件路径
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SCHOOLS_DATA_PATH = os.path.join(BASE_DIR, "data", "schools.json")
+SCHOOLS_DB_PATH = os.path.join(BASE_DIR, "data", "schools.db") # 可选的 SQLite 存储 (见 utils/sqlite_repository.py)
+SCHOOLS_SHARD_DIR = os.path.join(BASE_DIR, "data", "schools") # 可选的分片存储: manifest.json + shards/ (见 utils/sharded_repository.py)
 NATIONAL_LINES_PATH = os.path.join(BASE_DIR, "data", "national_lines.json")
 ANNOUNCEMENTS_PATH = os.path.join(BASE_DIR, "data", "announcements.json")
 EXAM_TYPE_RATIOS_PATH = os.path.join(BASE_DIR, "data", "exam_type_ratios.json")
 USERS_DIR = os.path.join(BASE_DIR, "data", "users")
 FAVORITES_COUNT_PATH = os.path.join(BASE_DIR, "data", "favorites_count.json")
+FAVORITES_LOG_PATH = os.path.join(BASE_DIR, "data", "favorites_events.log") # 收藏事件追加日志，定期压缩进 favorites_count.json
 HOMEPAGE_CONFIG_PATH = os.path.join(BASE_DIR, "data", "homepage_config.json") # 新增配置文件路径
+DATA_SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", SNAPSHOT_FILE_NAME) # 二进制数据快照 (python -m utils.binary_snapshot 构建)
 
 # --- 默认配置 (新增) ---
 DEFAULT_HOMEPAGE_CONFIG = {
@@ -64,86 +110,265 @@ def admin_required(f):
 def inject_current_year():
     return {'current_year': datetime.datetime.now().year}
 
+# --- 启动时加载二进制数据快照 ---
+# 快照中的条目只在源文件未变化时使用，过期或快照损坏时回退到 JSON 解析。
+try:
+    data_snapshot = load_data_snapshot(os.path.join(BASE_DIR, "data"), DATA_SNAPSHOT_PATH)
+except Exception as e:
+    app.logger.warning(f"加载数据快照 {DATA_SNAPSHOT_PATH} 失败，将直接读取 JSON 文件: {e}")
+    data_snapshot = None
+
 # --- 数据加载函数 --- 
 def load_json_data(file_path, default_value={}):
-    """通用 JSON 数据加载函数，带共享文件锁。优先使用 portalocker，失败则回退到 fcntl。"""
-    try:
-        # 主路径：尝试使用 portalocker
-        # import portalocker # 已在顶部导入
-        # app.logger.debug(f"Attempting to read {file_path} using portalocker")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_SH) # 获取共享锁
-            try:
-                content = f.read()
-                if not content:
-                    app.logger.warning(f"数据文件 {file_path} 为空 (portalocker path)，返回默认值: {default_value}")
-                    return default_value
-                data = json.loads(content)
-                # app.logger.debug(f"Successfully read {file_path} using portalocker")
-            finally:
-                portalocker.unlock(f)
-            return data
-    except ImportError: # portalocker 未安装或找不到
-        app.logger.warning("portalocker 模块未找到，回退到 fcntl 进行文件读取锁定 (如果可用)。")
-        # 后备路径：尝试使用 fcntl
-        if platform.system() != "Windows":
-            try:
-                import fcntl # fcntl 主要用于 POSIX 系统
-                # app.logger.debug(f"Attempting to read {file_path} using fcntl")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_SH) # 获取共享锁
-                    try:
-                        content = f.read()
-                        if not content:
-                            app.logger.warning(f"数据文件 {file_path} 为空 (fcntl path)，返回默认值: {default_value}")
-                            return default_value
-                        data = json.loads(content)
-                        # app.logger.debug(f"Successfully read {file_path} using fcntl")
-                    finally:
-                        fcntl.flock(f.fileno(), fcntl.LOCK_UN) # 确保释放锁
-                    return data
-            except ImportError: # fcntl 模块也未找到 (例如在非 POSIX 系统如 Windows)
-                app.logger.warning(f"fcntl 模块在非Windows系统上也未找到。将尝试在不加锁的情况下读取文件 {file_path} (非线程安全)。")
-                # Fall through to no-lock read
-            except Exception as e_fcntl: # fcntl 路径下的其他错误 (例如 IOError, json.JSONDecodeError)
-                app.logger.error(f"使用 fcntl 加载 JSON 数据 {file_path} 时发生错误: {e_fcntl}", exc_info=True) # Corrected typo
-                return default_value
-        else:
-            app.logger.warning(f"当前为Windows系统且portalocker不可用，fcntl不适用。将尝试在不加锁的情况下读取文件 {file_path} (非线程安全)。")
-        
-        # 最后手段：在不加锁的情况下读取 (注意：非线程安全) - 适用于 portalocker/fcntl 均失败或 Windows下portalocker失败
-        try:
-            # app.logger.debug(f"Attempting to read {file_path} without locking")
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if not content:
-                    app.logger.warning(f"数据文件 {file_path} 为空 (no-lock path)，返回默认值: {default_value}")
-                    return default_value
-                data = json.loads(content)
-                # app.logger.debug(f"Successfully read {file_path} without locking")
+    """通用 JSON 数据加载函数。所有写入都经 utils/data_store.py 原子替换，读取无需加锁。"""
+    if data_snapshot is not None:
+        from_snapshot, data = data_snapshot.take(file_path)
+        if from_snapshot and data is not None:
             return data
-        except Exception as e_nolock:
-            app.logger.error(f"在没有锁的情况下读取文件 {file_path} 也失败了: {e_nolock}", exc_info=True)
+    try:
+        data = read_json(file_path, default=None)
+        if data is None:
+            # 文件未找到或为空是常见情况，可能不是一个error，而是逻辑的一部分（例如，首次运行时）
+            app.logger.info(f"数据文件 {file_path} 不存在或为空，将返回默认值: {default_value}")
             return default_value
-            
-    except FileNotFoundError:
-        # 文件未找到是常见情况，可能不是一个error，而是逻辑的一部分（例如，首次运行时）
-        app.logger.info(f"数据文件未找到: {file_path}。这可能是正常的，将返回默认值: {default_value}")
-        return default_value
+        return data
     except json.JSONDecodeError as e_json:
         app.logger.error(f"解析 JSON 数据文件 {file_path} 时出错: {e_json}", exc_info=True)
         return default_value
-    except IOError as e_io: # portalocker 路径下的 IO 错误 (例如权限问题)
-        app.logger.error(f"读取文件 {file_path} 时发生 IO 错误 (portalocker path): {e_io}", exc_info=True)
+    except OSError as e_io:
+        app.logger.error(f"读取文件 {file_path} 时发生 IO 错误: {e_io}", exc_info=True)
         return default_value
-    except Exception as e_main: # portalocker 路径下的其他未知错误
-        app.logger.error(f"加载 JSON 数据 {file_path} 时发生未知错误 (portalocker path): {e_main}", exc_info=True)
+    except Exception as e_main:
+        app.logger.error(f"加载 JSON 数据 {file_path} 时发生未知错误: {e_main}", exc_info=True)
         return default_value
 
+# --- 新增：小配置文件缓存 ---
+# 首页配置、考试类型比例、国家线每次首页访问都会被读取多次，解析结果按文件身份缓存，
+# 并且在 CONFIG_CACHE_TTL 秒内不重复 stat。返回的数据在请求间共享，调用方不得原地修改。
+config_file_caches = {}
+config_file_caches_lock = threading.Lock()
+
+def get_config_cache(file_path):
+    """返回配置文件对应的 FileSnapshotCache (首次使用时创建)。"""
+    cache = config_file_caches.get(file_path)
+    if cache is None:
+        with config_file_caches_lock:
+            cache = config_file_caches.get(file_path)
+            if cache is None:
+                cache = FileSnapshotCache(file_path, lambda path: load_json_data(path, default_value=None),
+                                          revalidate_interval=app.config['CONFIG_CACHE_TTL'])
+                config_file_caches[file_path] = cache
+    return cache
+
+def load_config_data(file_path, default_value={}):
+    """带缓存的 load_json_data，用于很少变化的小配置文件。文件不存在或无效时返回 default_value。"""
+    data = get_config_cache(file_path).get()
+    return default_value if data is None else data
+
+def config_data_version(file_path):
+    """返回 load_config_data 当前所用快照的文件身份 (缓存有效时只做 stat，不读取文件)。"""
+    cache = get_config_cache(file_path)
+    cache.get()
+    return cache.identity
+
+def invalidate_config_cache(file_path):
+    """使指定配置文件的缓存失效 (保存后调用)，下一次读取重新加载。"""
+    cache = config_file_caches.get(file_path)
+    if cache is not None:
+        cache.invalidate()
+
+# --- 新增：响应压缩 (gzip / brotli) ---
+# 带 ETag 的只读 API 的压缩结果按 (ETag, 编码) 缓存，数据不变时只压缩一次；
+# 其他较大的 HTML / JSON 响应在 after_request 中即时压缩。
+compressed_cache = CompressedCache(max_entries=app.config['COMPRESSED_CACHE_ENTRIES'])
+
+def is_compressible(response):
+    """响应是否值得压缩：200、可压缩的类型、未编码、非流式且不小于 MIN_COMPRESS_SIZE。"""
+    return (response.status_code == 200 and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 'Content-Encoding' not in response.headers
+            and not response.direct_passthrough and not response.is_streamed
+            and response.content_length is not None and response.content_length >= MIN_COMPRESS_SIZE)
+
+@app.after_request
+def compress_response(response):
+    """即时压缩未被缓存的较大 HTML / JSON 响应。"""
+    if not is_compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compressed_cache.compress_dynamic(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# --- 新增：HTTP 条件请求 (ETag) ---
+# 只读 API 的响应完全由数据版本决定：ETag 取 (请求路径与参数, 数据版本) 的哈希，
+# 客户端带 If-None-Match 且版本未变时直接返回 304，不读取数据文件、不序列化响应。
+# 客户端接受压缩时，同一版本的压缩结果只生成一次 (compressed_cache)，之后的请求不再调用视图函数。
+def conditional_etag(version_func):
+    """装饰只读 API：version_func() 返回响应所依赖数据的版本 (可哈希、跨进程一致，如文件身份)。
+
+    视图返回非 200 或带 Cache-Control: no-store 的响应 (如部分数据出错) 时原样返回，不设 ETag、不进压缩缓存。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                version = version_func()
+            except Exception as e:
+                app.logger.error(f"计算 {request.path} 的数据版本时出错，本次不使用 ETag: {e}", exc_info=True)
+                return view(*args, **kwargs)
+            encoding = choose_encoding(request.accept_encodings)
+            etag = hashlib.sha1(repr((request.full_path, version)).encode('utf-8')).hexdigest()
+            # 不同编码是不同的表示，强 ETag 需要区分：只有实际压缩的响应才带 -gzip / -br 后缀
+            encoded_etag = f"{etag}-{encoding}" if encoding else None
+            if encoded_etag and request.if_none_match.contains(encoded_etag):
+                response = app.response_class(status=304)
+                etag = encoded_etag
+            elif request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+            else:
+                cached = compressed_cache.get(encoded_etag, encoding) if encoding else None
+                if cached is not None:
+                    response = app.response_class(cached[0], mimetype=cached[1])
+                    response.headers['Content-Encoding'] = encoding
+                    etag = encoded_etag
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.cache_control.no_store:
+                        return response
+                    if encoding and is_compressible(response):
+                        response.set_data(compressed_cache.put(encoded_etag, encoding, response.get_data(),
+                                                               response.mimetype))
+                        response.headers['Content-Encoding'] = encoding
+                        etag = encoded_etag
+            response.vary.add('Accept-Encoding')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache' # 允许缓存，但每次使用前都要重新验证
+            return response
+        return wrapper
+    return decorator
+
+# --- 数据保存函数 ---
+def save_json_data(file_path, data, indent=2):
+    """通用 JSON 保存函数，经 data_store 原子写入。成功返回 True，失败记录日志并返回 False。"""
+    try:
+        save_json(file_path, data, indent=indent)
+        return True
+    except Exception as e:
+        app.logger.error(f"保存数据文件 {file_path} 时出错: {e}", exc_info=True)
+        return False
+
+# --- 院校数据仓库 ---
+# 路由只通过 school_repo 访问院校数据。JSON 后端按文件身份 (mtime/size/inode) 缓存解析结果，
+# SQLite 后端按库内的数据版本号缓存，分片后端只在详情页按需加载单个学校的分片；稳态下页面访问不做 JSON 解析。
+def create_school_repository(backend):
+    """根据配置创建院校数据仓库。"""
+    if backend == 'sqlite':
+        from utils.sqlite_repository import SqliteSchoolRepository
+        return SqliteSchoolRepository(SCHOOLS_DB_PATH)
+    if backend == 'sharded':
+        from utils.sharded_repository import ShardedSchoolRepository
+        return ShardedSchoolRepository(SCHOOLS_SHARD_DIR)
+    return JsonSchoolRepository(SCHOOLS_DATA_PATH, loader=lambda path: load_json_data(path, default_value=[]))
+
+school_repo = create_school_repository(app.config['SCHOOLS_STORAGE_BACKEND'])
+
+def load_schools_data():
+    """返回完整的学校数据列表（含院系专业）。数据在请求间共享，调用方不得原地修改，需要修改时先复制。"""
+    try:
+        return school_repo.load_schools()
+    except Exception as e:
+        app.logger.error(f"加载学校数据时出错: {e}", exc_info=True)
+        return []
+
+def load_school_summaries():
+    """返回只含顶层字段的学校摘要列表（只读共享）。"""
+    try:
+        return school_repo.load_summaries()
+    except Exception as e:
+        app.logger.error(f"加载学校摘要数据时出错: {e}", exc_info=True)
+        return []
+
+def find_school(school_id, match_name=True):
+    """按 id 查找学校；match_name 为真时还依次匹配名称与别名 (如 "川大"、去掉校区括号的名称)。返回只读数据或 None。
+
+    查找经由每个数据版本构建一次的身份索引 (utils/school_identity.py)，不扫描学校列表。
+    """
+    try:
+        if match_name:
+            return school_repo.resolve_school(school_id)
+        return school_repo.get_school(school_id)
+    except Exception as e:
+        app.logger.error(f"查找学校 {school_id} 时出错: {e}", exc_info=True)
+        return None
+
+def save_school_record(school):
+    """保存单个学校的修改（JSON 后端重写整个文件，SQLite 后端只改写该学校的行，分片后端只重写该学校的分片与 manifest）。"""
+    try:
+        school_repo.save_school(replace_nan_with_none(school))
+        app.logger.info(f"学校 {school.get('id')} 的数据已保存")
+        return True
+    except Exception as e:
+        app.logger.error(f"保存学校 {school.get('id')} 的数据时出错: {e}", exc_info=True)
+        return False
+
+def load_school_index():
+    """返回当前数据版本的院校内存索引 (utils/school_index.py)，失败时返回 None。"""
+    try:
+        return school_repo.index()
+    except Exception as e:
+        app.logger.error(f"构建院校索引时出错: {e}", exc_info=True)
+        return None
+
+def load_major_index():
+    """返回当前数据版本展开到专业一级的索引 (utils/major_index.py)，失败时返回 None。"""
+    try:
+        return school_repo.major_index()
+    except Exception as e:
+        app.logger.error(f"构建专业索引时出错: {e}", exc_info=True)
+        return None
+
+def load_recommender():
+    """返回当前数据版本的推荐打分特征 (utils/recommender.py)，失败时返回 None。"""
+    try:
+        return school_repo.recommender()
+    except Exception as e:
+        app.logger.error(f"构建推荐特征时出错: {e}", exc_info=True)
+        return None
+
+def load_school_charts(school):
+    """返回学校详情页的图表配置 {'score': JSON, 'enrollment': JSON} (每个数据版本生成一次，已序列化)，失败时返回 None。"""
+    school_index = load_school_index()
+    major_index = load_major_index()
+    if school_index is None or major_index is None:
+        return None
+    try:
+        if school.get('id') is not None:
+            position = school_index.identity.position_of_id(school.get('id'))
+        else:
+            position = school_index.identity.position_of_name(school.get('name'))
+        return major_index.charts.get(position)
+    except Exception as e:
+        app.logger.error(f"生成学校 {school.get('id')} 的图表配置时出错: {e}", exc_info=True)
+        return None
+
+# 存在数据快照时在启动阶段预热院校数据缓存与索引，worker 的首个请求无需再解析 JSON、构建索引
+if data_snapshot is not None:
+    load_schools_data()
+    warm_index = load_school_index()
+    if warm_index is not None:
+        warm_index.suggester # 预先生成拼音前缀树
+    warm_major_index = load_major_index()
+    if warm_major_index is not None:
+        warm_major_index.charts # 预先生成详情页图表配置
+    load_recommender()
+
 # --- 新增：加载首页配置函数 ---
 def load_homepage_config():
     """加载首页配置文件，如果文件不存在或无效，则返回默认配置。"""
-    config_data = load_json_data(HOMEPAGE_CONFIG_PATH, default_value=DEFAULT_HOMEPAGE_CONFIG)
+    config_data = load_config_data(HOMEPAGE_CONFIG_PATH, default_value=DEFAULT_HOMEPAGE_CONFIG)
     # 确保返回的字典包含所有默认键
     final_config = DEFAULT_HOMEPAGE_CONFIG.copy()
     final_config.update(config_data) # 用加载的数据覆盖默认值
@@ -151,113 +376,23 @@ def load_homepage_config():
 
 # --- 新增：保存首页配置函数 ---
 def save_homepage_config(config_data):
-    """将首页配置数据保存到 JSON 文件，带文件锁。"""
-    try:
-        os.makedirs(os.path.dirname(HOMEPAGE_CONFIG_PATH), exist_ok=True)
-        with open(HOMEPAGE_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_EX)
-            try:
-                json.dump(config_data, f, ensure_ascii=False, indent=2)
-                f.flush()
-                os.fsync(f.fileno())
-                app.logger.info(f"首页配置已成功写入 {HOMEPAGE_CONFIG_PATH}")
-                return True
-            finally:
-                portalocker.unlock(f)
-    except ImportError:
-        app.logger.warning("portalocker not found, attempting fcntl for saving homepage config.")
-        try:
-            os.makedirs(os.path.dirname(HOMEPAGE_CONFIG_PATH), exist_ok=True)
-            with open(HOMEPAGE_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                fcntl.flock(f.fileno(), fcntl.LOCK_EX) 
-                try:
-                    json.dump(config_data, f, ensure_ascii=False, indent=2)
-                    f.flush()
-                    os.fsync(f.fileno())
-                    app.logger.info(f"首页配置已成功写入 {HOMEPAGE_CONFIG_PATH} (using fcntl)")
-                    return True
-                finally:
-                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-        except Exception as e_fcntl_save:
-            app.logger.error(f"使用fcntl保存首页配置文件 {HOMEPAGE_CONFIG_PATH} 时发生错误: {e_fcntl_save}", exc_info=True)
-            return False 
-    except IOError as e_io:
-        app.logger.error(f"保存首页配置文件 {HOMEPAGE_CONFIG_PATH} 时发生IO错误: {e_io}", exc_info=True)
-        return False
-    except Exception as e:
-        app.logger.error(f"保存首页配置文件时发生意外错误: {e}", exc_info=True)
+    """将首页配置数据原子地保存到 JSON 文件。"""
+    if not save_json_data(HOMEPAGE_CONFIG_PATH, config_data):
         return False
+    invalidate_config_cache(HOMEPAGE_CONFIG_PATH)
+    app.logger.info(f"首页配置已成功写入 {HOMEPAGE_CONFIG_PATH}")
+    return True
 
 # --- 数据保存函数 (新增) ---
 def save_schools_data(data):
-    """将学校数据（列表）保存到 JSON 文件，带文件锁。优先 portalocker, 回退 fcntl。"""
+    """整体保存学校数据（列表），经仓库原子写入并使缓存失效。"""
     try:
-        # 主路径：尝试使用 portalocker
-        import portalocker
-        os.makedirs(os.path.dirname(SCHOOLS_DATA_PATH), exist_ok=True)
-        with open(SCHOOLS_DATA_PATH, 'w', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_EX)
-            try:
-                cleaned_data = replace_nan_with_none(data)
-                json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
-                f.flush()
-                os.fsync(f.fileno())
-                app.logger.info(f"学校数据已成功写入 {SCHOOLS_DATA_PATH} (portalocker)")
-                # 写入成功后，在 finally 解锁前返回 True
-            except Exception as e_write_portalocker:
-                app.logger.error(f"使用 portalocker 写入学校数据时出错: {e_write_portalocker}", exc_info=True)
-                return False # 写入失败，在 finally 解锁后会返回此 False
-            finally:
-                portalocker.unlock(f)
-            return True # 如果 try 块成功执行完毕（没有异常），则在此返回 True
-
-    except ImportError:
-        app.logger.warning("portalocker 模块未找到，回退到 fcntl 进行文件写入锁定 (如果可用)。")
-        # 后备路径：尝试使用 fcntl
-        try:
-            import fcntl # fcntl 主要用于 POSIX 系统
-            os.makedirs(os.path.dirname(SCHOOLS_DATA_PATH), exist_ok=True)
-            with open(SCHOOLS_DATA_PATH, 'w', encoding='utf-8') as f_fcntl: # Renamed to avoid conflict
-                fcntl.flock(f_fcntl.fileno(), fcntl.LOCK_EX)
-                try:
-                    cleaned_data = replace_nan_with_none(data)
-                    json.dump(cleaned_data, f_fcntl, ensure_ascii=False, indent=2)
-                    f_fcntl.flush()
-                    os.fsync(f_fcntl.fileno())
-                    app.logger.info(f"学校数据已成功写入 {SCHOOLS_DATA_PATH} (using fcntl)")
-                    # 写入成功后，在 finally 解锁前返回 True
-                except Exception as e_write_fcntl:
-                    app.logger.error(f"使用 fcntl 写入学校数据时出错: {e_write_fcntl}", exc_info=True)
-                    return False # 写入失败，在 finally 解锁后会返回此 False
-                finally:
-                    fcntl.flock(f_fcntl.fileno(), fcntl.LOCK_UN)
-                return True # 如果 try 块成功执行完毕（没有异常），则在此返回 True
-
-        except ImportError: # fcntl 模块也未找到
-            app.logger.error(f"fcntl 模块也未找到。无法为写入操作锁定文件 {SCHOOLS_DATA_PATH}。")
-            app.logger.warning(f"警告：将尝试在不加锁的情况下保存学校数据到 {SCHOOLS_DATA_PATH} (非线程安全)。")
-            try:
-                os.makedirs(os.path.dirname(SCHOOLS_DATA_PATH), exist_ok=True)
-                with open(SCHOOLS_DATA_PATH, 'w', encoding='utf-8') as f_nolock:
-                    cleaned_data = replace_nan_with_none(data)
-                    json.dump(cleaned_data, f_nolock, ensure_ascii=False, indent=2)
-                    f_nolock.flush()
-                    os.fsync(f_nolock.fileno())
-                app.logger.info(f"学校数据已在不加锁的情况下写入 {SCHOOLS_DATA_PATH}。")
-                return True
-            except Exception as e_nolock_save:
-                app.logger.error(f"在不加锁的情况下保存学校数据 {SCHOOLS_DATA_PATH} 也失败了: {e_nolock_save}", exc_info=True)
-                return False
-        except Exception as e_fcntl_setup: # fcntl 路径下的其他设置错误 (例如makedirs, open 失败)
-            app.logger.error(f"Fcntl 后备路径中设置保存学校数据 {SCHOOLS_DATA_PATH} 时失败: {e_fcntl_setup}", exc_info=True)
-            return False
-            
-    except IOError as e_io_portalocker_setup: # Catches IOError for portalocker path (e.g. os.makedirs, open before lock)
-        app.logger.error(f"保存学校数据 {SCHOOLS_DATA_PATH} 时发生IO错误 (portalocker setup): {e_io_portalocker_setup}", exc_info=True)
-        return False
-    except Exception as e_main_portalocker: # Other errors in portalocker path (e.g. initial open or makedirs failed)
-        app.logger.error(f"保存学校数据 {SCHOOLS_DATA_PATH} 时发生未知错误 (portalocker path): {e_main_portalocker}", exc_info=True)
+        school_repo.save_all(replace_nan_with_none(data))
+    except Exception as e:
+        app.logger.error(f"保存学校数据时出错: {e}", exc_info=True)
         return False
+    app.logger.info(f"学校数据已成功保存 (后端: {app.config['SCHOOLS_STORAGE_BACKEND']})")
+    return True
 
 # --- 需要确保 replace_nan_with_none 函数存在于 app.py 中 --- 
 # 如果它只在 data_processor.py 中，需要移过来或导入
@@ -280,31 +415,11 @@ def get_user_data(username):
 
 def save_user_data(username, data):
     """保存用户数据到 JSON 文件。"""
-    os.makedirs(USERS_DIR, exist_ok=True) # 确保目录存在
     user_file = os.path.join(USERS_DIR, f"{username}.json")
-    try:
-        with open(user_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        return True
-    except IOError as e:
-        app.logger.error(f"错误：无法写入用户文件 {user_file}: {e}")
+    if not save_json_data(user_file, data, indent=4):
+        app.logger.error(f"错误：无法写入用户文件 {user_file}")
         return False
-
-# --- 新增：计算各学校收藏人数 ---
-def get_favorites_count():
-    """遍历所有用户文件，统计每个学校的收藏次数。"""
-    favorites_count = {}
-    if not os.path.exists(USERS_DIR):
-        return favorites_count # 用户目录不存在，返回空字典
-
-    for filename in os.listdir(USERS_DIR):
-        if filename.endswith(".json"):
-            username = filename[:-5] # 移除 .json 后缀
-            user_data = get_user_data(username)
-            if user_data and isinstance(user_data.get('favorites'), list):
-                for school_id in user_data['favorites']:
-                    favorites_count[school_id] = favorites_count.get(school_id, 0) + 1
-    return favorites_count
+    return True
 
 # --- 表单类 ---
 class LoginForm(FlaskForm):
@@ -373,14 +488,14 @@ def index():
     return render_template('index.html', homepage_config=homepage_config) # 传递配置到模板
 
 @app.route('/api/schools/list')
+@conditional_etag(lambda: school_repo.version())
 def api_schools_list():
     """API: 返回用于首页滚动列表的简化学校信息"""
-    try:
-        data = load_json_data(SCHOOLS_DATA_PATH)
-        if data is None: data = [] # Ensure data is an empty list if file not found or empty
-    except Exception as e:
-        print(f"Error loading school data for API: {e}")
-        data = []
+    return dashboard_part_response('schools')
+
+def build_schools_list_payload():
+    """首页滚动列表的简化学校信息。"""
+    data = load_school_summaries()
 
     simplified_schools = []
     for school in data:
@@ -395,15 +510,194 @@ def api_schools_list():
             'enrollment_24_academic': school.get('enrollment_24_academic', '未知'),
             'enrollment_24_professional': school.get('enrollment_24_professional', '未知'),
         })
-    
-    # print(f"API /api/schools/list returning {len(simplified_schools)} schools.") # Optional: for debugging
-    return jsonify(simplified_schools)
+    return simplified_schools
+
+# --- 新增：院校列表的筛选参数 (school_list 与 /api/schools/search 共用) ---
+# 查询参数名 -> 筛选字段；参数可以重复出现表示多选 (如 ?province=四川&province=重庆)，取值之间为"或"
+SCHOOL_FILTER_PARAMS = (
+    ('province', 'province'),
+    ('level', 'level'),
+    ('rank', 'computer_rank'),
+    ('region_filter', 'region'),
+    ('exam_type', 'exam_type'),
+)
+
+def parse_school_filters(args):
+    """从查询参数解析 (名称关键词, {筛选字段: 取值列表})。"""
+    filters = {field: [v for v in args.getlist(param) if v] for param, field in SCHOOL_FILTER_PARAMS}
+    return args.get('q', ''), filters
+
+# --- 新增：院校检索 API (字段投影 + 游标分页) ---
+SEARCH_DEFAULT_FIELDS = ('id', 'name', 'province', 'level', 'region', 'computer_rank', 'favorites_count')
+SEARCH_ALLOWED_FIELDS = frozenset(field for field in SCHOOL_FIELDS if field != 'departments') | {'favorites_count'}
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+def encode_search_cursor(version_tag, sort_by, key):
+    """把 (数据版本, 排序方式, 最后一条的排序键) 编码为不透明的游标字符串。"""
+    payload = json_codec.dumps_bytes({'v': version_tag, 's': sort_by, 'k': key})
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def decode_search_cursor(cursor):
+    """解析游标，格式不正确时返回 None。"""
+    try:
+        payload = json_codec.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return payload['v'], payload['s'], payload['k']
+    except (ValueError, TypeError, KeyError):
+        return None
+
+@app.route('/api/schools/search')
+@conditional_etag(lambda: (school_repo.version(), favorites_ledger.version()))
+def api_schools_search():
+    """API: 按与院校库相同的筛选/排序参数检索学校，只返回一页。
+
+    参数: q、province、level、rank、region_filter、exam_type (可多选)、sort (favorites/default)、
+    fields (逗号分隔的返回字段)、limit (每页条数，最大 100)、cursor (上一页返回的 next_cursor)。
+    游标基于排序键 (keyset)，翻页期间收藏数变化不会导致重复或遗漏；数据更新后旧游标失效。
+    """
+    search_query, filters = parse_school_filters(request.args)
+    sort_by = 'default' if request.args.get('sort') == 'default' else 'favorites'
+    limit = max(1, min(request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int), SEARCH_MAX_LIMIT))
+
+    fields_param = request.args.get('fields', '')
+    fields = [f.strip() for f in fields_param.split(',') if f.strip()] if fields_param else list(SEARCH_DEFAULT_FIELDS)
+    unknown_fields = [f for f in fields if f not in SEARCH_ALLOWED_FIELDS]
+    if unknown_fields:
+        return jsonify({"error": f"不支持的字段: {', '.join(unknown_fields)}",
+                        "allowed_fields": sorted(SEARCH_ALLOWED_FIELDS)}), 400
+
+    school_index = load_school_index()
+    if school_index is None:
+        return jsonify({"error": "无法加载学校数据"}), 500
+
+    after_key = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        decoded = decode_search_cursor(cursor)
+        if decoded is None or decoded[1] != sort_by:
+            return jsonify({"error": "无效的游标"}), 400
+        if decoded[0] != school_index.version_tag:
+            return jsonify({"error": "数据已更新，游标已失效，请从第一页重新获取"}), 409
+        after_key = decoded[2]
+        key_valid = (isinstance(after_key, int) if sort_by == 'default' else
+                     isinstance(after_key, list) and len(after_key) == 2 and all(isinstance(k, int) for k in after_key))
+        if not key_valid:
+            return jsonify({"error": "无效的游标"}), 400
+
+    try:
+        bits = school_index.bitmaps.select(
+            filters, positions=school_index.search(search_query) if search_query else None)
+        ordering = school_index.orderings.get(sort_by)
+        if ordering is school_index.orderings.favorites:
+            ordering.sync(favorites_ledger)
+        positions = ordering.page_after(bits, after_key, limit)
+    except Exception as e:
+        app.logger.error(f"检索学校数据时出错: {e}", exc_info=True)
+        return jsonify({"error": "检索学校数据时出错"}), 500
+
+    favorites_ordering = school_index.orderings.favorites
+    items = []
+    for position in positions:
+        school = school_index.schools[position]
+        item = {}
+        for field in fields:
+            item[field] = favorites_ordering.count(position) if field == 'favorites_count' else school.get(field)
+        items.append(item)
+
+    next_cursor = None
+    if len(positions) == limit:
+        next_cursor = encode_search_cursor(school_index.version_tag, sort_by, ordering.key(positions[-1]))
+    return jsonify({
+        'total': bits.bit_count(),
+        'sort': sort_by,
+        'items': items,
+        'next_cursor': next_cursor,
+    })
+
+# --- 新增：院校名称自动补全 ---
+@app.route('/api/schools/suggest')
+@conditional_etag(lambda: (school_repo.version(), favorites_ledger.version()))
+def api_schools_suggest():
+    """API: 按中文名称、全拼或拼音首字母前缀 (如 "scdx"、"sichuan") 返回收藏数最多的若干学校。"""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', DEFAULT_SUGGEST_LIMIT, type=int), MAX_SUGGEST_LIMIT))
+    school_index = load_school_index()
+    if school_index is None or not query.strip():
+        return jsonify([])
+    suggestions = school_index.suggester.suggest(query, load_favorites_counts_for, limit=limit)
+    return jsonify([{
+        'id': school.get('id'),
+        'name': school.get('name'),
+        'province': school.get('province'),
+        'level': school.get('level'),
+        'favorites_count': favorites_count,
+    } for school, favorites_count in suggestions])
+
+def load_exam_type_ratio():
+    """按当前数据版本统计的 [{name, value}] (自命题、408统考 的专业数量)，失败时返回 None。"""
+    major_index = load_major_index()
+    if major_index is None:
+        return None
+    counts = major_index.exam_type_counts
+    return [{"value": counts[name], "name": name} for name in (EXAM_TYPE_SELF, EXAM_TYPE_408)]
+
+# --- 新增：专业检索 API ---
+MAJOR_SEARCH_DEFAULT_LIMIT = 20
+MAJOR_SEARCH_MAX_LIMIT = 100
+
+@app.route('/api/majors/search')
+@conditional_etag(lambda: school_repo.version())
+def api_majors_search():
+    """API: 跨所有学校、院系检索专业 (招生方向)。
+
+    学校层面的参数同院校库页面 (q、province、level、rank、region_filter、exam_type，可多选)；专业层面的参数：
+    code (专业代码或前缀，可多选，如 085404、0854)、subject (必须包含的初试科目代码，可多选，如 408)、
+    major (专业名称关键词)、year (招生人数/分数线所用年份，默认最新年份)、min_enrollment、min_score、max_score、
+    sort (default/enrollment/score/score_desc)、limit、offset。
+    """
+    search_query, filters = parse_school_filters(request.args)
+    sort_by = request.args.get('sort', MAJOR_SORT_DEFAULT)
+    if sort_by not in MAJOR_SORTS:
+        return jsonify({"error": f"不支持的排序方式: {sort_by}", "allowed_sorts": list(MAJOR_SORTS)}), 400
+    limit = max(1, min(request.args.get('limit', MAJOR_SEARCH_DEFAULT_LIMIT, type=int), MAJOR_SEARCH_MAX_LIMIT))
+    offset = max(0, request.args.get('offset', 0, type=int))
+
+    school_index = load_school_index()
+    major_index = load_major_index()
+    if school_index is None or major_index is None:
+        return jsonify({"error": "无法加载专业数据"}), 500
+    year = request.args.get('year') or major_index.latest_year
+
+    school_positions = None
+    if search_query or any(filters.values()):
+        school_bits = school_index.bitmaps.select(
+            filters, positions=school_index.search(search_query) if search_query else None)
+        school_positions = positions_from_bits(school_bits)
+    bits = major_index.select(
+        school_positions=school_positions,
+        codes=[v.strip() for v in request.args.getlist('code') if v.strip()],
+        subjects=[v.strip() for v in request.args.getlist('subject') if v.strip()],
+        major_query=request.args.get('major', '').strip(),
+        year=year,
+        min_enrollment=request.args.get('min_enrollment', type=int),
+        min_score=request.args.get('min_score', type=int),
+        max_score=request.args.get('max_score', type=int),
+    )
+    entries = major_index.page(bits, sort_by=sort_by, year=year, offset=offset, limit=limit)
+    return jsonify({
+        'total': bits.bit_count(),
+        'year': year,
+        'sort': sort_by,
+        'offset': offset,
+        'items': [entry.to_dict() for entry in entries],
+    })
 
 # --- API 端点 (使用加载的数据) ---
 
 @app.route('/api/national-lines/total')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_total():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     if not lines_data or 'total' not in lines_data or 'years' not in lines_data['total'] or 'scores' not in lines_data['total']:
         return jsonify({"error": "Total data not found or incomplete"}), 404
     
@@ -432,8 +726,9 @@ def get_national_line_total():
     return jsonify(echarts_data)
 
 @app.route('/api/national-lines/politics')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_politics():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     # This old endpoint might still be used by something, or can be deprecated.
     # The new requirement is for a 3-year bar chart, served by /api/national-lines/politics-recent
     if not lines_data or 'politics' not in lines_data or 'years' not in lines_data['politics'] or 'scores' not in lines_data['politics']:
@@ -477,8 +772,9 @@ def get_national_line_politics():
     return jsonify(echarts_data)
 
 @app.route('/api/national-lines/others')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_others():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     # This endpoint is likely to be deprecated or significantly changed
     # given the new, more specific subject endpoints.
     if not lines_data or 'others' not in lines_data or 'years' not in lines_data['others'] or 'scores' not in lines_data['others']:
@@ -536,89 +832,37 @@ def get_national_line_others():
     return jsonify(echarts_data)
 
 @app.route('/api/stats/exam-type-ratio', methods=['GET'])
+@conditional_etag(lambda: (school_repo.version(), config_data_version(EXAM_TYPE_RATIOS_PATH)))
 def get_exam_type_ratio():
-    """API: 返回存储的考试类型比例数据。"""
-    # 从新的JSON文件加载数据
-    ratio_data = load_json_data(EXAM_TYPE_RATIOS_PATH, default_value=[
-        {"value": 0, "name": "自命题"},
-        {"value": 0, "name": "408统考"}
-    ])
-    return jsonify(ratio_data)
+    """API: 返回自命题与 408 统考的招生专业数量。"""
+    return dashboard_part_response('exam_type_ratio')
+
+def build_exam_type_ratio_payload():
+    """自命题与 408 统考的招生专业数量。
+
+    由专业索引按初试科目代码统计，随数据版本自动更新；专业索引不可用时退回 exam_type_ratios.json 中的旧数据。
+    """
+    ratio_data = load_exam_type_ratio()
+    if ratio_data is None:
+        ratio_data = load_config_data(EXAM_TYPE_RATIOS_PATH, default_value=[
+            {"value": 0, "name": "自命题"},
+            {"value": 0, "name": "408统考"}
+        ])
+    return ratio_data
 
 @app.route('/api/announcements')
+@conditional_etag(lambda: get_file_identity(ANNOUNCEMENTS_PATH))
 def get_announcements():
     """API 端点，用于获取公告信息"""
-    announcements_file_path = os.path.join(app.root_path, 'data', 'announcements.json')
-    lock_acquired = False
-    try:
-        # 确保数据目录存在
-        data_dir = os.path.dirname(announcements_file_path)
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-            app.logger.info(f"创建数据目录: {data_dir}")
-
-        # 如果文件不存在，创建一个空的JSON数组文件
-        if not os.path.exists(announcements_file_path):
-            with open(announcements_file_path, 'w', encoding='utf-8') as f_create:
-                json.dump([], f_create)
-            app.logger.info(f"创建空的公告文件: {announcements_file_path}")
-
-        with open(announcements_file_path, 'r', encoding='utf-8') as f:
-            # 尝试 portalocker
-            try:
-                # import portalocker # 已在顶部导入
-                portalocker.lock(f, portalocker.LOCK_SH)
-                lock_acquired = True
-                app.logger.debug(f"portalocker shared lock acquired for {announcements_file_path}")
-            except ImportError:
-                 # 尝试 fcntl (非Windows)
-                if platform.system() != "Windows":
-                    try:
-                        import fcntl
-                        fcntl.flock(f.fileno(), fcntl.LOCK_SH) # 获取共享锁
-                        lock_acquired = True
-                        app.logger.debug(f"fcntl shared lock acquired for {announcements_file_path}")
-                    except ImportError:
-                        app.logger.warning(f"portalocker and fcntl not available for reading {announcements_file_path}. Proceeding without lock.")
-                else:
-                    app.logger.warning(f"portalocker not available on Windows for reading {announcements_file_path}. fcntl not applicable. Proceeding without lock.")
-            except Exception as e_lock:
-                app.logger.error(f"Error acquiring lock for {announcements_file_path}: {e_lock}")
-                # 继续尝试无锁读取
+    return dashboard_part_response('announcements')
 
-            # 读取文件内容
-            try:
-                content = f.read()
-                if not content: # 文件为空
-                    app.logger.warning(f"公告文件 {announcements_file_path} 为空，返回空列表。")
-                    announcements = []
-                else:
-                    announcements = json.loads(content)
-            except json.JSONDecodeError as e_decode:
-                app.logger.error(f"在 get_announcements 中解析公告文件 {announcements_file_path} 时出错: {e_decode}")
-                return jsonify([]) 
-            finally:
-                if lock_acquired:
-                    try:
-                        # import portalocker # 已在顶部导入
-                        portalocker.unlock(f)
-                        app.logger.debug(f"portalocker lock released for {announcements_file_path}")
-                    except (ImportError, NameError, AttributeError): # NameError/AttributeError if portalocker was not successfully used
-                        if platform.system() != "Windows":
-                            try:
-                                import fcntl
-                                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                                app.logger.debug(f"fcntl lock released for {announcements_file_path}")
-                            except (ImportError, NameError):
-                                pass # No lock to release
-            return jsonify(announcements)
-        
-    except IOError as e_io:
-        app.logger.error(f"读取或锁定公告文件时发生IO错误 (get_announcements): {e_io}", exc_info=True)
-        return jsonify([]) # 出错时返回空列表
-    except Exception as e:
-        app.logger.error(f"获取公告时发生意外错误: {e}", exc_info=True)
-        return jsonify([]) # 出错时返回空列表
+def build_announcements_payload():
+    """公告列表 (文件格式不正确时为空列表)。"""
+    announcements = load_json_data(ANNOUNCEMENTS_PATH, default_value=[])
+    if not isinstance(announcements, list):
+        app.logger.error(f"公告文件 {ANNOUNCEMENTS_PATH} 格式不正确（应为列表），返回空列表。")
+        announcements = []
+    return announcements
 
 # --- 用户认证路由 ---
 
@@ -717,9 +961,9 @@ def profile():
     form = ProfileForm(data=user_data.get('profile', {}))
 
     # 动态填充 target_rank 的选项
-    all_schools_data = load_json_data(SCHOOLS_DATA_PATH)
-    if all_schools_data: # 确保数据已加载
-        all_ranks_for_form = sorted(list(set(s.get('computer_rank', '') for s in all_schools_data if s.get('computer_rank'))))
+    school_index = load_school_index()
+    if school_index: # 确保数据已加载；评级取值按数据版本预先统计
+        all_ranks_for_form = school_index.facets.values['computer_rank']
         form.target_rank.choices = [('', '任何等级')] + [(r, r) for r in all_ranks_for_form]
     else:
         form.target_rank.choices = [('', '任何等级')]
@@ -758,107 +1002,102 @@ def profile():
 # --- 其他功能路由 --- 
 # (添加占位路由以使 base.html 中的链接有效)
 
-@app.route('/school-list')
-def school_list():
-    # 获取查询参数和页码
-    search_query = request.args.get('q', '')
-    province_filter = request.args.get('province', '')
-    level_filter = request.args.get('level', '')
-    rank_filter = request.args.get('rank', '')
-    region_filter = request.args.get('region_filter', '')
-    sort_by = request.args.get('sort', 'favorites') # 修正这里的默认值为 'favorites'
-    page = request.args.get('page', 1, type=int)
-    per_page = 20 # 每页显示数量
+# --- 新增：院校库页面片段缓存 ---
+# 筛选表单、结果表格与分页只取决于查询参数、院校数据版本与收藏数：渲染结果按 (数据版本, 收藏数 epoch)
+# 缓存在 school_list_cache 中，匿名与登录用户共用；收藏按钮的状态由页面脚本按当前用户的收藏叠加。
+school_list_cache = FragmentCache(max_entries=app.config['SCHOOL_LIST_CACHE_ENTRIES'])
 
-    all_schools = load_json_data(SCHOOLS_DATA_PATH)
-    if not all_schools:
-        flash('无法加载学校数据。', 'warning')
-        all_schools = []
+def render_school_list_results(school_index, search_query, filters, sort_by, page):
+    """渲染院校库的筛选表单、结果表格与分页，返回 (HTML, 是否可以缓存)；筛选或排序出错时不缓存。"""
+    per_page = 20 # 每页显示数量
+    cacheable = school_index is not None
 
-    filtered_schools = all_schools
-    if search_query:
-        filtered_schools = [
-            s for s in filtered_schools
-            if search_query.lower() in s.get('name', '').lower()
-        ]
-    if province_filter:
-        filtered_schools = [s for s in filtered_schools if s.get('province') == province_filter]
-    if level_filter:
-        filtered_schools = [s for s in filtered_schools if s.get('level') == level_filter]
-    if rank_filter:
-        filtered_schools = [s for s in filtered_schools if s.get('computer_rank') == rank_filter]
-    if region_filter:
-        filtered_schools = [s for s in filtered_schools if s.get('region') == region_filter]
-        
-    # 加载收藏数
-    favorites_counts = load_favorites_count() # 确保 get_favorites_count() 正确工作
+    name_positions = None
+    filter_bits = 0
+    try:
+        if school_index:
+            name_positions = school_index.search(search_query) if search_query else None
+            filter_bits = school_index.bitmaps.select(filters, positions=name_positions)
+    except Exception as e:
+        app.logger.error(f"筛选学校数据时出错: {e}", exc_info=True)
+        filter_bits = 0
+        cacheable = False
 
-    # 为每个学校添加收藏数字段，以便后续排序和显示
-    for school in filtered_schools:
-        school_id = school.get('id', school.get('name')) # 获取学校ID
-        # 确保使用字符串ID进行查找，因为JSON键可能是字符串
-        school['favorites_count'] = favorites_counts.get(str(school_id), 0) 
+    # 排序使用按数据版本预先排好的顺序 (收藏数顺序随收藏事件增量更新)，只取当前页，不再对整个筛选结果排序
+    total_schools = filter_bits.bit_count()
+    total_pages = ceil(total_schools / per_page)
+    start_index = (page - 1) * per_page
+    page_positions = []
+    if school_index and start_index >= 0:
+        try:
+            favorites_ordering = school_index.orderings.favorites
+            favorites_ordering.sync(favorites_ledger)
+            page_positions = school_index.orderings.page(sort_by, filter_bits, start_index, per_page)
+        except Exception as e:
+            app.logger.error(f"读取排序后的学校列表时出错: {e}", exc_info=True)
+            cacheable = False
 
-    # --- 修正排序逻辑的默认值 ---
-    # 获取排序参数，确保默认按收藏数排序
-    sort_by = request.args.get('sort', 'favorites') # 修正这里的默认值为 'favorites'
+    # 学校记录在请求间共享且只读：收藏数以视图的形式叠加，不修改、不复制底层记录
+    paginated_schools = [
+        SchoolView(school_index.schools[position], favorites_count=favorites_ordering.count(position))
+        for position in page_positions
+    ]
 
-    if sort_by == 'default':
-        # 按默认的区域、省份、名称排序
-        filtered_schools.sort(key=lambda x: (
-            x.get('region') or '', 
-            x.get('province') or '', 
-            x.get('name') or ''
-        ))
-        app.logger.debug("Sorting schools by default (region, province, name).")
-    else: # 默认情况 (sort_by is 'favorites' or not provided)
-        # 按 'favorites_count' 降序排序
-        filtered_schools.sort(key=lambda x: x.get('favorites_count', 0), reverse=True)
-        app.logger.debug("Sorting schools by favorites count (descending) as default or requested.")
-    # --- 结束修改 ---
+    # 各筛选项的取值，以及应用其他条件后每个取值对应的学校数 (如 "四川 (12)")
+    facet_values = school_index.facets.values if school_index else {}
+    facet_counts = {}
+    if school_index:
+        facet_counts = school_index.facets.counts(filters, positions=name_positions)
 
-    total_schools = len(filtered_schools)
-    total_pages = ceil(total_schools / per_page)
-    start_index = (page - 1) * per_page
-    end_index = start_index + per_page
-    paginated_schools = filtered_schools[start_index:end_index]
+    html = render_template('_school_list_results.html',
+                           schools=paginated_schools,
+                           page=page,
+                           total_pages=total_pages,
+                           total_schools=total_schools,
+                           all_provinces=facet_values.get('province', []),
+                           all_levels=facet_values.get('level', []),
+                           all_ranks=facet_values.get('computer_rank', []),
+                           all_regions=facet_values.get('region', []),
+                           all_exam_types=facet_values.get('exam_type', []),
+                           facet_counts=facet_counts,
+                           current_province=filters['province'],
+                           current_level=filters['level'],
+                           current_rank=filters['computer_rank'],
+                           current_region=filters['region'],
+                           current_exam_type=filters['exam_type'],
+                           current_sort=sort_by, # 传递当前的排序方式
+                           search_query=search_query)
+    return Markup(html), cacheable
 
-    all_provinces = sorted(list(set(s.get('province', '未知省份') for s in all_schools if s.get('province'))))
-    all_levels = sorted(list(set(s.get('level', '普通院校') for s in all_schools if s.get('level'))), key=lambda x: (x != '985', x != '211', x != '双一流', x))
-    all_ranks = sorted(list(set(s.get('computer_rank', '') for s in all_schools if s.get('computer_rank'))))
-    all_regions = sorted(list(set(s.get('region', '') for s in all_schools if s.get('region'))))
+@app.route('/school-list')
+def school_list():
+    # 获取查询参数和页码
+    search_query, filters = parse_school_filters(request.args)
+    sort_by = request.args.get('sort', 'favorites') # 修正这里的默认值为 'favorites'
+    page = request.args.get('page', 1, type=int)
 
     current_user_favorites = []
     if 'username' in session:
         user_data = get_user_data(session['username'])
         if user_data and 'favorites' in user_data:
             current_user_favorites = user_data['favorites']
-    
-    # # Debugging logs moved or removed for clarity, favorite count is already added above
-    # app.logger.debug(f"[school_list] Loaded favorites counts: {favorites_counts}")
-    # app.logger.debug("--- [school_list] Assigning favorite status and counts to paginated schools ---") # DEBUG
-    for school in paginated_schools:
-        school_id = school.get('id')
-        school['is_favorite'] = school_id in current_user_favorites
-        # Favorites count is already added above
-        # school['favorites_count'] = favorites_counts.get(str(school_id), 0)
-    # app.logger.debug("--- [school_list] Finished assigning --- ") # DEBUG
+
+    school_index = load_school_index() # 列表页只需要顶层字段，筛选项与计数按数据版本预先统计
+    if not school_index:
+        flash('无法加载学校数据。', 'warning')
+        results_html, _ = render_school_list_results(None, search_query, filters, sort_by, page)
+    else:
+        cache_key = (search_query, tuple(tuple(filters[field]) for _, field in SCHOOL_FILTER_PARAMS), sort_by, page)
+        # 先取 epoch 再渲染：渲染期间收藏数发生变化时，结果以旧 epoch 缓存，下一次请求会重新渲染
+        version = (school_index.version_tag, favorites_ledger.epoch())
+        results_html = school_list_cache.get(cache_key, version)
+        if results_html is None:
+            results_html, cacheable = render_school_list_results(school_index, search_query, filters, sort_by, page)
+            if cacheable:
+                school_list_cache.put(cache_key, version, results_html)
 
     return render_template('school_list.html',
-                           schools=paginated_schools,
-                           page=page,
-                           total_pages=total_pages,
-                           total_schools=total_schools,
-                           all_provinces=all_provinces,
-                           all_levels=all_levels,
-                           all_ranks=all_ranks,
-                           all_regions=all_regions,
-                           current_province=province_filter,
-                           current_level=level_filter,
-                           current_rank=rank_filter,
-                           current_region=region_filter,
-                           current_sort=sort_by, # 传递当前的排序方式
-                           search_query=search_query,
+                           results_html=results_html,
                            current_user_favorites=current_user_favorites)
 
 @app.route('/recommend', methods=['GET'])
@@ -901,13 +1140,11 @@ def recommend():
         elif not (target_level or target_location):
             flash('请输入期望的院校等级或目标地区以获取推荐 (或在个人中心设置)。', 'warning')
         else:
-            favorites_counts = get_favorites_count()
             all_recommended_schools = calculate_recommendations(
                 target_score,
                 target_level,
                 target_rank,
-                target_location,
-                favorites_counts
+                target_location
             )
             
             total_items = len(all_recommended_schools)
@@ -942,13 +1179,7 @@ def recommend():
 
 @app.route('/school/<path:school_id>')
 def school_detail(school_id):
-    schools_data_list = load_json_data(SCHOOLS_DATA_PATH)
-    if not schools_data_list:
-        abort(404, description="无法加载学校数据")
-    
-    school = next((s for s in schools_data_list if s.get('id') == school_id), None)
-    if school is None:
-        school = next((s for s in schools_data_list if s.get('name') == school_id), None)
+    school = find_school(school_id) # 依次按 ID、名称、别名查找
 
     if school is None:
         app.logger.warning(f"尝试访问不存在的学校: {school_id}")
@@ -960,12 +1191,14 @@ def school_detail(school_id):
         if user_data and 'favorites' in user_data:
             user_favorites = user_data['favorites']
             
-    score_chart_options = None
+    # 图表配置每个数据版本按学校生成一次并已序列化为 JSON，这里只按学校取出
+    chart_payloads = load_school_charts(school) or {}
 
     return render_template('school_detail.html', 
                            school=school, 
                            user_favorites=user_favorites,
-                           score_chart_options=score_chart_options)
+                           score_chart_json=chart_payloads.get('score'),
+                           enrollment_chart_json=chart_payloads.get('enrollment'))
 
 @app.route('/api/school/favorite/<path:school_id>', methods=['POST', 'DELETE'])
 def toggle_favorite(school_id):
@@ -980,77 +1213,67 @@ def toggle_favorite(school_id):
         return jsonify({'status': 'error', 'message': '无法加载有效的用户信息，请稍后重试或联系管理员。'}), 500
     # --- 结束检查 ---
 
-    # 加载学校数据用于验证
-    schools_data_list = load_json_data(SCHOOLS_DATA_PATH)
-    if not schools_data_list:
-        app.logger.error("无法加载学校数据，无法验证 school_id。")
-        # 返回错误，因为无法确认学校是否存在
-        return jsonify({'status': 'error', 'message': '无法加载学校数据'}), 500
-
-    # 检查学校是否存在 (同时检查 ID 和 Name 以应对可能的复合ID)
-    school_exists_by_id = any(s.get('id') == school_id for s in schools_data_list)
-    school_exists_by_name = any(s.get('name') == school_id for s in schools_data_list)
-
-    if not school_exists_by_id and not school_exists_by_name:
+    # 检查学校是否存在 (ID、名称或别名均可)
+    school = find_school(school_id)
+    if school is None:
          app.logger.warning(f"尝试收藏/取消收藏不存在的学校ID或名称: {school_id}")
          return jsonify({'status': 'error', 'message': '无效的学校ID或名称。'}), 404
     # --- 结束学校存在性检查 ---
 
-    favorites = user_data.get('favorites', [])
-    # --- 确保 favorites 是列表 ---
-    if not isinstance(favorites, list):
-        app.logger.error(f"用户 '{username}' 的收藏夹数据不是列表格式。已重置为空列表。")
-        favorites = []
-    # --- 结束列表检查 ---
-
-    action = ''
-    count_changed = False
-    new_total_count = 0 # 初始化
-
-    # 加载当前的全局收藏数
-    current_counts = load_favorites_count()
-    # 使用真实的 school ID 来更新计数 (如果通过 name 匹配)
-    actual_school_id = school_id # 默认使用传入的
-    if not school_exists_by_id and school_exists_by_name:
-        # 如果是通过 name 匹配到的，理论上应该找到对应的 ID，但这里简化处理，仍用 name 作为 key
-        # 更优方案是在找到 name 后获取其 ID
-        pass 
-    school_current_count = current_counts.get(actual_school_id, 0)
-
-    if request.method == 'POST':
-        if actual_school_id not in favorites:
+    # 通过名称或别名匹配时统一使用学校的规范键 (与收藏数统计一致)
+    actual_school_id = favorites_key(school)
+    result = {'action': '', 'corrupt': False, 'key': actual_school_id}
+
+    def apply_toggle(current_user_data):
+        # 在用户文件的写入锁内完成"读取-修改-写回"，同一用户的并发点击不会重复计数
+        if not isinstance(current_user_data, dict):
+            return None
+        favorites = current_user_data.get('favorites', [])
+        # --- 确保 favorites 是列表 ---
+        if not isinstance(favorites, list):
+            result['corrupt'] = True
+            favorites = []
+        # --- 结束列表检查 ---
+        if request.method == 'POST':
+            if actual_school_id in favorites:
+                result['action'] = 'already_favorited'
+                return None
             favorites.append(actual_school_id)
-            action = 'favorited'
-            new_total_count = school_current_count + 1
-            count_changed = True
-        else:
-            action = 'already_favorited'
-            new_total_count = school_current_count # 数量不变
-    elif request.method == 'DELETE':
-        if actual_school_id in favorites:
-            favorites.remove(actual_school_id)
-            action = 'unfavorited'
-            new_total_count = max(0, school_current_count - 1) # 确保不小于0
-            count_changed = True
-        else:
-            action = 'not_favorited'
-            new_total_count = school_current_count # 数量不变
-        
-    # 保存用户数据
-    user_data['favorites'] = favorites
-    if not save_user_data(username, user_data):
-        # 保存用户数据失败是严重问题，需要回滚或明确告知失败
-        app.logger.error(f"保存用户 '{username}' 的收藏夹时出错！")
+            result['action'] = 'favorited'
+        else: # DELETE
+            if actual_school_id not in favorites and school_id in favorites:
+                result['key'] = school_id # 旧数据中以传入的名称保存的收藏
+            if result['key'] not in favorites:
+                result['action'] = 'not_favorited'
+                return None
+            favorites.remove(result['key'])
+            result['action'] = 'unfavorited'
+        current_user_data['favorites'] = favorites
+        return current_user_data
+
+    user_file = os.path.join(USERS_DIR, f"{username}.json")
+    try:
+        update_json(user_file, apply_toggle, indent=4)
+    except Exception as e:
+        # 保存用户数据失败是严重问题，需要明确告知失败
+        app.logger.error(f"保存用户 '{username}' 的收藏夹时出错: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': '保存用户收藏夹时出错'}), 500
+    if result['corrupt']:
+        app.logger.error(f"用户 '{username}' 的收藏夹数据不是列表格式。已重置为空列表。")
+    action = result['action']
 
-    # 如果收藏状态实际改变了，则更新并保存全局收藏数
-    if count_changed:
-        current_counts[actual_school_id] = new_total_count
-        if not save_favorites_count(current_counts):
-            # 警告：用户数据已更新，但全局计数更新失败
-            app.logger.error(f"更新全局收藏数文件失败，但用户 {username} 的收藏夹已更新！可能导致计数不一致。")
-            # 即使计数文件保存失败，用户操作已成功，仍返回成功和预期的计数
-            pass # 继续执行，返回成功和预期的 new_total_count
+    # 收藏状态实际改变时只向收藏事件日志追加一条记录，全局计数由日志聚合得到
+    try:
+        if action == 'favorited':
+            new_total_count = favorites_ledger.record(username, actual_school_id, 1)
+        elif action == 'unfavorited':
+            new_total_count = favorites_ledger.record(username, result['key'], -1)
+        else:
+            new_total_count = favorites_ledger.count(actual_school_id) # 数量不变
+    except Exception as e:
+        # 警告：用户数据已更新，但全局计数更新失败；用户操作已成功，仍返回成功
+        app.logger.error(f"写入收藏事件日志失败，但用户 {username} 的收藏夹已更新！可能导致计数不一致: {e}", exc_info=True)
+        new_total_count = 0
 
     message = ''
     if action == 'favorited': message = '收藏成功！'
@@ -1058,94 +1281,17 @@ def toggle_favorite(school_id):
     # 返回包含新计数的成功响应
     return jsonify({'status': 'success', 'action': action, 'school_id': actual_school_id, 'message': message, 'new_count': new_total_count})
 
-def calculate_recommendations(target_score, target_level, target_rank_pref, target_location, favorites_counts):
-    """根据用户偏好计算推荐结果（所有维度均用相似度差值）"""
-    schools = load_json_data(SCHOOLS_DATA_PATH)
-    if not schools:
+def calculate_recommendations(target_score, target_level, target_rank_pref, target_location):
+    """根据用户偏好计算推荐结果（所有维度均用相似度差值），按数据版本预先构建的特征数组向量化打分 (utils/recommender.py)。"""
+    scorer = load_recommender()
+    if not scorer or not scorer.schools:
         app.logger.error("计算推荐时无法加载学校数据！")
-        return [] 
+        return []
     try:
         target_score = int(target_score) if target_score is not None else None
     except (ValueError, TypeError):
         target_score = None
-
-    # 院校等级分数映射
-    level_scores = {"985": 60, "211": 40, "双一流": 20, "普通院校": 0, None: 0, "": 0}
-    # 计算机等级分数映射
-    rank_map = {"A+": 100, "A": 80, "A-": 70, "B+": 60, "B": 50, "B-": 40, "C+": 30, "C": 20, "C-": 10, "无": 0, None: 0, "": 0}
-    # 地区分数映射（只做完全匹配，否则为0）
-    location_scores = {}
-    # 权重
-    weights = {"score_similarity": 0.4, "level": 0.2, "rank": 0.2, "location": 0.2}
-
-    def get_similarity(target, actual):
-        if target is None or actual is None:
-            return 0
-        return max(0, 100 - abs(target - actual))
-
-    recommendations = []
-    for school in schools:
-        school_id = school.get('id', school.get('name'))
-        recommend_score = 0
-
-        # 1. 分数相似度
-        score_similarity = 0
-        school_score_line = None
-        if target_score is not None:
-            major_max_scores = []
-            if school.get('departments'):
-                for dept in school.get('departments', []):
-                    for major in dept.get('majors', []):
-                        score_str = major.get('score_lines', {}).get('2024') or major.get('score_lines', {}).get('2023')
-                        if score_str and isinstance(score_str, str):
-                            nums = [int(x) for x in re.findall(r'\d+', score_str)]
-                            if nums:
-                                major_max_scores.append(max(nums))
-            if major_max_scores:
-                school_score_line = sum(major_max_scores) / len(major_max_scores)
-                score_similarity = get_similarity(target_score, school_score_line)
-        recommend_score += weights["score_similarity"] * score_similarity
-
-        # 2. 院校等级相似度
-        school_level_val = school.get('level')
-        target_level_val = level_scores.get(target_level, None)
-        school_level_score = level_scores.get(school_level_val, None)
-        level_similarity = 0
-        if target_level_val is not None and school_level_score is not None:
-            level_similarity = get_similarity(target_level_val, school_level_score)
-        recommend_score += weights["level"] * level_similarity
-
-        # 3. 计算机等级相似度
-        school_rank_val = school.get('computer_rank')
-        target_rank_val = rank_map.get(target_rank_pref, None)
-        school_rank_score = rank_map.get(school_rank_val, None)
-        rank_similarity = 0
-        if target_rank_val is not None and school_rank_score is not None:
-            rank_similarity = get_similarity(target_rank_val, school_rank_score)
-        recommend_score += weights["rank"] * rank_similarity
-
-        # 4. 地区相似度（完全一致为100，否则为0）
-        location_similarity = 0
-        if target_location:
-            if school.get('province') == target_location or school.get('region') == target_location:
-                location_similarity = 100
-            else:
-                location_similarity = 0
-        recommend_score += weights["location"] * location_similarity
-
-        recommendations.append({
-            "id": school_id,
-            "name": school.get("name"),
-            "level": school.get("level"),
-            "province": school.get("province"),
-            "region": school.get("region"),
-            "computer_rank": school.get("computer_rank"),
-            "enrollment_24_school_total": school.get("enrollment_24_school_total", "未知"),
-            "recommend_score": round(recommend_score, 2),
-        })
-
-    recommendations.sort(key=lambda x: x['recommend_score'], reverse=True)
-    return recommendations[:20]
+    return scorer.recommend(target_score, target_level, target_rank_pref, target_location)
 
 @app.route('/admin/')
 @admin_required
@@ -1155,13 +1301,15 @@ def admin_dashboard():
         user_count = len([name for name in os.listdir(USERS_DIR) if name.endswith(".json")])
     announcement_count = len(load_json_data(ANNOUNCEMENTS_PATH, default_value=[]))
     # Load school data and count
-    schools_data = load_json_data(SCHOOLS_DATA_PATH, default_value=[])
+    schools_data = load_school_summaries()
     school_count = len(schools_data)
 
     return render_template('admin/dashboard.html',
                            user_count=user_count,
                            announcement_count=announcement_count,
-                           school_count=school_count) # Pass school_count to template
+                           school_count=school_count, # Pass school_count to template
+                           compression_stats=compressed_cache.stats.snapshot(),
+                           compressed_cache_entries=len(compressed_cache))
 
 @app.route('/admin/users')
 @admin_required
@@ -1246,58 +1394,19 @@ def admin_announcements():
             flash('公告标题不能为空！', 'error')
         else:
             new_announcement = {"title": title, "url": url}
-            announcements_file_path = ANNOUNCEMENTS_PATH # Use defined path
-            current_announcements = load_json_data(announcements_file_path, default_value=[]) # Use robust loader
-            current_announcements.append(new_announcement)
-            
-            lock_acquired = False
+
+            def append_announcement(current_announcements):
+                return list(current_announcements) + [new_announcement]
+
             try:
-                with open(announcements_file_path, 'w', encoding='utf-8') as f:
-                    # 尝试 portalocker
-                    try:
-                        # import portalocker # 已在顶部导入
-                        portalocker.lock(f, portalocker.LOCK_EX)
-                        lock_acquired = True
-                    except ImportError:
-                        if platform.system() != "Windows":
-                            try:
-                                import fcntl
-                                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                                lock_acquired = True
-                            except ImportError:
-                                app.logger.warning(f"portalocker and fcntl not available for writing {announcements_file_path}. Proceeding without lock.")
-                        else:
-                             app.logger.warning(f"portalocker not available on Windows for writing {announcements_file_path}. fcntl not applicable. Proceeding without lock.")
-                    except Exception as e_lock:
-                        app.logger.error(f"Error acquiring exclusive lock for {announcements_file_path}: {e_lock}")
-
-                    # 写入文件
-                    try:
-                        json.dump(current_announcements, f, ensure_ascii=False, indent=2)
-                        f.flush()
-                        os.fsync(f.fileno()) # 确保写入磁盘
-                        flash('新公告已添加。', 'success')
-                    except Exception as e_write:
-                        flash(f'保存公告时出错: {e_write}', 'error')
-                        app.logger.error(f"写入公告到 {announcements_file_path} 时出错: {e_write}", exc_info=True)
-                    finally:
-                        if lock_acquired:
-                            try:
-                                # import portalocker # 已在顶部导入
-                                portalocker.unlock(f)
-                            except (ImportError, NameError, AttributeError):
-                                if platform.system() != "Windows":
-                                    try:
-                                        import fcntl
-                                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                                    except (ImportError, NameError):
-                                        pass
-            except IOError as e:
-                flash(f'打开或写入公告文件时出错: {e}', 'error')
-                app.logger.error(f"IOError for {announcements_file_path} in admin_announcements: {e}", exc_info=True)
-            except Exception as e_outer:
-                flash(f'保存公告时发生未知错误: {e_outer}', 'error')
-                app.logger.error(f"未知错误 for {announcements_file_path} in admin_announcements: {e_outer}", exc_info=True)
+                update_json(ANNOUNCEMENTS_PATH, append_announcement, default=[])
+                flash('新公告已添加。', 'success')
+            except json.JSONDecodeError as e_decode:
+                flash(f'公告数据文件格式错误，无法保存: {e_decode}', 'error')
+                app.logger.error(f"解析公告文件 {ANNOUNCEMENTS_PATH} 时出错: {e_decode}", exc_info=True)
+            except Exception as e_write:
+                flash(f'保存公告时出错: {e_write}', 'error')
+                app.logger.error(f"写入公告到 {ANNOUNCEMENTS_PATH} 时出错: {e_write}", exc_info=True)
 
         return redirect(url_for('admin_announcements'))
 
@@ -1307,8 +1416,6 @@ def admin_announcements():
 @app.route('/admin/announcements/reorder', methods=['POST'])
 @admin_required
 def admin_reorder_announcements():
-    announcements_file_path = ANNOUNCEMENTS_PATH # Use defined path
-    lock_acquired = False
     try:
         new_order_data = request.get_json()
         if not new_order_data or 'order' not in new_order_data:
@@ -1318,24 +1425,7 @@ def admin_reorder_announcements():
         ordered_titles = new_order_data['order']
         app.logger.debug(f"接收到的新公告顺序 (titles): {ordered_titles}")
 
-        with open(announcements_file_path, 'r+', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_EX)
-            try:
-                content = f.read()
-                if not content:
-                    current_announcements = []
-                else:
-                    current_announcements = json.loads(content)
-            except json.JSONDecodeError as e_decode:
-                app.logger.error(f"在 admin_reorder_announcements 中解析公告文件时出错: {e_decode}")
-                if lock_acquired: # Release lock if acquired before error
-                    try: portalocker.unlock(f)
-                    except: 
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except: pass
-                return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_decode}'}), 500
-
+        def reorder(current_announcements):
             announcement_map = {ann['title']: ann for ann in current_announcements}
             reordered_announcements = []
             processed_titles = set()
@@ -1358,46 +1448,24 @@ def admin_reorder_announcements():
                     for lost_title in lost_titles:
                         if lost_title in announcement_map:
                             reordered_announcements.append(announcement_map[lost_title])
-            
+
             if missing_titles:
                 app.logger.warning(f"前端发送了以下不存在的公告标题: {missing_titles}")
 
             app.logger.debug(f"即将写入公告文件的内容:\n{json.dumps(reordered_announcements, indent=2, ensure_ascii=False)}")
-            
-            f.seek(0)
-            f.truncate()
-            json.dump(reordered_announcements, f, ensure_ascii=False, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-            app.logger.debug(f"公告文件 {announcements_file_path} 保存后的内容:\n{json.dumps(reordered_announcements, indent=2, ensure_ascii=False)}")
-            
-            if lock_acquired:
-                try: 
-                    # import portalocker # 已在顶部导入
-                    portalocker.unlock(f)
-                except (ImportError, NameError, AttributeError):
-                    if platform.system() != "Windows":
-                        try: 
-                            import fcntl
-                            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                        except (ImportError, NameError):
-                            pass
-            return jsonify({'status': 'success', 'message': '公告顺序已更新'})
-
-    except IOError as e_io:
-        app.logger.error(f"读写或锁定公告文件时发生IO错误: {e_io}", exc_info=True)
+            return reordered_announcements
+
+        update_json(ANNOUNCEMENTS_PATH, reorder, default=[])
+        return jsonify({'status': 'success', 'message': '公告顺序已更新'})
+
+    except json.JSONDecodeError as e_json: # 公告文件或请求数据解析失败
+        app.logger.error(f"解析公告数据时出错: {e_json}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_json}'}), 500
+    except OSError as e_io:
+        app.logger.error(f"读写公告文件时发生IO错误: {e_io}", exc_info=True)
         return jsonify({'status': 'error', 'message': '文件操作失败'}), 500
-    except json.JSONDecodeError as e_json: # For request.get_json()
-        app.logger.error(f"解析请求数据时出错: {e_json}", exc_info=True)
-        return jsonify({'status': 'error', 'message': f'请求数据格式错误: {e_json}'}), 400
     except Exception as e:
         app.logger.error(f"处理公告排序请求时发生意外错误: {e}", exc_info=True)
-        if lock_acquired: # Ensure lock release on unexpected error
-            try: portalocker.unlock(f) # Assuming f is still in scope
-            except: 
-                if platform.system() != "Windows":
-                    try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    except: pass
         return jsonify({'status': 'error', 'message': f'处理请求时发生内部错误: {e}'}), 500
 
 @app.route('/admin/profile', methods=['GET', 'POST'])
@@ -1450,7 +1518,7 @@ def admin_user_detail(username):
     display_data = user_data.copy()
     display_data.pop('password_hash', None)
 
-    schools_data = load_json_data(SCHOOLS_DATA_PATH, default_value=[]) # 加载学校数据
+    schools_data = load_school_summaries() # 加载学校数据
     return render_template('admin/user_detail.html', user=display_data, schools_data=schools_data) # 传递 schools_data
 
 @app.route('/admin/user/toggle_admin/<username>', methods=['POST'])
@@ -1482,7 +1550,7 @@ def toggle_admin_status(username):
 @app.route('/admin/schools')
 @admin_required
 def admin_schools():
-    schools_data_list_full = load_json_data(SCHOOLS_DATA_PATH)
+    schools_data_list_full = load_schools_data()
     if schools_data_list_full is None:
         flash('无法加载学校数据文件！', 'danger')
         schools_data_list_full = []
@@ -1491,14 +1559,17 @@ def admin_schools():
     
     filtered_schools = schools_data_list_full
     if search_query:
-        query_lower = search_query.lower()
-        filtered_schools = [
-            school for school in schools_data_list_full 
-            if (school.get('name') and isinstance(school.get('name'), str) and query_lower in school.get('name').lower()) or \
-               (school.get('id') and query_lower in str(school.get('id')).lower()) or
-               (school.get('province') and isinstance(school.get('province'), str) and query_lower in school.get('province').lower()) or \
-               (school.get('computer_rank') and isinstance(school.get('computer_rank'), str) and query_lower in school.get('computer_rank').lower())
-        ]
+        # 名称、id、省份、评级的子串检索走 n-gram 倒排索引；索引位置与 load_schools 的顺序一致
+        school_index = load_school_index()
+        if school_index is not None and len(school_index) == len(schools_data_list_full):
+            positions = school_index.search(search_query, fields=ADMIN_SEARCH_FIELDS)
+            filtered_schools = [schools_data_list_full[i] for i in positions]
+        else:
+            query_lower = search_query.lower()
+            filtered_schools = [
+                school for school in schools_data_list_full
+                if any(query_lower in str(school.get(field) or '').lower() for field in ADMIN_SEARCH_FIELDS)
+            ]
 
     total_schools = len(filtered_schools)
     page = request.args.get('page', 1, type=int)
@@ -1506,15 +1577,16 @@ def admin_schools():
     
     start = (page - 1) * per_page
     end = start + per_page
-    paginated_schools = filtered_schools[start:end]
-    
     total_pages = ceil(total_schools / per_page) if total_schools > 0 else 1
 
-    # 为每个学校计算院系和专业数量
-    for school_item in paginated_schools: # 使用 school_item 避免与外层 school 变量冲突 (如果存在)
-        departments = school_item.get('departments', [])
-        school_item['department_count'] = len(departments)
-        school_item['major_count'] = sum(len(dept.get('majors', [])) for dept in departments)
+    # 为每个学校计算院系和专业数量 (以视图叠加，不修改共享的学校记录)
+    paginated_schools = []
+    for school_item in filtered_schools[start:end]: # 使用 school_item 避免与外层 school 变量冲突 (如果存在)
+        departments = school_item.get('departments') or ()
+        paginated_schools.append(SchoolView(
+            school_item,
+            department_count=len(departments),
+            major_count=sum(len(dept.get('majors') or ()) for dept in departments)))
 
     return render_template('admin/schools.html',
                            schools=paginated_schools,
@@ -1541,36 +1613,21 @@ def trigger_crawler():
 @app.route('/admin/edit_school/<school_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_school(school_id):
-    schools_data_current = load_json_data(SCHOOLS_DATA_PATH)
-    if not schools_data_current:
-        flash('无法加载学校数据文件！', 'danger')
-        return redirect(url_for('admin_schools'))
-
-    school_to_edit = next((s for s in schools_data_current if s.get('id') == school_id), None)
+    # 只按 ID 查找单个学校；返回的是只读记录，转换为普通 dict 后再用于表单与修改
+    school_record = find_school(school_id, match_name=False)
     
-    if not school_to_edit:
+    if not school_record:
         flash(f'未找到该院校。 ({school_id})', 'danger')
         return redirect(url_for('admin_schools'))
+    school_to_edit = thaw(school_record)
 
     # 使用 school_to_edit 初始化 form 对象 (避免直接用 data= 覆盖)
     form = SchoolEditForm()
 
     if form.validate_on_submit(): # POST 请求
         try:
-            school_index = -1
-            for i, school_iter in enumerate(schools_data_current):
-                if school_iter.get('id') == school_id:
-                    school_index = i
-                    break
-            
-            if school_index == -1:
-                flash('保存时未能找到学校索引，更新失败。', 'danger')
-                # 在POST失败时，也需要传递 departments_json_str 以便重新渲染模板
-                departments_json_str_for_template = json.dumps(school_to_edit.get('departments', []), ensure_ascii=False, indent=2)
-                return render_template('admin/edit_school.html', form=form, school=school_to_edit, departments_json_str=departments_json_str_for_template)
-
-            # 手动更新表单中的字段到 schools_data_current[school_index]
-            target_school_in_list = schools_data_current[school_index]
+            # 手动更新表单中的字段到学校数据的副本上，再只保存这一所学校
+            target_school_in_list = thaw(school_to_edit)
             target_school_in_list['name'] = form.name.data
             target_school_in_list['level'] = form.level.data
             target_school_in_list['province'] = form.province.data
@@ -1604,7 +1661,7 @@ def admin_edit_school(school_id):
                     # 如果 JSON 格式错误，保留原来的数据
                     target_school_in_list['departments'] = original_departments_data 
             
-            if save_schools_data(schools_data_current):
+            if save_school_record(target_school_in_list):
                 flash('院校信息更新成功!' + (' (院系JSON未更改或未提交)' if not json_updated else ''), 'success')
             else:
                  flash('院校信息已在内存中更新，但写入文件失败！', 'danger')
@@ -1626,81 +1683,18 @@ def admin_edit_school(school_id):
 @app.route('/admin/edit-exam-ratios', methods=['GET'])
 @admin_required
 def admin_edit_exam_ratios():
-    exam_ratios_data = load_json_data(EXAM_TYPE_RATIOS_PATH, default_value=[])
-    return render_template('admin/edit_exam_ratios.html', exam_ratios_data=exam_ratios_data)
-
-@app.route('/admin/save-exam-ratios', methods=['POST'])
-@admin_required
-def admin_save_exam_ratios():
-    lock_acquired = False
-    try:
-        ratios_form = request.form.to_dict(flat=False)
-        
-        updated_ratios = []
-        
-        i = 0
-        while True:
-            name_key = f'ratios[{i}][name]'
-            value_key = f'ratios[{i}][value]'
-            if name_key in request.form and value_key in request.form:
-                name = request.form[name_key]
-                try:
-                    value = int(request.form[value_key])
-                    updated_ratios.append({"name": name, "value": value})
-                except ValueError:
-                    flash(f'项目 "{name}" 的值为无效数字，已忽略。 ', 'warning')
-                i += 1
-            else:
-                break
-
-        if not updated_ratios:
-            flash('没有提交有效的比例数据。', 'warning')
-            return redirect(url_for('admin_edit_exam_ratios'))
-
-        with open(EXAM_TYPE_RATIOS_PATH, 'w', encoding='utf-8') as f:
-            # 尝试 portalocker
-            try:
-                # import portalocker # 已在顶部导入
-                portalocker.lock(f, portalocker.LOCK_EX)
-                lock_acquired = True
-            except ImportError:
-                if platform.system() != "Windows":
-                    try:
-                        import fcntl
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                        lock_acquired = True
-                    except ImportError:
-                        app.logger.warning(f"portalocker and fcntl not available for saving exam ratios. Proceeding without lock.")
-                else:
-                    app.logger.warning(f"portalocker not available on Windows for saving exam ratios. fcntl not applicable. Proceeding without lock.")
-            except Exception as e_lock:
-                 app.logger.error(f"Error acquiring lock for exam ratios: {e_lock}")
-            
-            # 写入文件
-            try:
-                json.dump(updated_ratios, f, ensure_ascii=False, indent=2)
-                f.flush()
-                os.fsync(f.fileno())
-                flash('考试类型比例已成功更新。', 'success')
-            except Exception as e_write:
-                app.logger.error(f"保存考试类型比例时写入文件出错: {e_write}", exc_info=True)
-                flash(f'保存考试类型比例时写入文件发生错误: {e_write}', 'danger')
-            finally:
-                if lock_acquired:
-                    try:
-                        # import portalocker # 已在顶部导入
-                        portalocker.unlock(f)
-                    except (ImportError, NameError, AttributeError):
-                        if platform.system() != "Windows":
-                            try:
-                                import fcntl
-                                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except (ImportError, NameError):
-                                pass
-    except Exception as e:
-        app.logger.error(f"保存考试类型比例时发生主错误: {e}", exc_info=True)
-        flash(f'保存考试类型比例时发生错误: {e}', 'danger')
-    return redirect(url_for('admin_edit_exam_ratios'))
+    """查看首页"自命题 vs 408"饼图的数据。数量由初试科目代码自动统计，不再手工维护。"""
+    exam_ratios_data = load_exam_type_ratio()
+    if exam_ratios_data is None:
+        flash('无法从院校数据统计考试类型比例，首页暂时显示 exam_type_ratios.json 中的旧数据。', 'warning')
+        exam_ratios_data = load_json_data(EXAM_TYPE_RATIOS_PATH, default_value=[])
+    major_index = load_major_index()
+    subject_counts = []
+    if major_index is not None:
+        subject_counts = sorted(((code, major_index.subject_bits([code]).bit_count()) for code in major_index.subject_codes),
+                                key=lambda item: (-item[1], item[0]))
+    return render_template('admin/edit_exam_ratios.html', exam_ratios_data=exam_ratios_data,
+                           subject_counts=subject_counts, total_majors=len(major_index) if major_index else 0)
 
 @app.route('/admin/edit-national-lines', methods=['GET'])
 @admin_required
@@ -1798,28 +1792,12 @@ def admin_save_national_lines():
             # Current logic replaces the whole file content with only the edited categories.
             # This seems correct based on the intent to manage these specific lines.
             
-            os.makedirs(os.path.dirname(NATIONAL_LINES_PATH), exist_ok=True)
-            try:
-                with open(NATIONAL_LINES_PATH, 'w', encoding='utf-8') as f:
-                    portalocker.lock(f, portalocker.LOCK_EX)
-                    try:
-                        # Load old data to merge potentially unmanaged keys (e.g., 'total', 'others')
-                        # Or decide to ONLY save the managed keys.
-                        # Let's stick to saving only the managed keys for simplicity and clarity.
-                        # To preserve other keys: 
-                        # old_data = load_json_data(NATIONAL_LINES_PATH) 
-                        # old_data.update(new_national_lines_data) # Merge changes
-                        # json.dump(old_data, f, ensure_ascii=False, indent=2)
-                        
-                        # Simpler: Overwrite with only the edited/fixed-year data
-                        json.dump(new_national_lines_data, f, ensure_ascii=False, indent=2)
-                        f.flush(); os.fsync(f.fileno())
-                    finally:
-                        portalocker.unlock(f)
+            # Simpler: Overwrite with only the edited/fixed-year data
+            if save_json_data(NATIONAL_LINES_PATH, new_national_lines_data):
+                invalidate_config_cache(NATIONAL_LINES_PATH)
                 flash('国家线数据已成功更新 (固定年份: 2023-2025)。', 'success')
-            except Exception as e_save_lock: 
-                app.logger.error(f"保存国家线数据时在锁定或写入阶段出错: {e_save_lock}", exc_info=True)
-                flash(f'保存国家线数据时发生内部错误: {str(e_save_lock)}', 'danger')
+            else:
+                flash('保存国家线数据时发生内部错误，请查看日志。', 'danger')
 
         except Exception as e_main: 
             app.logger.error(f"保存国家线数据时发生主处理错误: {e_main}", exc_info=True)
@@ -1833,7 +1811,6 @@ def admin_save_national_lines():
 @app.route('/admin/announcements/update', methods=['POST'])
 @admin_required
 def admin_update_announcement():
-    lock_acquired = False
     try:
         data = request.get_json()
         original_title = data.get('original_title')
@@ -1843,94 +1820,32 @@ def admin_update_announcement():
         if not original_title or not new_title:
             return jsonify({'status': 'error', 'message': '缺少必要的公告信息。'}), 400
 
-        announcements_file_path = ANNOUNCEMENTS_PATH # Use defined path
-        updated = False
-
-        with open(announcements_file_path, 'r+', encoding='utf-8') as f:
-            # 尝试 portalocker
-            try:
-                # import portalocker # 已在顶部导入
-                portalocker.lock(f, portalocker.LOCK_EX)
-                lock_acquired = True
-            except ImportError:
-                if platform.system() != "Windows":
-                    try:
-                        import fcntl
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                        lock_acquired = True
-                    except ImportError:
-                        app.logger.warning(f"portalocker and fcntl not available for updating announcement. Proceeding without lock.")
-                else:
-                    app.logger.warning(f"portalocker not available on Windows for updating announcement. fcntl not applicable. Proceeding without lock.")
-            except Exception as e_lock:
-                app.logger.error(f"Error acquiring lock for updating announcement: {e_lock}")
-
-            # 文件操作
-            try:
-                content = f.read()
-                if not content:
-                    announcements = []
-                else:
-                    announcements = json.loads(content)
-            except json.JSONDecodeError as e_decode:
-                app.logger.error(f"在 admin_update_announcement 中解析公告文件时出错: {e_decode}")
-                if lock_acquired: # Release lock if acquired before error
-                    try: portalocker.unlock(f)
-                    except: 
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except: pass
-                return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_decode}'}), 500
-
+        def apply_update(announcements):
             for ann in announcements:
                 if ann['title'] == original_title:
                     ann['title'] = new_title
                     ann['url'] = new_url
-                    updated = True
-                    break
-            
-            if updated:
-                f.seek(0)
-                f.truncate()
-                json.dump(announcements, f, ensure_ascii=False, indent=2)
-                f.flush(); os.fsync(f.fileno())
-                app.logger.info(f"公告 '{original_title}' 已更新为 '{new_title}'")
-                if lock_acquired:
-                    try: portalocker.unlock(f) 
-                    except (ImportError, NameError, AttributeError):
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except (ImportError, NameError): pass
-                return jsonify({'status': 'success', 'message': '公告已成功更新。'})
-            else:
-                if lock_acquired: # Not found, but release lock
-                    try: portalocker.unlock(f)
-                    except (ImportError, NameError, AttributeError):
-                         if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except (ImportError, NameError): pass
-                return jsonify({'status': 'error', 'message': '未找到要更新的公告。'}), 404
-        
-    except IOError as e_io:
-        app.logger.error(f"读写或锁定公告文件时发生IO错误 (update): {e_io}", exc_info=True)
+                    return announcements
+            return None # 未找到，不写入
+
+        if update_json(ANNOUNCEMENTS_PATH, apply_update, default=[]):
+            app.logger.info(f"公告 '{original_title}' 已更新为 '{new_title}'")
+            return jsonify({'status': 'success', 'message': '公告已成功更新。'})
+        return jsonify({'status': 'error', 'message': '未找到要更新的公告。'}), 404
+
+    except json.JSONDecodeError as e_json: # 公告文件或请求数据解析失败
+        app.logger.error(f"解析公告数据时出错 (update): {e_json}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_json}'}), 500
+    except OSError as e_io:
+        app.logger.error(f"读写公告文件时发生IO错误 (update): {e_io}", exc_info=True)
         return jsonify({'status': 'error', 'message': '文件操作失败'}), 500
-    except json.JSONDecodeError as e_json: # for request.get_json()
-        app.logger.error(f"解析更新公告的请求数据时出错: {e_json}", exc_info=True)
-        return jsonify({'status': 'error', 'message': f'请求数据格式错误: {e_json}'}), 400
     except Exception as e:
         app.logger.error(f"更新公告时发生意外错误: {e}", exc_info=True)
-        if lock_acquired: # Ensure lock release on unexpected error
-            try: portalocker.unlock(f)
-            except: 
-                if platform.system() != "Windows":
-                    try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    except: pass
         return jsonify({'status': 'error', 'message': f'更新公告时发生内部错误: {e}'}), 500
 
 @app.route('/admin/announcement/delete', methods=['POST'])
 @admin_required
 def delete_announcement():
-    lock_acquired = False
     try:
         data = request.get_json()
         title_to_delete = data.get('title')
@@ -1938,127 +1853,44 @@ def delete_announcement():
         if not title_to_delete:
             return jsonify({'status': 'error', 'message': '缺少要删除的公告标题。'}), 400
 
-        announcements_file_path = ANNOUNCEMENTS_PATH # Use defined path
-        deleted = False
-
-        with open(announcements_file_path, 'r+', encoding='utf-8') as f:
-            # 尝试 portalocker
-            try:
-                # import portalocker # 已在顶部导入
-                portalocker.lock(f, portalocker.LOCK_EX)
-                lock_acquired = True
-            except ImportError:
-                if platform.system() != "Windows":
-                    try:
-                        import fcntl
-                        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-                        lock_acquired = True
-                    except ImportError:
-                        app.logger.warning(f"portalocker and fcntl not available for deleting announcement. Proceeding without lock.")
-                else:
-                    app.logger.warning(f"portalocker not available on Windows for deleting announcement. fcntl not applicable. Proceeding without lock.")
-            except Exception as e_lock:
-                app.logger.error(f"Error acquiring lock for deleting announcement: {e_lock}")
-
-            # 文件操作
-            try:
-                content = f.read()
-                if not content:
-                    announcements = []
-                else:
-                    announcements = json.loads(content)
-            except json.JSONDecodeError as e_decode:
-                app.logger.error(f"在 delete_announcement 中解析公告文件时出错: {e_decode}")
-                if lock_acquired: # Release lock if acquired before error
-                    try: portalocker.unlock(f)
-                    except: 
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except: pass
-                return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_decode}'}), 500
-
-            original_count = len(announcements)
-            announcements = [ann for ann in announcements if ann['title'] != title_to_delete]
-            
-            if len(announcements) < original_count:
-                deleted = True
-                f.seek(0)
-                f.truncate()
-                json.dump(announcements, f, ensure_ascii=False, indent=2)
-                f.flush(); os.fsync(f.fileno())
-                app.logger.info(f"公告 '{title_to_delete}' 已被删除。")
-                if lock_acquired:
-                    try: portalocker.unlock(f)
-                    except (ImportError, NameError, AttributeError): 
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except(ImportError, NameError): pass
-                return jsonify({'status': 'success', 'message': '公告已成功删除。'})
-            else:
-                app.logger.warning(f"尝试删除公告 '{title_to_delete}' 但未找到。")
-                if lock_acquired: # Not found, but release lock
-                     try: portalocker.unlock(f)
-                     except (ImportError, NameError, AttributeError):
-                        if platform.system() != "Windows":
-                            try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                            except (ImportError, NameError): pass
-                return jsonify({'status': 'error', 'message': '未找到要删除的公告。'}), 404
-
-    except IOError as e_io:
-        app.logger.error(f"读写或锁定公告文件时发生IO错误 (delete): {e_io}", exc_info=True)
+        def remove_announcement(announcements):
+            remaining = [ann for ann in announcements if ann['title'] != title_to_delete]
+            return remaining if len(remaining) < len(announcements) else None # 未找到，不写入
+
+        if update_json(ANNOUNCEMENTS_PATH, remove_announcement, default=[]):
+            app.logger.info(f"公告 '{title_to_delete}' 已被删除。")
+            return jsonify({'status': 'success', 'message': '公告已成功删除。'})
+        app.logger.warning(f"尝试删除公告 '{title_to_delete}' 但未找到。")
+        return jsonify({'status': 'error', 'message': '未找到要删除的公告。'}), 404
+
+    except json.JSONDecodeError as e_json: # 公告文件或请求数据解析失败
+        app.logger.error(f"解析公告数据时出错 (delete): {e_json}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'解析公告数据时出错: {e_json}'}), 500
+    except OSError as e_io:
+        app.logger.error(f"读写公告文件时发生IO错误 (delete): {e_io}", exc_info=True)
         return jsonify({'status': 'error', 'message': '文件操作失败'}), 500
-    except json.JSONDecodeError as e_json: # for request.get_json()
-        app.logger.error(f"解析删除公告的请求数据时出错: {e_json}", exc_info=True)
-        return jsonify({'status': 'error', 'message': f'请求数据格式错误: {e_json}'}), 400
     except Exception as e:
         app.logger.error(f"删除公告时发生意外错误: {e}", exc_info=True)
-        if lock_acquired: # Ensure lock release on unexpected error
-            try: portalocker.unlock(f)
-            except: 
-                if platform.system() != "Windows":
-                    try: import fcntl; fcntl.flock(f.fileno(), fcntl.LOCK_UN)
-                    except: pass
         return jsonify({'status': 'error', 'message': f'删除公告时发生内部错误: {e}'}), 500
 
-# --- 新增：收藏数文件读写函数 ---
-def load_favorites_count(): # Renamed from load_favorites_count to match usage
-    """安全地加载收藏数 JSON 文件。"""
-    if not os.path.exists(FAVORITES_COUNT_PATH):
-        app.logger.warning(f"收藏数文件 {FAVORITES_COUNT_PATH} 不存在，返回空字典。")
-        return {}
-    
-    lock_acquired = False
+# --- 新增：收藏数读写函数 ---
+# 全局收藏数 = favorites_count.json + 收藏事件日志中尚未压缩的事件 (见 utils/favorites_log.py)
+favorites_ledger = FavoritesLedger(FAVORITES_COUNT_PATH, FAVORITES_LOG_PATH)
+
+def load_favorites_counts_for(school_ids):
+    """返回给定学校的当前收藏数 {school_id: count}，不复制整张计数表。"""
     try:
-        with open(FAVORITES_COUNT_PATH, 'r', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_SH) # 共享锁
-            try:
-                counts = json.load(f)
-            except json.JSONDecodeError as e_json_decode:
-                 app.logger.error(f"解析收藏数文件 {FAVORITES_COUNT_PATH} 时出错: {e_json_decode}", exc_info=True)
-                 counts = {} # Return empty on error
-            finally:
-                portalocker.unlock(f)
-            return counts if isinstance(counts, dict) else {}
-    except (IOError) as e: # Removed json.JSONDecodeError here as it's handled inside
-        app.logger.error(f"加载收藏数文件 {FAVORITES_COUNT_PATH} 时发生IO错误: {e}", exc_info=True)
-        return {} # 出错时返回空字典
-    except Exception as e_main_fav: # Catch any other unexpected errors
-        app.logger.error(f"加载收藏数文件 {FAVORITES_COUNT_PATH} 时发生未知错误: {e_main_fav}", exc_info=True)
+        return favorites_ledger.counts_for(school_ids)
+    except Exception as e:
+        app.logger.error(f"加载收藏统计时发生错误: {e}", exc_info=True)
         return {}
 
 def save_favorites_count(counts_dict):
-    """安全地保存收藏数 JSON 文件。"""
+    """用给定计数整体替换收藏统计 (同时清空收藏事件日志)。"""
     try:
-        os.makedirs(os.path.dirname(FAVORITES_COUNT_PATH), exist_ok=True)
-        with open(FAVORITES_COUNT_PATH, 'w', encoding='utf-8') as f:
-            portalocker.lock(f, portalocker.LOCK_EX)
-            try:
-                json.dump(counts_dict, f, ensure_ascii=False, indent=2)
-                f.flush(); os.fsync(f.fileno())
-            finally:
-                portalocker.unlock(f)
-            return True
-    except Exception as e: # Catch general errors like IOError from open() if portalocker path fails before import error
+        favorites_ledger.reset(counts_dict)
+        return True
+    except Exception as e:
         app.logger.error(f"保存收藏统计时发生错误: {e}", exc_info=True)
         return False
 
@@ -2086,19 +1918,24 @@ def admin_edit_homepage():
 
 # --- 新增API端点 ---
 @app.route('/api/national-lines/computer-science-total')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_computer_science_total():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    return dashboard_part_response('cs_total')
+
+def build_cs_total_payload():
+    """首页近三年计算机总分国家线 (折线图)的数据；数据缺失时返回 {"error": ...}。"""
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     cs_total_data = lines_data.get('computer_science_total')
 
     if not cs_total_data:
         app.logger.warning("API: /api/national-lines/computer-science-total - Computer Science total data not found in JSON.")
-        return jsonify({"error": "Computer Science total data not found"}), 404
+        return {"error": "Computer Science total data not found"}
 
     years, scores, legend_keys_from_data = get_recent_n_years_data(cs_total_data, n=3)
 
     if years is None:
          app.logger.warning("API: /api/national-lines/computer-science-total - Insufficient data or format error from get_recent_n_years_data.")
-         return jsonify({"error": "Insufficient data or data format error for Computer Science total"}), 404
+         return {"error": "Insufficient data or data format error for Computer Science total"}
 
     series_data = []
     legend_display = []
@@ -2138,22 +1975,27 @@ def get_national_line_computer_science_total():
         "series": series_data,
         "yAxis": y_axis_config # 使用计算出的范围
     }
-    return jsonify(echarts_data)
+    return echarts_data
 
 @app.route('/api/national-lines/politics-recent')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_politics_recent():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    return dashboard_part_response('politics_recent')
+
+def build_politics_recent_payload():
+    """首页近三年政治国家线 (柱状图)的数据；数据缺失时返回 {"error": ...}。"""
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     politics_data = lines_data.get('politics')
 
     if not politics_data:
         app.logger.warning("API: /politics-recent - Politics data not found in JSON.")
-        return jsonify({"error": "Politics data not found"}), 404
+        return {"error": "Politics data not found"}
 
     years, scores, legend_keys_from_data = get_recent_n_years_data(politics_data, n=3)
 
     if years is None:
         app.logger.warning("API: /politics-recent - Insufficient data or format error from get_recent_n_years_data for Politics.")
-        return jsonify({"error": "Insufficient data or data format error for Politics"}), 404
+        return {"error": "Insufficient data or data format error for Politics"}
 
     series_data = []
     legend_display = []
@@ -2193,11 +2035,16 @@ def get_national_line_politics_recent():
         "series": series_data,
         "yAxis": y_axis_config # 使用计算出的范围
     }
-    return jsonify(echarts_data)
+    return echarts_data
 
 @app.route('/api/national-lines/english-math-subjects')
+@conditional_etag(lambda: config_data_version(NATIONAL_LINES_PATH))
 def get_national_line_english_math_subjects():
-    lines_data = load_json_data(NATIONAL_LINES_PATH)
+    return dashboard_part_response('english_math')
+
+def build_english_math_payload():
+    """首页英语一/二、数学一/二 A区国家线走势 (折线图)的数据；数据缺失时返回 {"error": ...}。"""
+    lines_data = load_config_data(NATIONAL_LINES_PATH)
     
     subjects_config = {
         "english_one": "英语一",
@@ -2219,11 +2066,11 @@ def get_national_line_english_math_subjects():
     
     if not subject_data_map:
         app.logger.warning("API: /english-math-subjects - No valid English or Math subject data found.")
-        return jsonify({"error": "English or Math subject data not found or is malformed"}), 404
+        return {"error": "English or Math subject data not found or is malformed"}
 
     if not all_years_set:
         app.logger.warning("API: /english-math-subjects - No years found across any English/Math subjects.")
-        return jsonify({"error": "No year data available for English/Math subjects"}), 404
+        return {"error": "No year data available for English/Math subjects"}
         
     final_years = sorted(list(all_years_set))
 
@@ -2256,7 +2103,7 @@ def get_national_line_english_math_subjects():
 
     if not series_data:
          app.logger.warning("API: /english-math-subjects - No series data could be generated after processing all subjects.")
-         return jsonify({"error": "No series data could be generated for English/Math subjects"}), 404
+         return {"error": "No series data could be generated for English/Math subjects"}
 
     # 计算 Y 轴范围
     y_axis_config = calculate_y_axis_range(series_data)
@@ -2267,7 +2114,72 @@ def get_national_line_english_math_subjects():
         "series": series_data,
         "yAxis": y_axis_config # 使用计算出的范围
     }
-    return jsonify(echarts_data)
+    return echarts_data
+
+# --- 新增：首页数据聚合接口 ---
+# 首页加载时需要院校列表、三张国家线图表、考试类型比例与公告共六份数据。每份数据按各自的数据版本
+# 构建并序列化一次 (dashboard_parts)，/api/dashboard 把已序列化的部分直接拼接为一个响应，
+# 以各部分版本的组合作为 ETag；对应的单独 API 也返回同一份缓存。
+# 名称 -> (数据版本函数, 构建函数)；名称即 /api/dashboard 响应中的键
+DASHBOARD_PARTS = {
+    'schools': (lambda: school_repo.version(), build_schools_list_payload),
+    'cs_total': (lambda: config_data_version(NATIONAL_LINES_PATH), build_cs_total_payload),
+    'politics_recent': (lambda: config_data_version(NATIONAL_LINES_PATH), build_politics_recent_payload),
+    'english_math': (lambda: config_data_version(NATIONAL_LINES_PATH), build_english_math_payload),
+    'exam_type_ratio': (lambda: (school_repo.version(), config_data_version(EXAM_TYPE_RATIOS_PATH)),
+                        build_exam_type_ratio_payload),
+    'announcements': (lambda: get_file_identity(ANNOUNCEMENTS_PATH), build_announcements_payload),
+}
+dashboard_parts = {} # 名称 -> (数据版本, 数据, 序列化后的 bytes)
+dashboard_parts_lock = threading.Lock()
+
+def load_dashboard_part(name):
+    """返回首页某部分的 (数据, 序列化后的 bytes)，数据版本未变化时直接使用缓存。
+
+    构建出错时记录日志并返回 {"error": ...} (不缓存)，不影响其他部分。
+    """
+    version_func, builder = DASHBOARD_PARTS[name]
+    try:
+        version = version_func()
+        cached = dashboard_parts.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        data = builder()
+        body = app.json.dumps(data).encode('utf-8')
+    except Exception as e:
+        app.logger.error(f"构建首页数据 {name} 时出错: {e}", exc_info=True)
+        data = {"error": f"加载 {name} 数据失败"}
+        return data, app.json.dumps(data).encode('utf-8')
+    with dashboard_parts_lock:
+        dashboard_parts[name] = (version, data, body)
+    return data, body
+
+def dashboard_part_response(name):
+    """单独 API 的响应：数据中带 error 时返回 404 (与原先各接口一致)。"""
+    data, body = load_dashboard_part(name)
+    status = 404 if isinstance(data, dict) and 'error' in data else 200
+    return app.response_class(body + b'\n', status=status, mimetype=app.json.mimetype)
+
+def dashboard_version():
+    return tuple(version_func() for version_func, _ in DASHBOARD_PARTS.values())
+
+@app.route('/api/dashboard')
+@conditional_etag(dashboard_version)
+def api_dashboard():
+    """API: 首页所需的全部数据 {schools, cs_total, politics_recent, english_math, exam_type_ratio, announcements}。
+
+    某部分数据缺失或出错时该键的值为 {"error": ...}，其他部分照常返回；此时响应标记为 no-store，
+    不生成 ETag、不进压缩缓存，数据恢复后的下一次请求即可拿到完整结果。
+    """
+    parts, has_error = [], False
+    for name in DASHBOARD_PARTS:
+        data, body = load_dashboard_part(name)
+        has_error = has_error or (isinstance(data, dict) and 'error' in data)
+        parts.append(b'"%s":%s' % (name.encode('utf-8'), body))
+    response = app.response_class(b'{' + b','.join(parts) + b'}\n', mimetype=app.json.mimetype)
+    if has_error:
+        response.cache_control.no_store = True
+    return response
 
 # --- 辅助函数：获取最近N年的数据 ---
 # MOVED HERE - Correct Placement
@@ -0,0 +1,86 @@
+"""
+对比首页逐个请求六个 API 与一次请求 /api/dashboard 的耗时与传输量。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_dashboard.py [--repeat 50]
+
+分三种场景，每种输出请求数、响应体字节数与一次首页加载的中位耗时 (服务端处理，经 Flask 测试客户端)：
+* 首次访问：不带 If-None-Match，接受 gzip；
+* 再次访问：带上次响应的 ETag (数据未变化，全部 304)；
+* 数据变化后首次访问：每轮清空各部分缓存与压缩缓存，相当于数据版本变化后的第一个访客。
+只读取数据，不修改 data/ 下的文件。
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app as app_module
+
+SEPARATE_URLS = (
+    '/api/schools/list',
+    '/api/national-lines/computer-science-total',
+    '/api/national-lines/politics-recent',
+    '/api/national-lines/english-math-subjects',
+    '/api/stats/exam-type-ratio',
+    '/api/announcements',
+)
+DASHBOARD_URLS = ('/api/dashboard',)
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def clear_caches():
+    app_module.dashboard_parts.clear()
+    app_module.compressed_cache.clear()
+
+
+def load_page(client, urls, etags=None, before=None):
+    """模拟一次首页加载，返回响应体总字节数；etags 不为 None 时带上对应 URL 的 ETag 并记录新的 ETag。"""
+    if before is not None:
+        before()
+    total = 0
+    for url in urls:
+        headers = {'Accept-Encoding': 'gzip'}
+        if etags is not None and url in etags:
+            headers['If-None-Match'] = etags[url]
+        response = client.get(url, headers=headers)
+        total += len(response.get_data())
+        if etags is not None:
+            etags[url] = response.headers.get('ETag')
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50, help='每项耗时的重复次数 (默认 50)')
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    print(f"{'场景':<16}{'方式':<12}{'请求数':>8}{'响应字节':>10}{'耗时 (µs)':>12}")
+    for scenario in ('首次访问', '再次访问', '数据变化后首次访问'):
+        results = []
+        for label, urls in (('六个 API', SEPARATE_URLS), ('dashboard', DASHBOARD_URLS)):
+            etags = {} if scenario == '再次访问' else None
+            before = clear_caches if scenario == '数据变化后首次访问' else None
+            load_page(client, urls, etags, before) # 预热，同时记录 ETag
+            size = load_page(client, urls, etags, before)
+            elapsed = measure(lambda: load_page(client, urls, etags, before), args.repeat)
+            results.append(elapsed)
+            print(f"{scenario:<16}{label:<12}{len(urls):>8}{size:>10}{elapsed:>12.1f}")
+        print(f"{'':<16}六个 API / dashboard 耗时比: {results[0] / results[1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+对比逐条件列表推导与筛选位图 (utils/school_bitsets.py) 的多选筛选耗时。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_filters.py [--sizes 133,1000,5000] [--repeat 200]
+
+依次叠加 1~5 个筛选条件 (省份多选、等级多选、评级、地区、专业课类型)，
+输出每种条件组合在不同院校规模下的中位耗时 (只计算命中的学校位置，不含取记录)。
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from bench_search_index import SCHOOLS_PATH, synthesize
+from utils.data_store import read_json
+from utils.school_bitsets import FilterBitmaps
+from utils.school_facets import field_values
+from utils.school_repository import make_records
+
+FILTER_STEPS = (
+    ('province', ['四川', '重庆', '北京']),
+    ('level', ['985', '211']),
+    ('computer_rank', ['A+', 'A', 'A-', 'B+']),
+    ('region', ['A区']),
+    ('exam_type', ['408统考']),
+)
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def chained_filter(schools, filters):
+    """原先的写法：每个条件一次列表推导。"""
+    result = list(range(len(schools)))
+    for field, selection in filters.items():
+        wanted = set(selection)
+        result = [i for i in result if wanted.intersection(field_values(schools[i], field))]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='133,1000,5000', help='院校数量列表，逗号分隔 (默认 133,1000,5000)')
+    parser.add_argument('--repeat', type=int, default=200, help='每种组合的重复次数 (默认 200)')
+    args = parser.parse_args()
+
+    schools = [{k: v for k, v in s.items() if k != 'departments'} for s in read_json(SCHOOLS_PATH, default=[])]
+    print(f"{'院校数':>8}{'条件数':>8}{'命中':>8}{'列表推导 (µs)':>16}{'位图 (µs)':>14}")
+    for size in (int(x) for x in args.sizes.split(',')):
+        summaries = make_records(synthesize(schools, size))
+        bitmaps = FilterBitmaps(summaries)
+        for step in range(1, len(FILTER_STEPS) + 1):
+            filters = dict(FILTER_STEPS[:step])
+            expected = chained_filter(summaries, filters)
+            bits = bitmaps.select(filters)
+            assert bitmaps.count(bits) == len(expected)
+            chained_us = measure(lambda: chained_filter(summaries, filters), args.repeat)
+            bitmap_us = measure(lambda: bitmaps.select(filters), args.repeat)
+            print(f"{size:>8}{step:>8}{len(expected):>8}{chained_us:>16.1f}{bitmap_us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+对比标准库 json 与 utils/json_codec.py (orjson) 在 data/schools.json 上的编解码耗时。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_json_codec.py [--repeat 30]
+
+场景与应用中的实际调用一致：
+* 解码: 读取 schools.json 的字节内容后解析 (read_json)
+* 编码 (indent=2): 写回数据文件 (write_json_atomic)
+* 编码 (紧凑): API 响应 (Flask JSON provider)
+未安装 orjson 时 json_codec 回退到标准库，两列结果应基本相同。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils import json_codec
+
+SCHOOLS_PATH = os.path.join(BASE_DIR, "data", "schools.json")
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=30, help='每个场景的重复次数 (默认 30)')
+    args = parser.parse_args()
+
+    with open(SCHOOLS_PATH, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw.decode('utf-8'))
+    print(f"数据: {SCHOOLS_PATH} ({len(raw) / 1024:.1f} KB, {len(data)} 所学校)")
+    print(f"json_codec 当前实现: {json_codec.BACKEND}\n")
+
+    cases = [
+        ('解码',
+         lambda: json.loads(raw.decode('utf-8')),
+         lambda: json_codec.loads(raw)),
+        ('编码 indent=2',
+         lambda: json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'),
+         lambda: json_codec.dumps_bytes(data, indent=2)),
+        ('编码 紧凑',
+         lambda: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+         lambda: json_codec.dumps_bytes(data)),
+    ]
+    print(f"{'场景':<14}{'标准库 json (ms)':>18}{'json_codec (ms)':>18}{'加速比':>10}")
+    for label, stdlib_func, codec_func in cases:
+        stdlib_ms = measure(stdlib_func, args.repeat)
+        codec_ms = measure(codec_func, args.repeat)
+        print(f"{label:<14}{stdlib_ms:>18.2f}{codec_ms:>18.2f}{stdlib_ms / codec_ms:>9.1f}x")
+
+    # 两种实现解析结果一致，编码结果可以被对方解析回相同的数据
+    assert json_codec.loads(raw) == data
+    assert json.loads(json_codec.dumps_bytes(data, indent=2).decode('utf-8')) == data
+
+
+if __name__ == "__main__":
+    main()
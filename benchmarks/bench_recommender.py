@@ -0,0 +1,111 @@
+"""
+对比逐校循环与向量化打分 (utils/recommender.py) 的推荐耗时。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_recommender.py [--sizes 133,1000,10000,50000] [--repeat 50]
+
+把真实学校复制到指定数量 (见 bench_search_index.synthesize)，对几组典型的推荐条件输出：
+* 逐校循环：原先的实现，每次推荐遍历全部学校的院系专业、查映射表并逐项计算相似度；
+* 向量化：RecommendationScorer 在数据版本内复用的特征数组上整列计算，np.partition 取前 20 名；
+* 构建特征数组的一次性耗时。
+同时校验两种实现的推荐结果完全一致。
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from bench_search_index import SCHOOLS_PATH, synthesize
+from utils.data_store import read_json
+from utils.recommender import DEFAULT_LIMIT, LEVEL_SCORES, RANK_SCORES, WEIGHTS, RecommendationScorer
+from utils.score_lines import reference_score_value
+
+TARGETS = (
+    (350, '985', 'A', '四川'),
+    (300, '211', None, 'A区'),
+    (380, None, 'B+', None),
+    (None, '双一流', None, '北京'),
+)
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def loop_recommend(schools, target_score, target_level, target_rank, target_location):
+    """原先的逐校实现。"""
+    def get_similarity(target, actual):
+        if target is None or actual is None:
+            return 0
+        return max(0, 100 - abs(target - actual))
+
+    recommendations = []
+    for school in schools:
+        recommend_score = 0
+        score_similarity = 0
+        if target_score is not None:
+            major_scores = []
+            for dept in school.get('departments') or []:
+                for major in dept.get('majors', []):
+                    major_score = reference_score_value(major)
+                    if major_score is not None:
+                        major_scores.append(major_score)
+            if major_scores:
+                score_similarity = get_similarity(target_score, sum(major_scores) / len(major_scores))
+        recommend_score += WEIGHTS["score_similarity"] * score_similarity
+        recommend_score += WEIGHTS["level"] * get_similarity(LEVEL_SCORES.get(target_level),
+                                                             LEVEL_SCORES.get(school.get('level')))
+        recommend_score += WEIGHTS["rank"] * get_similarity(RANK_SCORES.get(target_rank),
+                                                            RANK_SCORES.get(school.get('computer_rank')))
+        location_similarity = 0
+        if target_location and (school.get('province') == target_location or school.get('region') == target_location):
+            location_similarity = 100
+        recommend_score += WEIGHTS["location"] * location_similarity
+        recommendations.append({
+            "id": school.get('id', school.get('name')),
+            "name": school.get("name"),
+            "level": school.get("level"),
+            "province": school.get("province"),
+            "region": school.get("region"),
+            "computer_rank": school.get("computer_rank"),
+            "enrollment_24_school_total": school.get("enrollment_24_school_total", "未知"),
+            "recommend_score": round(recommend_score, 2),
+        })
+    recommendations.sort(key=lambda x: x['recommend_score'], reverse=True)
+    return recommendations[:DEFAULT_LIMIT]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='133,1000,10000,50000', help='院校数量列表，逗号分隔')
+    parser.add_argument('--repeat', type=int, default=50, help='每项耗时的重复次数 (默认 50)')
+    args = parser.parse_args()
+
+    base_schools = read_json(SCHOOLS_PATH, default=[])
+    print(f"{'院校数':>8}  {'条件 (分数, 等级, 评级, 地区)':<32}{'逐校循环 (µs)':>14}{'向量化 (µs)':>12}{'加速比':>8}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        schools = synthesize(base_schools, size)
+        start = time.perf_counter()
+        scorer = RecommendationScorer(schools)
+        build_ms = (time.perf_counter() - start) * 1000
+        loop_repeat = max(1, args.repeat // max(1, size // 1000)) # 大规模时逐校循环太慢，减少重复次数
+        for target in TARGETS:
+            if loop_recommend(schools, *target) != scorer.recommend(*target):
+                raise SystemExit(f"结果不一致: size={size} target={target}")
+            loop_us = measure(lambda: loop_recommend(schools, *target), loop_repeat)
+            vector_us = measure(lambda: scorer.recommend(*target), args.repeat)
+            print(f"{size:>8}  {str(target):<32}{loop_us:>14.1f}{vector_us:>12.1f}{loop_us / vector_us:>7.1f}x")
+        print(f"{size:>8}  构建特征数组 (每个数据版本一次): {build_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+对比院校库页面 (/school-list) 每次筛选、排序并渲染与命中片段缓存的耗时。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_school_list.py [--repeat 100]
+
+对几个常见的筛选 / 排序 / 翻页组合，输出整页请求的中位耗时 (经 Flask 测试客户端)：
+* 未命中：每次请求前清空片段缓存，相当于原先每次都重新筛选、排序并渲染结果表格；
+* 命中：片段缓存中已有当前数据版本与收藏数 epoch 对应的结果，只渲染外层页面。
+只读取数据，不修改 data/ 下的文件。
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import app as app_module
+
+URLS = (
+    '/school-list',
+    '/school-list?page=3',
+    '/school-list?sort=default',
+    '/school-list?province=四川&province=重庆',
+    '/school-list?level=985&level=211&region_filter=A区',
+    '/school-list?q=大学&exam_type=408统考&page=2',
+)
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=100, help='每项耗时的重复次数 (默认 100)')
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    cache = app_module.school_list_cache
+
+    def uncached(url):
+        cache.clear()
+        client.get(url)
+
+    print(f"{'页面':<52}{'未命中 (µs)':>14}{'命中 (µs)':>12}{'加速比':>8}")
+    for url in URLS:
+        client.get(url) # 预热索引与排序
+        miss_us = measure(lambda: uncached(url), args.repeat)
+        client.get(url)
+        hit_us = measure(lambda: client.get(url), args.repeat)
+        print(f"{url:<52}{miss_us:>14.1f}{hit_us:>12.1f}{miss_us / hit_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
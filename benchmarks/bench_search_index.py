@@ -0,0 +1,82 @@
+"""
+对比线性扫描与 n-gram 倒排索引 (utils/school_index.py) 的院校名称检索耗时。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_search_index.py [--sizes 133,1000,5000] [--repeat 200]
+
+较大的规模由 data/schools.json 中的学校复制并改写名称得到 (如 "四川大学-17")，
+用来模拟全国数千所院校的目录。查询取自真实学校名称的片段以及一个不存在的名称。
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.data_store import read_json
+from utils.school_index import SchoolIndex
+from utils.school_repository import make_records
+
+SCHOOLS_PATH = os.path.join(BASE_DIR, "data", "schools.json")
+QUERIES = ('大', '大学', '四川', '科技大学', '电子科技', '不存在的学校')
+
+
+def synthesize(schools, size):
+    """把真实学校复制到指定数量，复制出的学校在名称与 id 后追加序号。"""
+    result = []
+    copy_no = 0
+    while len(result) < size:
+        for school in schools:
+            if len(result) >= size:
+                break
+            if copy_no:
+                school = dict(school, id=f"{school.get('id')}-{copy_no}", name=f"{school.get('name')}-{copy_no}")
+            result.append(school)
+        copy_no += 1
+    return result
+
+
+def measure(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(durations)
+
+
+def linear_search(summaries, query):
+    query = query.lower()
+    return [s for s in summaries if query in (s.get('name') or '').lower()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='133,1000,5000', help='院校数量列表，逗号分隔 (默认 133,1000,5000)')
+    parser.add_argument('--repeat', type=int, default=200, help='每个查询的重复次数 (默认 200)')
+    args = parser.parse_args()
+
+    schools = [{k: v for k, v in s.items() if k != 'departments'} for s in read_json(SCHOOLS_PATH, default=[])]
+    print(f"{'院校数':>8}{'构建索引 (ms)':>16}{'线性扫描 (µs)':>16}{'倒排索引 (µs)':>16}{'加速比':>10}")
+    for size in (int(x) for x in args.sizes.split(',')):
+        summaries = make_records(synthesize(schools, size))
+        start = time.perf_counter()
+        index = SchoolIndex(summaries)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        linear_us = index_us = 0.0
+        for query in QUERIES:
+            # 两种方式结果一致
+            assert index.records(index.search(query)) == linear_search(summaries, query), query
+            linear_us += measure(lambda: linear_search(summaries, query), args.repeat)
+            index_us += measure(lambda: index.records(index.search(query)), args.repeat)
+        linear_us /= len(QUERIES)
+        index_us /= len(QUERIES)
+        print(f"{size:>8}{build_ms:>16.1f}{linear_us:>16.1f}{index_us:>16.1f}{linear_us / index_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
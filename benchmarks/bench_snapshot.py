@@ -0,0 +1,126 @@
+"""
+对比 json.load 与二进制快照的加载耗时和峰值内存 (RSS)。
+
+用法 (从项目根目录运行):
+    python benchmarks/bench_snapshot.py [--repeat 20]
+
+快照不存在时会先在临时目录中构建。峰值 RSS 在独立子进程中测量
+(resource.getrusage 的 ru_maxrss)，并减去只导入模块、不加载数据的基线进程；
+数据较小时 RSS 差异可能被解释器本身的内存占用掩盖，因此同时输出 tracemalloc
+统计的加载期间 Python 分配峰值。resource 模块仅在 POSIX 系统可用。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.binary_snapshot import SNAPSHOT_FILE_NAME, SNAPSHOT_SOURCES, build_snapshot, read_snapshot
+
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+
+def load_with_json(data_dir):
+    data = {}
+    for name in SNAPSHOT_SOURCES:
+        file_path = os.path.join(data_dir, name)
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data[name] = json.load(f)
+    return data
+
+
+def load_with_snapshot(snapshot_path):
+    return read_snapshot(snapshot_path)[1]
+
+
+def time_loads(func, arg, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations), min(durations)
+
+
+def child_main(mode, arg):
+    """子进程入口：执行一次加载并输出耗时 (毫秒)、峰值 RSS (KB) 和 Python 分配峰值 (KB)。"""
+    start = time.perf_counter()
+    if mode == 'json':
+        load_with_json(arg)
+    elif mode == 'snapshot':
+        load_with_snapshot(arg)
+    elapsed = (time.perf_counter() - start) * 1000
+    # 单独再跑一次统计分配峰值，避免 tracemalloc 的开销影响上面的耗时
+    tracemalloc.start()
+    if mode == 'json':
+        load_with_json(arg)
+    elif mode == 'snapshot':
+        load_with_snapshot(arg)
+    alloc_peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+    tracemalloc.stop()
+    try:
+        import resource
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak_kb //= 1024 # macOS 以字节为单位
+    except ImportError:
+        peak_kb = None
+    print(json.dumps({'elapsed_ms': elapsed, 'peak_rss_kb': peak_kb, 'alloc_peak_kb': alloc_peak_kb}))
+
+
+def run_child(mode, arg):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--child', mode, arg], cwd=BASE_DIR)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20, help='进程内重复加载次数 (默认 20)')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ARG'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child_main(*args.child)
+        return
+
+    snapshot_path = os.path.join(DATA_DIR, SNAPSHOT_FILE_NAME)
+    tmp_dir = None
+    if not os.path.exists(snapshot_path):
+        tmp_dir = tempfile.TemporaryDirectory()
+        snapshot_path = os.path.join(tmp_dir.name, SNAPSHOT_FILE_NAME)
+        build_snapshot(DATA_DIR, snapshot_path)
+
+    json_bytes = sum(os.path.getsize(os.path.join(DATA_DIR, n)) for n in SNAPSHOT_SOURCES
+                     if os.path.exists(os.path.join(DATA_DIR, n)))
+    print(f"JSON 源文件合计 {json_bytes / 1024:.1f} KB，快照 {os.path.getsize(snapshot_path) / 1024:.1f} KB")
+
+    json_median, json_min = time_loads(load_with_json, DATA_DIR, args.repeat)
+    snap_median, snap_min = time_loads(load_with_snapshot, snapshot_path, args.repeat)
+    print(f"\n进程内加载耗时 (重复 {args.repeat} 次):")
+    print(f"  json.load   中位数 {json_median:7.2f} ms  最小 {json_min:7.2f} ms")
+    print(f"  二进制快照  中位数 {snap_median:7.2f} ms  最小 {snap_min:7.2f} ms  ({json_median / snap_median:.1f}x)")
+
+    baseline = run_child('baseline', '-')
+    json_child = run_child('json', DATA_DIR)
+    snap_child = run_child('snapshot', snapshot_path)
+    print("\n冷启动子进程 (首次加载):")
+    for label, result in (('json.load  ', json_child), ('二进制快照', snap_child)):
+        line = f"  {label}  耗时 {result['elapsed_ms']:7.2f} ms  分配峰值 {result['alloc_peak_kb'] / 1024:5.1f} MB"
+        if result['peak_rss_kb'] is not None and baseline['peak_rss_kb'] is not None:
+            line += (f"  峰值 RSS {result['peak_rss_kb'] / 1024:6.1f} MB"
+                     f" (比基线多 {(result['peak_rss_kb'] - baseline['peak_rss_kb']) / 1024:5.1f} MB)")
+        print(line)
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -32,9 +32,8 @@ document.head.appendChild(styleSheet);
 
 document.addEventListener('DOMContentLoaded', function() {
     // setupThemeSwitcher(); // REMOVED:不再需要主题切换
-    initCharts();
-    fetchSchoolsForDashboard();
-    fetchAnnouncements();
+    // 首页的院校列表、图表与公告由 /api/dashboard 一次返回
+    fetchDashboard(initCharts());
     
     // Initialize resizable tables on the page
     document.querySelectorAll('.resizable-table').forEach(enableColumnResizing);
@@ -112,17 +111,20 @@ let allDashboardSchools = []; // 存储从 API 获取的所有学校数据
 let dashboardCurrentPage = 1;
 const dashboardItemsPerPage = 15; // 仪表盘每页显示的数量
 
-// --- 加载和显示仪表盘院校列表 (含分页) ---
-function fetchSchoolsForDashboard() {
+// --- 一次请求加载首页全部数据 ---
+function fetchDashboard(charts) {
     const tableBody = document.getElementById('dashboard-school-table-body');
     const paginationContainer = document.getElementById('dashboard-school-pagination');
-    if (!tableBody || !paginationContainer) return;
-
-    // 显示加载状态
-    tableBody.innerHTML = `<tr><td colspan="7" class="text-center p-5"><div class="spinner-border spinner-border-sm text-primary" role="status"><span class="visually-hidden">加载中...</span></div> 正在加载院校数据...</td></tr>`;
-    paginationContainer.innerHTML = '';
+    // main.js 在所有页面加载，只有首页 (有院校列表、图表或公告区域) 才请求数据
+    const hasChart = Object.values(charts).some(chart => chart);
+    if (!tableBody && !hasChart && !document.getElementById('announcement-list')) return;
+    if (tableBody && paginationContainer) {
+        // 显示加载状态
+        tableBody.innerHTML = `<tr><td colspan="7" class="text-center p-5"><div class="spinner-border spinner-border-sm text-primary" role="status"><span class="visually-hidden">加载中...</span></div> 正在加载院校数据...</td></tr>`;
+        paginationContainer.innerHTML = '';
+    }
 
-    fetch('/api/schools/list')
+    fetch('/api/dashboard')
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -130,16 +132,45 @@ function fetchSchoolsForDashboard() {
             return response.json();
         })
         .then(data => {
-            allDashboardSchools = data; // 存储所有数据
-            dashboardCurrentPage = 1; // 重置到第一页
-            renderDashboardSchoolPage(dashboardCurrentPage);
+            showSchoolsForDashboard(data.schools);
+            renderNationalLineChart(data.cs_total, charts.csTotal, '近三年计算机总分国家线');
+            renderNationalLineChart(data.politics_recent, charts.politicsRecent, '近三年政治国家线');
+            renderNationalLineChart(data.english_math, charts.engMath, '英/数主要科目国家线趋势');
+            renderExamTypeRatio(data.exam_type_ratio, charts.examTypePie);
+            showAnnouncements(data.announcements);
         })
         .catch(error => {
-            console.error('Error fetching schools for dashboard:', error);
-            tableBody.innerHTML = `<tr><td colspan="7" class="text-center p-5 text-danger">加载院校数据失败: ${error.message}</td></tr>`;
+            console.error('Error fetching dashboard data:', error);
+            showSchoolsForDashboard({ error: error.message });
+            handleError(error, charts.csTotal, '加载 近三年计算机总分国家线 数据失败');
+            handleError(error, charts.politicsRecent, '加载 近三年政治国家线 数据失败');
+            handleError(error, charts.engMath, '加载 英/数主要科目国家线趋势 数据失败');
+            handleError(error, charts.examTypePie, '加载考试类型比例失败');
+            showAnnouncements({ error: error.message });
         });
 }
 
+// 某部分数据出错时 /api/dashboard 中对应的值为 {error: ...}
+function dashboardPartError(data) {
+    return (data && !Array.isArray(data) && data.error) ? new Error(data.error) : null;
+}
+
+// --- 显示仪表盘院校列表 (含分页) ---
+function showSchoolsForDashboard(data) {
+    const tableBody = document.getElementById('dashboard-school-table-body');
+    if (!tableBody) return;
+
+    const error = dashboardPartError(data);
+    if (error) {
+        console.error('Error fetching schools for dashboard:', error);
+        tableBody.innerHTML = `<tr><td colspan="7" class="text-center p-5 text-danger">加载院校数据失败: ${error.message}</td></tr>`;
+        return;
+    }
+    allDashboardSchools = data || []; // 存储所有数据
+    dashboardCurrentPage = 1; // 重置到第一页
+    renderDashboardSchoolPage(dashboardCurrentPage);
+}
+
 function renderDashboardSchoolPage(page) {
     const tableBody = document.getElementById('dashboard-school-table-body');
     const paginationContainer = document.getElementById('dashboard-school-pagination');
@@ -290,128 +321,104 @@ function renderDashboardPagination() {
 }
 
 // --- ECharts 初始化 --- 
+// 返回各图表实例 (页面中不存在的图表为 null)，数据由 fetchDashboard 填充
 function initCharts() {
-    // Initialize new charts
+    const charts = {};
     // 1. 左上角: 计算机总分近三年国家线折线图
-    const csTotalChartDom = document.getElementById('national-line-cs-total');
-    if (csTotalChartDom) {
-        const csTotalChart = echarts.init(csTotalChartDom, 'dark');
-        // The API /api/national-lines/computer-science-total is expected to return line chart data
-        fetchNationalLineData('/api/national-lines/computer-science-total', csTotalChart, '近三年计算机总分国家线');
-    }
-
     // 2. 左中: 政治近3年国家线柱状图
-    const politicsRecentChartDom = document.getElementById('national-line-politics-recent');
-    if (politicsRecentChartDom) {
-        const politicsRecentChart = echarts.init(politicsRecentChartDom, 'dark');
-        // The API /api/national-lines/politics-recent is expected to return bar chart data
-        fetchNationalLineData('/api/national-lines/politics-recent', politicsRecentChart, '近三年政治国家线');
-    }
-
     // 3. 左下角: 英语(1,2)数学(1,2)国家线走向折线图
-    const engMathChartDom = document.getElementById('national-line-eng-math');
-    if (engMathChartDom) {
-        const engMathChart = echarts.init(engMathChartDom, 'dark');
-        // The API /api/national-lines/english-math-subjects is expected to return line chart data for 4 lines
-        fetchNationalLineData('/api/national-lines/english-math-subjects', engMathChart, '英/数主要科目国家线趋势');
-    }
-
-    // 初始化考试类型比例饼图
-    const examTypePieChartDom = document.getElementById('exam-type-pie');
-    if (examTypePieChartDom) {
-        const examTypePieChart = echarts.init(examTypePieChartDom, 'dark');
-         fetchExamTypeRatio(examTypePieChart);
-    }
+    // 4. 考试类型比例饼图
+    const chartDoms = {
+        csTotal: 'national-line-cs-total',
+        politicsRecent: 'national-line-politics-recent',
+        engMath: 'national-line-eng-math',
+        examTypePie: 'exam-type-pie',
+    };
+    Object.entries(chartDoms).forEach(([key, id]) => {
+        const chartDom = document.getElementById(id);
+        charts[key] = chartDom ? echarts.init(chartDom, 'dark') : null;
+        if (charts[key]) showLoading(charts[key]);
+    });
+    return charts;
 }
 
-function fetchNationalLineData(apiUrl, chartInstance, title) {
-     showLoading(chartInstance);
-    fetch(apiUrl)
-        .then(response => {
-            if (!response.ok) throw new Error('Network response was not ok');
-            return response.json();
-        })
-        .then(data => {
-            const option = {
-                 title: { text: title, left: 'center', top: 10, textStyle: { color: '#ccc' } },
-                 tooltip: { trigger: 'axis' },
-                 legend: { data: data.legend, bottom: 10, textStyle: { color: '#ccc' } },
-                 grid: { left: '3%', right: '4%', top: '50px', bottom: '60px', containLabel: true },
-                 xAxis: {
-                    type: 'category',
-                    boundaryGap: data.series && data.series.some(s => s.type === 'bar'), // True for bar charts
-                    data: data.years || [], // Use years data from API
-                    axisLabel: { color: '#ccc' }
-                 },
-                 yAxis: {
-                    type: 'value',
-                    // Use min AND max values from API if provided, otherwise default (null lets ECharts decide)
-                    min: data.yAxis && data.yAxis.min !== null ? data.yAxis.min : null,
-                    max: data.yAxis && data.yAxis.max !== null ? data.yAxis.max : null,
-                    axisLabel: { color: '#ccc' }
-                 },
-                 series: data.series || [] // Use series data from API
-             };
-            chartInstance.setOption(option);
-            chartInstance.hideLoading();
-        })
-        .catch(error => handleError(error, chartInstance, `加载 ${title} 数据失败`));
+function renderNationalLineChart(data, chartInstance, title) {
+    if (!chartInstance) return;
+    const error = dashboardPartError(data);
+    if (error) {
+        handleError(error, chartInstance, `加载 ${title} 数据失败`);
+        return;
+    }
+    const option = {
+         title: { text: title, left: 'center', top: 10, textStyle: { color: '#ccc' } },
+         tooltip: { trigger: 'axis' },
+         legend: { data: data.legend, bottom: 10, textStyle: { color: '#ccc' } },
+         grid: { left: '3%', right: '4%', top: '50px', bottom: '60px', containLabel: true },
+         xAxis: {
+            type: 'category',
+            boundaryGap: data.series && data.series.some(s => s.type === 'bar'), // True for bar charts
+            data: data.years || [], // Use years data from API
+            axisLabel: { color: '#ccc' }
+         },
+         yAxis: {
+            type: 'value',
+            // Use min AND max values from API if provided, otherwise default (null lets ECharts decide)
+            min: data.yAxis && data.yAxis.min !== null ? data.yAxis.min : null,
+            max: data.yAxis && data.yAxis.max !== null ? data.yAxis.max : null,
+            axisLabel: { color: '#ccc' }
+         },
+         series: data.series || [] // Use series data from API
+     };
+    chartInstance.setOption(option);
+    chartInstance.hideLoading();
 }
 
-function fetchExamTypeRatio(chartInstance) {
-    showLoading(chartInstance);
-    fetch('/api/stats/exam-type-ratio')
-        .then(response => {
-             if (!response.ok) throw new Error('Network response was not ok');
-             return response.json();
-         })
-        .then(data => {
-            const option = {
-                title: { text: '自命题 vs 408 比例', left: 'center', top: 10, textStyle: { color: '#ccc' } },
-                tooltip: { trigger: 'item', formatter: '{a} <br/>{b} : {c} ({d}%)' },
-                legend: { orient: 'horizontal', bottom: 15, data: data.map(item => item.name), textStyle: { color: '#ccc', overflow: 'breakAll' } },
-                series: [
-                    {
-                        name: '考试类型',
-                        type: 'pie',
-                        radius: '55%',
-                        center: ['50%', '58%'],
-                        data: data,
-                        emphasis: {
-                            itemStyle: {
-                                shadowBlur: 10,
-                                shadowOffsetX: 0,
-                                shadowColor: 'rgba(0, 0, 0, 0.5)'
-                            }
-                        },
-                         label: { color: '#ccc', fontSize: 11, overflow: 'breakAll' },
-                         labelLine: { lineStyle: { color: '#aaa' }, length: 4, length2: 8 }
+function renderExamTypeRatio(data, chartInstance) {
+    if (!chartInstance) return;
+    const error = dashboardPartError(data);
+    if (error) {
+        handleError(error, chartInstance, '加载考试类型比例失败');
+        return;
+    }
+    const option = {
+        title: { text: '自命题 vs 408 比例', left: 'center', top: 10, textStyle: { color: '#ccc' } },
+        tooltip: { trigger: 'item', formatter: '{a} <br/>{b} : {c} ({d}%)' },
+        legend: { orient: 'horizontal', bottom: 15, data: data.map(item => item.name), textStyle: { color: '#ccc', overflow: 'breakAll' } },
+        series: [
+            {
+                name: '考试类型',
+                type: 'pie',
+                radius: '55%',
+                center: ['50%', '58%'],
+                data: data,
+                emphasis: {
+                    itemStyle: {
+                        shadowBlur: 10,
+                        shadowOffsetX: 0,
+                        shadowColor: 'rgba(0, 0, 0, 0.5)'
                     }
-                ]
-            };
-            chartInstance.setOption(option);
-            chartInstance.hideLoading();
-        })
-        .catch(error => handleError(error, chartInstance, '加载考试类型比例失败'));
+                },
+                 label: { color: '#ccc', fontSize: 11, overflow: 'breakAll' },
+                 labelLine: { lineStyle: { color: '#aaa' }, length: 4, length2: 8 }
+            }
+        ]
+    };
+    chartInstance.setOption(option);
+    chartInstance.hideLoading();
 }
 
-// --- 加载和显示公告 ---
-function fetchAnnouncements() {
+// --- 显示公告 ---
+function showAnnouncements(data) {
     const announcementList = document.getElementById('announcement-list');
     if (!announcementList) return;
 
-    fetch('/api/announcements')
-        .then(response => {
-             if (!response.ok) throw new Error('Network response was not ok');
-             return response.json();
-        })
-        .then(data => {
-            populateAnnouncements(data);
-        })
-        .catch(error => {
-            console.error('Error fetching announcements:', error);
-             announcementList.innerHTML = `<li class="list-group-item bg-transparent text-danger">加载公告失败: ${error.message}</li>`;
-        });
+    const error = dashboardPartError(data);
+    if (error) {
+        console.error('Error fetching announcements:', error);
+        announcementList.innerHTML = `<li class="list-group-item bg-transparent text-danger">加载公告失败: ${error.message}</li>`;
+        return;
+    }
+    populateAnnouncements(data);
 }
 
 function populateAnnouncements(announcements) {
@@ -0,0 +1,134 @@
+"""
+原先实现的逐项复刻，作为等价性测试的基准 (取自改动前的 app.py，只去掉了文件读取与日志)。
+"""
+import re
+
+# 院校等级分数映射
+LEVEL_SCORES = {"985": 60, "211": 40, "双一流": 20, "普通院校": 0, None: 0, "": 0}
+# 计算机等级分数映射
+RANK_MAP = {"A+": 100, "A": 80, "A-": 70, "B+": 60, "B": 50, "B-": 40, "C+": 30, "C": 20, "C-": 10, "无": 0,
+            None: 0, "": 0}
+WEIGHTS = {"score_similarity": 0.4, "level": 0.2, "rank": 0.2, "location": 0.2}
+
+
+def reference_score(major):
+    """2024 年 (为空时 2023 年) 分数线字符串中数字的最大值。"""
+    score_lines = major.get('score_lines', {})
+    score_str = score_lines.get('2024') or score_lines.get('2023')
+    if score_str and isinstance(score_str, str):
+        nums = [int(x) for x in re.findall(r'\d+', score_str)]
+        if nums:
+            return max(nums)
+    return None
+
+
+def get_similarity(target, actual):
+    if target is None or actual is None:
+        return 0
+    return max(0, 100 - abs(target - actual))
+
+
+def calculate_recommendations(schools, target_score, target_level, target_rank_pref, target_location):
+    """原先的逐校推荐打分，返回前 20 名。"""
+    recommendations = []
+    for school in schools:
+        recommend_score = 0
+        score_similarity = 0
+        if target_score is not None:
+            major_max_scores = []
+            for dept in school.get('departments') or []:
+                for major in dept.get('majors', []):
+                    major_score = reference_score(major)
+                    if major_score is not None:
+                        major_max_scores.append(major_score)
+            if major_max_scores:
+                score_similarity = get_similarity(target_score, sum(major_max_scores) / len(major_max_scores))
+        recommend_score += WEIGHTS["score_similarity"] * score_similarity
+
+        target_level_val = LEVEL_SCORES.get(target_level, None)
+        school_level_score = LEVEL_SCORES.get(school.get('level'), None)
+        level_similarity = 0
+        if target_level_val is not None and school_level_score is not None:
+            level_similarity = get_similarity(target_level_val, school_level_score)
+        recommend_score += WEIGHTS["level"] * level_similarity
+
+        target_rank_val = RANK_MAP.get(target_rank_pref, None)
+        school_rank_score = RANK_MAP.get(school.get('computer_rank'), None)
+        rank_similarity = 0
+        if target_rank_val is not None and school_rank_score is not None:
+            rank_similarity = get_similarity(target_rank_val, school_rank_score)
+        recommend_score += WEIGHTS["rank"] * rank_similarity
+
+        location_similarity = 0
+        if target_location:
+            if school.get('province') == target_location or school.get('region') == target_location:
+                location_similarity = 100
+        recommend_score += WEIGHTS["location"] * location_similarity
+
+        recommendations.append({
+            "id": school.get('id', school.get('name')),
+            "name": school.get("name"),
+            "level": school.get("level"),
+            "province": school.get("province"),
+            "region": school.get("region"),
+            "computer_rank": school.get("computer_rank"),
+            "enrollment_24_school_total": school.get("enrollment_24_school_total", "未知"),
+            "recommend_score": round(recommend_score, 2),
+        })
+    recommendations.sort(key=lambda x: x['recommend_score'], reverse=True)
+    return recommendations[:20]
+
+
+# --- 院校库页面的筛选与排序 ---
+EXAM_TYPE_408 = '408统考'
+EXAM_TYPE_SELF = '自命题'
+# 专业课代码：408 为统考，8xx / 9xx 为院校自命题
+_EXAM_CODE = re.compile(r'(?<!\d)(408|[89]\d{2})(?!\d)')
+
+
+def school_exam_types(school):
+    """根据初试科目汇总判断学校的专业课考试类型。"""
+    codes = set(_EXAM_CODE.findall(school.get('exam_subjects_summary') or ''))
+    types = []
+    if '408' in codes:
+        types.append(EXAM_TYPE_408)
+    if any(code != '408' for code in codes):
+        types.append(EXAM_TYPE_SELF)
+    return tuple(types)
+
+
+def _matches(school, field, values):
+    if field == 'exam_type':
+        return any(t in values for t in school_exam_types(school))
+    return school.get(field) in values
+
+
+def filter_schools(schools, search_query='', filters=None):
+    """原先 school_list 的逐条件列表过滤；每个条件扩展为多选 (同一字段的取值之间为"或")。"""
+    filtered = list(schools)
+    if search_query:
+        filtered = [s for s in filtered if search_query.lower() in (s.get('name') or '').lower()]
+    for field, values in (filters or {}).items():
+        values = [v for v in values or () if v]
+        if values:
+            filtered = [s for s in filtered if _matches(s, field, values)]
+    return filtered
+
+
+def sort_schools(schools, sort_by, favorites_counts):
+    """原先 school_list 的排序：default 按 (地区, 省份, 名称)，其余按收藏数降序 (稳定排序)。"""
+    schools = list(schools)
+    if sort_by == 'default':
+        schools.sort(key=lambda x: (x.get('region') or '', x.get('province') or '', x.get('name') or ''))
+    else:
+        schools.sort(key=lambda x: favorites_counts.get(str(x.get('id', x.get('name'))), 0), reverse=True)
+    return schools
+
+
+def get_favorites_count(users_favorites):
+    """原先遍历所有用户收藏夹的统计：{school_id: 收藏该校的用户数}。"""
+    favorites_count = {}
+    for favorites in users_favorites.values():
+        for school_id in favorites:
+            favorites_count[school_id] = favorites_count.get(school_id, 0) + 1
+    return favorites_count
@@ -0,0 +1,36 @@
+"""
+测试的公共夹具。测试从项目根目录运行: python -m pytest -q
+
+院校数据使用仓库中的 data/schools.json (只读)，并像运行中的应用一样转换为 SchoolRecord，
+嵌套的院系/专业因此是冻结的 tuple 与 MappingProxyType，而不是普通的 dict/list。
+"""
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from utils.data_store import read_json
+from utils.school_repository import JsonSchoolRepository, make_records
+
+SCHOOLS_PATH = os.path.join(BASE_DIR, 'data', 'schools.json')
+
+
+@pytest.fixture(scope='session')
+def raw_schools():
+    """data/schools.json 原样解析得到的学校字典列表 (测试不得修改)。"""
+    return read_json(SCHOOLS_PATH, default=[])
+
+
+@pytest.fixture(scope='session')
+def school_records(raw_schools):
+    """与运行中的应用相同的只读 SchoolRecord 列表。"""
+    return make_records(raw_schools)
+
+
+@pytest.fixture(scope='session')
+def school_repo():
+    """只读使用的 JSON 仓库 (index()、major_index()、recommender() 与应用中相同)。"""
+    return JsonSchoolRepository(SCHOOLS_PATH)
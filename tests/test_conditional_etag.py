@@ -0,0 +1,110 @@
+"""app.py 的 conditional_etag：ETag / 304、Accept-Encoding 协商与压缩缓存。
+
+压缩只改变传输编码：解压后的响应体必须与不压缩时 (即原先的响应) 完全相同。
+"""
+import gzip
+
+import pytest
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+import app as app_module
+from utils.compression import BROTLI_AVAILABLE, choose_encoding
+
+LARGE_URL = '/api/dashboard'
+SMALL_URL = '/api/schools/suggest?q=不存在的学校'
+
+
+@pytest.fixture
+def client():
+    app_module.compressed_cache.clear()
+    return app_module.app.test_client()
+
+
+def decode(response):
+    encoding = response.headers.get('Content-Encoding')
+    data = response.get_data()
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(data)
+    assert encoding is None
+    return data
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate, gzip;q=0.8', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+    ('br, gzip', 'br' if BROTLI_AVAILABLE else 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('*', 'br' if BROTLI_AVAILABLE else 'gzip'),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(parse_accept_header(header, Accept)) == expected
+
+
+def test_identity_response_has_plain_etag(client):
+    response = client.get(LARGE_URL, headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert not response.get_etag()[0].endswith(('-gzip', '-br'))
+    assert 'Accept-Encoding' in response.headers['Vary']
+    revalidated = client.get(LARGE_URL, headers={'Accept-Encoding': 'identity',
+                                                 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == response.headers['ETag']
+
+
+@pytest.mark.parametrize('encoding', ['gzip', pytest.param('br', marks=pytest.mark.skipif(
+    not BROTLI_AVAILABLE, reason='需要可选依赖 brotli'))])
+def test_compressed_response_matches_identity(client, encoding):
+    plain = client.get(LARGE_URL, headers={'Accept-Encoding': 'identity'})
+    first = client.get(LARGE_URL, headers={'Accept-Encoding': encoding})
+    assert first.headers['Content-Encoding'] == encoding
+    assert first.get_etag()[0] == f"{plain.get_etag()[0]}-{encoding}"
+    assert decode(first) == plain.get_data()
+    # 第二次命中压缩缓存，字节完全相同
+    second = client.get(LARGE_URL, headers={'Accept-Encoding': encoding})
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    revalidated = client.get(LARGE_URL, headers={'Accept-Encoding': encoding,
+                                                 'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == first.headers['ETag']
+
+
+def test_small_response_is_not_compressed_and_has_plain_etag(client):
+    response = client.get(SMALL_URL, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert not response.get_etag()[0].endswith('-gzip')
+    assert len(app_module.compressed_cache) == 0
+    revalidated = client.get(SMALL_URL, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_announcements_body_matches_data_file(client):
+    expected = app_module.build_announcements_payload()
+    for encoding in ('identity', 'gzip'):
+        response = client.get('/api/announcements', headers={'Accept-Encoding': encoding})
+        assert app_module.app.json.loads(decode(response)) == expected
+
+
+def test_failed_dashboard_part_is_not_cached(client, monkeypatch):
+    version_func, _ = app_module.DASHBOARD_PARTS['announcements']
+
+    def broken():
+        raise RuntimeError('模拟构建失败')
+
+    monkeypatch.setitem(app_module.DASHBOARD_PARTS, 'announcements', (version_func, broken))
+    app_module.dashboard_parts.pop('announcements', None)
+    response = client.get(LARGE_URL, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+    assert response.cache_control.no_store
+    assert len(app_module.compressed_cache) == 0
+    assert 'error' in app_module.app.json.loads(decode(response))['announcements']
@@ -0,0 +1,105 @@
+"""utils/favorites_log.py：收藏数日志的计数、压缩与 changes_since，与原先遍历用户收藏夹的统计对比。"""
+import os
+import random
+
+import pytest
+
+import baseline
+from utils.data_store import read_json
+from utils.favorites_log import CHANGE_FEED_SIZE, FavoritesLedger
+
+SCHOOLS = [f"学校{i}" for i in range(12)]
+USERS = [f"user{i}" for i in range(6)]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'favorites_count.json'), str(tmp_path / 'favorites_events.log')
+
+
+def toggle_randomly(ledger, users_favorites, rng, steps):
+    """模拟用户在收藏 / 取消收藏之间切换，同时维护每个用户的收藏夹 (原先统计的数据来源)。"""
+    for _ in range(steps):
+        user, school = rng.choice(USERS), rng.choice(SCHOOLS)
+        favorites = users_favorites.setdefault(user, set())
+        if school in favorites:
+            favorites.remove(school)
+            ledger.record(user, school, -1)
+        else:
+            favorites.add(school)
+            ledger.record(user, school, 1)
+
+
+def nonzero(counts):
+    return {school: count for school, count in counts.items() if count}
+
+
+def test_counts_match_baseline_across_compactions(paths):
+    rng = random.Random(1)
+    writer = FavoritesLedger(*paths, compact_every=7)
+    reader = FavoritesLedger(*paths) # 另一个进程：只跟读日志，看到压缩后重新加载
+    users_favorites = {}
+    for _ in range(30):
+        toggle_randomly(writer, users_favorites, rng, rng.randint(1, 10))
+        expected = baseline.get_favorites_count(users_favorites)
+        assert nonzero(writer.counts()) == expected
+        assert nonzero(reader.counts()) == expected
+        assert all(writer.count(school) == expected.get(school, 0) for school in SCHOOLS)
+    assert writer.version() == reader.version()
+
+
+def test_compact_preserves_counts_and_empties_log(paths):
+    counts_path, log_path = paths
+    ledger = FavoritesLedger(*paths, compact_every=10 ** 6)
+    users_favorites = {}
+    toggle_randomly(ledger, users_favorites, random.Random(2), 50)
+    before = ledger.counts()
+    assert os.path.getsize(log_path) > 0
+    ledger.compact()
+    assert ledger.counts() == before
+    assert os.path.getsize(log_path) == 0
+    assert nonzero(read_json(counts_path, default={})) == baseline.get_favorites_count(users_favorites)
+    assert nonzero(FavoritesLedger(*paths).counts()) == baseline.get_favorites_count(users_favorites)
+
+
+@pytest.mark.parametrize('compact_every', [10 ** 6, 5])
+def test_changes_since_brings_snapshot_up_to_date(paths, compact_every):
+    rng = random.Random(3)
+    writer = FavoritesLedger(*paths, compact_every=compact_every)
+    reader = FavoritesLedger(*paths)
+    users_favorites = {}
+    for ledger in (writer, reader):
+        ledger.counts()
+    epochs = {id(writer): writer.snapshot(), id(reader): reader.snapshot()}
+    for _ in range(20):
+        toggle_randomly(writer, users_favorites, rng, rng.randint(0, 8))
+        for ledger in (writer, reader):
+            old_epoch, old_counts = epochs[id(ledger)]
+            epoch, changes = ledger.changes_since(old_epoch)
+            assert changes is not None
+            _, current = ledger.snapshot()
+            # 收藏数发生变化的学校必须出现在 changes 中，且值为当前收藏数
+            changed = {school for school in old_counts.keys() | current.keys()
+                       if old_counts.get(school, 0) != current.get(school, 0)}
+            assert changed <= changes.keys()
+            assert all(count == current.get(school, 0) for school, count in changes.items())
+            assert nonzero({**old_counts, **changes}) == nonzero(current) == baseline.get_favorites_count(
+                users_favorites)
+            epochs[id(ledger)] = (epoch, current)
+
+
+def test_changes_since_current_epoch_is_empty(paths):
+    ledger = FavoritesLedger(*paths)
+    ledger.record('alice', SCHOOLS[0], 1)
+    epoch = ledger.epoch()
+    assert ledger.changes_since(epoch) == (epoch, {})
+
+
+def test_changes_since_stale_or_unknown_epoch_requires_rebuild(paths):
+    ledger = FavoritesLedger(*paths, compact_every=10 ** 6)
+    start = ledger.epoch()
+    for i in range(CHANGE_FEED_SIZE + 5):
+        ledger.record(f"user{i}", SCHOOLS[i % len(SCHOOLS)], 1)
+    epoch, changes = ledger.changes_since(start)
+    assert changes is None and epoch == ledger.epoch()
+    assert ledger.changes_since(epoch + 100)[1] is None
@@ -0,0 +1,106 @@
+"""utils/major_index.py：专业检索的位图筛选与排序，与对原始数据逐个专业的暴力计算对比。"""
+import re
+
+import pytest
+
+from utils.major_index import (MAJOR_SORT_DEFAULT, MAJOR_SORT_ENROLLMENT, MAJOR_SORT_SCORE, MAJOR_SORT_SCORE_DESC,
+                               MajorIndex, extract_major_code)
+from utils.score_lines import parse_score_line
+
+
+def flat_majors(raw_schools):
+    """按学校、院系、专业的原始顺序展开为 [(学校, 专业)]，与 MajorIndex 的行号一一对应。"""
+    return [(school, major) for school in raw_schools
+            for department in school.get('departments') or []
+            for major in department.get('majors') or []]
+
+
+def score_total(major, year):
+    parsed = parse_score_line((major.get('score_lines') or {}).get(year))
+    return parsed['total'] if parsed else None
+
+
+def enrollment(major, year):
+    try:
+        return int((major.get('enrollment') or {}).get(year))
+    except (TypeError, ValueError):
+        return None
+
+
+@pytest.fixture(scope='module')
+def major_index(school_records):
+    return MajorIndex(school_records)
+
+
+@pytest.fixture(scope='module')
+def majors(raw_schools):
+    return flat_majors(raw_schools)
+
+
+def test_rows_follow_source_order(major_index, majors):
+    assert len(major_index) == len(majors)
+    for entry, (school, major) in zip(major_index.entries, majors):
+        assert entry.school.get('id') == school.get('id')
+        assert entry.major_name == (major.get('major_name') or '')
+
+
+@pytest.mark.parametrize('min_score, max_score', [(300, None), (None, 320), (280, 340), (500, None)])
+def test_score_range_matches_brute_force(major_index, majors, min_score, max_score):
+    year = major_index.latest_year
+    expected = [row for row, (_, major) in enumerate(majors)
+                if (total := score_total(major, year)) is not None
+                and (min_score is None or total >= min_score) and (max_score is None or total <= max_score)]
+    bits = major_index.select(min_score=min_score, max_score=max_score)
+    assert [row for row in range(len(majors)) if bits >> row & 1] == expected
+    if min_score == 300:
+        assert expected # 数据中确有复试线不低于 300 的专业
+
+
+def test_min_score_with_code_and_subject(major_index, majors):
+    year = major_index.latest_year
+    expected = [row for row, (_, major) in enumerate(majors)
+                if (total := score_total(major, year)) is not None and total >= 300
+                and extract_major_code(major).startswith('0854') and re.search(r'(?<!\d)408(?!\d)', major.get('exam_subjects') or '')]
+    bits = major_index.select(codes=['0854'], subjects=['408'], min_score=300)
+    assert [row for row in range(len(majors)) if bits >> row & 1] == expected
+    assert expected
+
+
+@pytest.mark.parametrize('sort_by', [MAJOR_SORT_SCORE, MAJOR_SORT_SCORE_DESC, MAJOR_SORT_ENROLLMENT])
+def test_sort_matches_brute_force(major_index, majors, sort_by):
+    year = major_index.latest_year
+    value_of = enrollment if sort_by == MAJOR_SORT_ENROLLMENT else score_total
+    sign = 1 if sort_by == MAJOR_SORT_SCORE else -1
+
+    def key(row):
+        value = value_of(majors[row][1], year)
+        return (value is None, sign * value if value is not None else 0, row)
+
+    expected = sorted(range(len(majors)), key=key)
+    row_of = {id(entry): row for row, entry in enumerate(major_index.entries)}
+    page = major_index.page(major_index.all_bits, sort_by=sort_by, limit=len(majors))
+    assert [row_of[id(entry)] for entry in page] == expected
+    values = [value_of(majors[row][1], year) for row in expected[:50]]
+    assert all(value is not None for value in values) # 有数值的专业排在前面
+
+
+def test_sort_by_score_orders_filtered_results(major_index):
+    bits = major_index.select(min_score=300)
+    page = major_index.page(bits, sort_by=MAJOR_SORT_SCORE, offset=0, limit=20)
+    totals = [entry.score_totals[major_index.latest_year] for entry in page]
+    assert totals and totals == sorted(totals) and totals[0] >= 300
+    second = major_index.page(bits, sort_by=MAJOR_SORT_SCORE, offset=20, limit=20)
+    assert second and second[0].score_totals[major_index.latest_year] >= totals[-1]
+
+
+def test_default_sort_pages(major_index):
+    bits = major_index.select(codes=['0854'])
+    first = major_index.page(bits, sort_by=MAJOR_SORT_DEFAULT, limit=10)
+    second = major_index.page(bits, sort_by=MAJOR_SORT_DEFAULT, offset=10, limit=10)
+    assert first and not set(map(id, first)) & set(map(id, second))
+
+
+def test_to_dict_includes_score_lines(major_index):
+    with_scores = [entry.to_dict() for entry in major_index.entries if entry.score_totals]
+    assert with_scores
+    assert all(entry['score_lines'] for entry in with_scores)
@@ -0,0 +1,43 @@
+"""utils/recommender.py：向量化推荐与原先逐校打分的结果必须完全一致 (顺序与两位小数的分数)。"""
+import itertools
+
+import numpy as np
+import pytest
+
+from baseline import calculate_recommendations
+from utils.recommender import RecommendationScorer
+
+SCORES = (None, 250, 300, 330, 350, 380, 420)
+LEVELS = (None, '985', '211', '双一流', '普通院校')
+RANKS = (None, 'A+', 'A', 'B+', 'C', '无')
+LOCATIONS = (None, '四川', '北京', 'A区', 'B区')
+
+
+@pytest.fixture(scope='module')
+def scorer(school_repo):
+    return school_repo.recommender()
+
+
+def test_scorer_is_built_from_records(scorer, school_records):
+    assert len(scorer.schools) == len(school_records)
+    # 有分数线的学校必须得到代表分数线，否则分数项恒为 0
+    assert np.isfinite(scorer.score_lines).sum() > 0
+
+
+@pytest.mark.parametrize('target_score', SCORES)
+def test_matches_baseline(scorer, raw_schools, target_score):
+    for target in itertools.product((target_score,), LEVELS, RANKS, LOCATIONS):
+        assert scorer.recommend(*target) == calculate_recommendations(raw_schools, *target), target
+
+
+def test_matches_baseline_location_only(raw_schools, school_records):
+    # 只按地区推荐时大量学校同分，前 20 名由原始顺序决定
+    scorer = RecommendationScorer(school_records)
+    for location in LOCATIONS[1:]:
+        assert scorer.recommend(None, None, None, location) == calculate_recommendations(
+            raw_schools, None, None, None, location)
+
+
+def test_limit_larger_than_school_count(school_records):
+    scorer = RecommendationScorer(school_records[:5])
+    assert len(scorer.recommend(350, '211', 'A', '四川')) == 5
@@ -0,0 +1,46 @@
+"""utils/school_charts.py：学校详情页图表配置 (由 MajorIndex 按 SchoolRecord 构建)。"""
+import json
+
+import pytest
+
+from utils.major_index import MajorIndex
+from utils.score_lines import parse_score_line
+
+
+def school_score_totals(school):
+    """学校各专业 {年份: 复试线总分} 中出现过的全部总分。"""
+    return [parsed['total'] for department in school.get('departments') or []
+            for major in department.get('majors') or []
+            for raw in (major.get('score_lines') or {}).values()
+            for parsed in (parse_score_line(raw),) if parsed and parsed['total'] is not None]
+
+
+@pytest.fixture(scope='module')
+def charts(school_records):
+    return MajorIndex(school_records).charts
+
+
+def test_schools_with_score_lines_get_a_score_chart(charts, raw_schools):
+    with_scores = 0
+    for position, school in enumerate(raw_schools):
+        totals = school_score_totals(school)
+        options = json.loads(str(charts.get(position)['score']))
+        if not totals:
+            assert options is None, school.get('name')
+            continue
+        with_scores += 1
+        assert options is not None, school.get('name')
+        plotted = [value for series in options['series'] for value in series['data'] if value is not None]
+        assert sorted(plotted) == sorted(totals), school.get('name')
+    assert with_scores > 0
+
+
+def test_known_school_score_chart(charts, raw_schools):
+    position = next(i for i, school in enumerate(raw_schools) if school.get('name') == '江南大学')
+    options = json.loads(str(charts.get(position)['score']))
+    assert options['series'] and options['xAxis']['data']
+
+
+def test_invalid_position_is_null(charts):
+    assert str(charts.get(None)['score']) == 'null'
+    assert str(charts.get(10 ** 6)['enrollment']) == 'null'
@@ -0,0 +1,89 @@
+"""院校库筛选 (SchoolIndex：n-gram 名称检索 + 筛选位图 + 分面计数 + 预排序分页) 与原先逐条件过滤对比。"""
+import itertools
+
+import pytest
+
+import baseline
+from utils.favorites_log import FavoritesLedger
+from utils.school_bitsets import positions_from_bits
+from utils.school_facets import FACET_FIELDS
+from utils.school_orderings import SchoolOrderings
+
+QUERIES = ('', '大学', '四川', '理工', 'U', '不存在的学校')
+FILTERS = (
+    {},
+    {'province': ['四川']},
+    {'province': ['四川', '北京'], 'level': ['211', '双一流']},
+    {'level': ['985', '211'], 'region': ['A区']},
+    {'computer_rank': ['A', 'B+'], 'exam_type': ['408统考']},
+    {'exam_type': ['自命题'], 'region': ['B区']},
+    {'exam_type': ['408统考', '自命题'], 'province': ['北京', '上海', '江苏']},
+    {'province': ['不存在的省份']},
+)
+
+
+def ids(schools):
+    return [school.get('id') for school in schools]
+
+
+@pytest.fixture(scope='module')
+def index(school_repo):
+    return school_repo.index()
+
+
+def select(index, query, filters):
+    positions = index.search(query) if query else None
+    return index.bitmaps.select(filters, positions=positions)
+
+
+@pytest.mark.parametrize('query, filters', list(itertools.product(QUERIES, FILTERS)))
+def test_filter_matches_baseline(index, query, filters):
+    expected = baseline.filter_schools(index.schools, query, filters)
+    assert ids(index.records(positions_from_bits(select(index, query, filters)))) == ids(expected)
+
+
+@pytest.mark.parametrize('query, filters', list(itertools.product(QUERIES, FILTERS)))
+def test_facet_counts_apply_other_filters(index, query, filters):
+    counts = index.facets.counts(filters, positions=index.search(query) if query else None)
+    for field in FACET_FIELDS:
+        others = {f: v for f, v in filters.items() if f != field}
+        matched = baseline.filter_schools(index.schools, query, others)
+        for value in index.facets.values[field]:
+            expected = len(baseline.filter_schools(matched, '', {field: [value]}))
+            assert counts[field].get(value, 0) == expected, (field, value)
+
+
+def test_facet_values_match_baseline(index):
+    schools = index.schools
+    assert index.facets.values['province'] == sorted({s['province'] for s in schools if s.get('province')})
+    assert index.facets.values['region'] == sorted({s['region'] for s in schools if s.get('region')})
+    assert index.facets.values['computer_rank'] == sorted({s['computer_rank'] for s in schools
+                                                           if s.get('computer_rank')})
+    assert index.facets.values['level'] == sorted({s['level'] for s in schools if s.get('level')},
+                                                  key=lambda x: (x != '985', x != '211', x != '双一流', x))
+
+
+@pytest.fixture(scope='module')
+def favorites(index, tmp_path_factory):
+    """收藏数各不相同又有大量并列的 ledger，以及对应的独立排序 (不影响共享的索引)。"""
+    directory = tmp_path_factory.mktemp('favorites')
+    ledger = FavoritesLedger(str(directory / 'favorites_count.json'), str(directory / 'favorites_events.log'))
+    counts = {str(school.get('id', school.get('name'))): position % 4
+              for position, school in enumerate(index.schools) if position % 3}
+    ledger.reset(counts)
+    orderings = SchoolOrderings(index.schools)
+    orderings.favorites.sync(ledger)
+    return counts, orderings
+
+
+@pytest.mark.parametrize('sort_by', ['favorites', 'default'])
+@pytest.mark.parametrize('query, filters', [('', {}), ('大学', {}), ('', {'province': ['四川', '北京']}),
+                                            ('', {'level': ['211'], 'exam_type': ['408统考']})])
+def test_sorted_pages_match_baseline(index, favorites, sort_by, query, filters):
+    counts, orderings = favorites
+    bits = select(index, query, filters)
+    expected = ids(baseline.sort_schools(baseline.filter_schools(index.schools, query, filters), sort_by, counts))
+    per_page = 20
+    for offset in range(0, len(expected) + per_page, per_page):
+        page = orderings.page(sort_by, bits, offset, per_page)
+        assert ids(index.records(page)) == expected[offset:offset + per_page], offset
@@ -0,0 +1,57 @@
+"""utils/school_repository.py：JSON 仓库的单校保存。"""
+import shutil
+import threading
+
+import pytest
+
+from conftest import SCHOOLS_PATH
+from utils.catalog import thaw
+from utils.school_repository import JsonSchoolRepository
+
+
+@pytest.fixture
+def schools_path(tmp_path):
+    path = tmp_path / 'schools.json'
+    shutil.copyfile(SCHOOLS_PATH, path)
+    return str(path)
+
+
+def test_unchanged_save_is_byte_identical(schools_path):
+    repo = JsonSchoolRepository(schools_path)
+    with open(schools_path, 'rb') as f:
+        before = f.read()
+    repo.save_school(thaw(repo.load_schools()[10]))
+    with open(schools_path, 'rb') as f:
+        assert f.read() == before
+
+
+def test_save_missing_school_raises(schools_path):
+    with pytest.raises(KeyError):
+        JsonSchoolRepository(schools_path).save_school({'id': '不存在的学校'})
+
+
+def test_concurrent_saves_keep_every_update(schools_path):
+    # 每个线程使用独立的仓库实例 (相当于不同进程各自的缓存)，修改不同的学校
+    school_ids = [school['id'] for school in JsonSchoolRepository(schools_path).load_schools()[:8]]
+    rounds = 5
+    errors = []
+
+    def edit(school_id):
+        repo = JsonSchoolRepository(schools_path)
+        try:
+            for round_number in range(rounds):
+                school = thaw(repo.get_school(school_id))
+                school['notes'] = f"round {round_number}"
+                repo.save_school(school)
+        except Exception as e: # 在主线程中断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=edit, args=(school_id,)) for school_id in school_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    repo = JsonSchoolRepository(schools_path)
+    for school_id in school_ids:
+        assert repo.get_school(school_id)['notes'] == f"round {rounds - 1}", school_id
@@ -0,0 +1,55 @@
+"""utils/score_lines.py：分数线解析，尤其是经由只读 SchoolRecord 访问时的结果。"""
+from types import MappingProxyType
+
+import pytest
+
+from baseline import reference_score as baseline_reference_score
+from utils.catalog import SchoolRecord
+from utils.score_lines import parse_score_line, parse_score_lines, reference_score_value
+
+
+@pytest.mark.parametrize('raw, total, max_value', [
+    ('328/37/56', 328, 328),
+    ('67/66/87/95/340', 340, 340),
+    ('335/50/50/80/70', 335, 335),
+    ('277-361', 277, 361),
+    ('最低分274', 274, 274),
+    ('290', 290, 290),
+    ('24改考了408', None, 408),
+])
+def test_parse_score_line(raw, total, max_value):
+    parsed = parse_score_line(raw)
+    assert parsed['total'] == total
+    assert parsed['max_value'] == max_value
+
+
+def test_parse_score_line_empty():
+    assert parse_score_line('') is None
+    assert parse_score_line(None) is None
+
+
+def test_parse_through_school_record():
+    record = SchoolRecord({
+        'id': 'test', 'name': '测试大学',
+        'departments': [{'department_name': '计算机学院', 'majors': [
+            {'major_name': '计算机技术', 'score_lines': {'2024': '328/37/56', '2023': '300'}},
+        ]}],
+    })
+    major = record['departments'][0]['majors'][0]
+    assert isinstance(major['score_lines'], MappingProxyType)
+    parsed = parse_score_lines(major['score_lines'])
+    assert parsed['2024']['total'] == 328
+    assert parsed['2023']['total'] == 300
+    assert reference_score_value(major) == 328
+
+
+def test_reference_score_matches_baseline_on_records(raw_schools, school_records):
+    compared = 0
+    for raw, record in zip(raw_schools, school_records):
+        raw_majors = [m for d in raw.get('departments') or [] for m in d.get('majors') or []]
+        record_majors = [m for d in record.get('departments') or () for m in d.get('majors') or ()]
+        for raw_major, record_major in zip(raw_majors, record_majors):
+            expected = baseline_reference_score(raw_major)
+            assert reference_score_value(record_major) == expected, (raw.get('name'), raw_major.get('major_name'))
+            compared += expected is not None
+    assert compared > 0 # 数据中确实有分数线，避免空比较
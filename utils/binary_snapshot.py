@@ -0,0 +1,145 @@
+"""
+数据文件的二进制快照，用于缩短进程冷启动时间。
+
+构建步骤把 data/ 下的 JSON 数据文件一次性解析并用 pickle 序列化为单个快照文件。
+每个 worker 进程启动时读取快照，省去逐个 json.load 的解析开销；某个源文件在
+构建之后被修改 (mtime 或大小变化) 时，该文件的快照条目视为过期，回退到读取 JSON。
+
+文件格式:
+    MAGIC (8 字节) | 头部长度 (4 字节, 大端) | 头部 JSON | pickle 数据
+头部记录格式版本、pickle 数据的 sha256 校验和以及每个源文件的 (mtime_ns, size)。
+格式版本不符或校验和不一致时整个快照被忽略。
+
+注意：pickle 只能加载可信来源的数据，快照文件必须由本项目的构建步骤在本机生成。
+
+构建 (从项目根目录运行，数据文件更新后需重新构建):
+    python -m utils.binary_snapshot [data 目录] [快照文件]
+"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+import sys
+import threading
+
+from utils.data_store import read_json
+
+SNAPSHOT_MAGIC = b'KYSNAP\x00\x01'
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILE_NAME = 'data_snapshot.bin'
+
+# 快照包含的数据文件 (相对 data 目录)。用户文件、收藏数 (由 utils/favorites_log.py 维护)
+# 与爬虫输出变化频繁或体积大，不纳入快照。
+SNAPSHOT_SOURCES = (
+    'schools.json',
+    'national_lines.json',
+    'exam_type_ratios.json',
+    'announcements.json',
+    'homepage_config.json',
+)
+
+_HEADER_LENGTH = struct.Struct('>I')
+
+
+def _source_stamp(file_path):
+    """返回源文件的 (st_mtime_ns, st_size)，文件不存在时返回 None。"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def build_snapshot(data_dir, snapshot_path, sources=SNAPSHOT_SOURCES):
+    """解析 sources 中的 JSON 文件并写出快照，返回写入快照的文件名列表。"""
+    payload = {}
+    stamps = {}
+    for name in sources:
+        file_path = os.path.join(data_dir, name)
+        # 先记录时间戳再读取：读取期间文件被替换时，加载方会因时间戳不一致而回退到 JSON
+        stamp = _source_stamp(file_path)
+        if stamp is None:
+            continue
+        payload[name] = read_json(file_path, default=None)
+        stamps[name] = stamp
+
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    header = json.dumps({
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'pickle_protocol': pickle.HIGHEST_PROTOCOL,
+        'checksum': hashlib.sha256(body).hexdigest(),
+        'sources': stamps,
+    }, ensure_ascii=False).encode('utf-8')
+
+    dir_name = os.path.dirname(os.path.abspath(snapshot_path))
+    os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+    return sorted(payload)
+
+
+def read_snapshot(snapshot_path):
+    """读取并校验快照文件，返回 (header, payload)。格式或校验和不符时抛出 ValueError。"""
+    with open(snapshot_path, 'rb') as f:
+        raw = f.read()
+    if raw[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("不是有效的数据快照文件")
+    offset = len(SNAPSHOT_MAGIC)
+    (header_length,) = _HEADER_LENGTH.unpack_from(raw, offset)
+    offset += _HEADER_LENGTH.size
+    header = json.loads(raw[offset:offset + header_length].decode('utf-8'))
+    if header.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"快照格式版本不符: {header.get('format_version')}")
+    body = memoryview(raw)[offset + header_length:]
+    if hashlib.sha256(body).hexdigest() != header.get('checksum'):
+        raise ValueError("快照校验和不一致，文件可能已损坏")
+    return header, pickle.loads(body)
+
+
+class DataSnapshot:
+    """已加载的快照。每个条目只交付一次，之后的读取照常走 JSON 文件。
+
+    交付后快照不再持有该对象的引用，调用方拿到的数据与 json.load 的结果一样归其所有。
+    """
+
+    def __init__(self, data_dir, header, payload):
+        self.data_dir = os.path.abspath(data_dir)
+        self._stamps = header.get('sources') or {}
+        self._payload = payload
+        self._lock = threading.Lock()
+
+    def take(self, file_path):
+        """源文件未变化时返回 (True, 数据) 并移除该条目，否则返回 (False, None)。"""
+        name = os.path.relpath(os.path.abspath(file_path), self.data_dir)
+        with self._lock:
+            if name not in self._payload:
+                return False, None
+            data = self._payload.pop(name)
+        if _source_stamp(file_path) != self._stamps.get(name):
+            return False, None # 源文件在构建快照之后被修改，快照条目已过期
+        return True, data
+
+
+def load_data_snapshot(data_dir, snapshot_path):
+    """加载快照，文件不存在时返回 None；其他错误抛出异常，由调用方决定是否回退。"""
+    if not os.path.exists(snapshot_path):
+        return None
+    header, payload = read_snapshot(snapshot_path)
+    return DataSnapshot(data_dir, header, payload)
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "data")
+    snapshot_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, SNAPSHOT_FILE_NAME)
+    print(f"开始从 {data_dir} 构建数据快照 ...")
+    names = build_snapshot(data_dir, snapshot_path)
+    print(f"快照已写入 {snapshot_path}，包含: {', '.join(names)}")
@@ -0,0 +1,174 @@
+"""
+只读的院校记录与按请求叠加的视图。
+
+仓库加载的院校数据在所有请求/线程间共享，因此统一转换为不可变的 SchoolRecord：
+顶层字段存放在 __slots__ 中，院系/专业等嵌套结构冻结为 tuple 与 MappingProxyType。
+需要附加收藏数、是否已收藏等与请求相关的字段时，用 SchoolView 叠加在记录之上，
+不复制、也不修改底层记录。需要修改数据 (后台编辑) 时先用 thaw() 得到普通的 dict/list。
+
+SchoolRecord 与 SchoolView 都提供 dict 风格的只读接口 (get / [] / keys / items)，
+现有的 school.get('name') 写法和 Jinja 模板中的 school.name 都可以照常使用。
+"""
+from types import MappingProxyType
+
+# 有独立槽位的顶层字段；其余字段 (如果有) 存入 _extra
+SCHOOL_FIELDS = (
+    'id', 'name', 'level', 'province', 'region', 'computer_rank', 'intro',
+    'exam_subjects_summary', 'enrollment_24_school_total',
+    'enrollment_24_academic', 'enrollment_24_professional', 'departments',
+)
+_SCHOOL_FIELD_SET = frozenset(SCHOOL_FIELDS)
+
+
+def freeze(value):
+    """递归地把 dict/list 转换为 MappingProxyType/tuple。已冻结的数据原样返回，不重复复制。"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """freeze 的逆操作：返回可自由修改、可 JSON 序列化的 dict/list 深拷贝。"""
+    if isinstance(value, (SchoolRecord, SchoolView)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class _ReadOnlyMapping:
+    """SchoolRecord / SchoolView 共用的 dict 风格只读接口，子类实现 get 与 keys。"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def to_dict(self):
+        """返回可修改、可 JSON 序列化的普通 dict (深拷贝)。"""
+        return thaw(self)
+
+    # 对象不可变，复制时直接返回自身
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_MISSING = object()
+
+
+class SchoolRecord(_ReadOnlyMapping):
+    """不可变的院校记录。原始数据中不存在的字段对应的槽位保持未赋值。
+
+    _keys 保存原始数据的字段顺序，keys() / thaw() 按该顺序输出，保存时不会打乱数据文件中的字段顺序。
+    """
+
+    __slots__ = SCHOOL_FIELDS + ('_extra', '_keys')
+
+    def __init__(self, data):
+        for key in SCHOOL_FIELDS:
+            if key in data:
+                object.__setattr__(self, key, freeze(data[key]))
+        extra = {key: freeze(value) for key, value in data.items() if key not in _SCHOOL_FIELD_SET}
+        object.__setattr__(self, '_extra', MappingProxyType(extra))
+        object.__setattr__(self, '_keys', tuple(data))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SchoolRecord 是只读的，请先用 thaw() 复制后再修改")
+
+    def __delattr__(self, name):
+        raise AttributeError("SchoolRecord 是只读的，请先用 thaw() 复制后再修改")
+
+    def __repr__(self):
+        return f"SchoolRecord(id={self.get('id')!r})"
+
+    def get(self, key, default=None):
+        if key in _SCHOOL_FIELD_SET:
+            return getattr(self, key, default)
+        return self._extra.get(key, default)
+
+    def keys(self):
+        # _keys 中可能包含摘要记录去掉的 departments，只输出实际存在的字段
+        return [key for key in self._keys if key in self._extra or (key in _SCHOOL_FIELD_SET and hasattr(self, key))]
+
+    def _copy_with(self, **changes):
+        """返回替换了部分槽位的新记录 (值为 _MISSING 表示去掉该字段)，其余槽位与本记录共享。"""
+        record = SchoolRecord.__new__(SchoolRecord)
+        for key in SCHOOL_FIELDS:
+            value = changes[key] if key in changes else getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                object.__setattr__(record, key, value)
+        object.__setattr__(record, '_extra', self._extra)
+        # 去掉的字段保留在顺序中 (summary().with_departments() 恢复原来的位置)，新增的字段排在最后
+        added = tuple(key for key, value in changes.items() if value is not _MISSING and key not in self._keys)
+        object.__setattr__(record, '_keys', self._keys + added)
+        return record
+
+    def summary(self):
+        """返回去掉院系专业明细的摘要记录。"""
+        return self._copy_with(departments=_MISSING)
+
+    def with_departments(self, departments):
+        """返回带有给定院系专业明细的新记录。"""
+        return self._copy_with(departments=freeze(departments))
+
+
+class SchoolView(_ReadOnlyMapping):
+    """在共享的 SchoolRecord 之上叠加按请求计算的字段 (如 favorites_count、is_favorite)。"""
+
+    __slots__ = ('_record', '_overlay')
+
+    def __init__(self, record, **overlay):
+        object.__setattr__(self, '_record', record)
+        object.__setattr__(self, '_overlay', overlay)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SchoolView 是只读的")
+
+    def __getattr__(self, name):
+        # 只有槽位以外的属性才会走到这里 (Jinja 模板中的 school.name 等)
+        if name.startswith('_'):
+            raise AttributeError(name) # 避免 copy/pickle 在槽位未赋值时无限递归
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise AttributeError(name)
+        return value
+
+    def __repr__(self):
+        return f"SchoolView({self._record!r}, {self._overlay!r})"
+
+    @property
+    def record(self):
+        return self._record
+
+    def get(self, key, default=None):
+        if key in self._overlay:
+            return self._overlay[key]
+        return self._record.get(key, default)
+
+    def keys(self):
+        return list(self._record.keys()) + [key for key in self._overlay if key not in self._record]
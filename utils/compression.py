@@ -0,0 +1,128 @@
+"""
+响应压缩 (gzip / brotli) 与按数据版本缓存的压缩结果。
+
+* choose_encoding() 根据请求的 Accept-Encoding 选择编码：优先 br (需要可选依赖 brotli)，其次 gzip。
+* CompressedCache 保存可缓存响应 (带数据版本 ETag 的只读 API) 压缩后的字节，
+  键为 (ETag, 编码)：数据不变时压缩只做一次，之后的请求直接返回缓存的字节，
+  数据版本变化后 ETag 随之变化，旧条目按 LRU 淘汰。缓存的压缩使用较高的压缩级别。
+* 其他较大的 HTML / JSON 响应 (如带会话信息的页面) 每次请求用较低的级别即时压缩。
+
+CompressionStats 记录原始字节、发送字节与压缩耗时，以及缓存命中省下的压缩耗时，
+可在后台仪表盘查看，benchmarks/bench_compression.py 用真实数据给出同样的统计。
+"""
+import gzip
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+ENCODING_BROTLI = 'br'
+ENCODING_GZIP = 'gzip'
+
+# 小于该字节数的响应不压缩 (压缩收益小于额外的头部与 CPU 开销)
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_MIMETYPES = frozenset(('application/json', 'text/html', 'text/css', 'application/javascript'))
+
+# 缓存的结果只压缩一次，使用较高的压缩级别；即时压缩使用较快的级别。
+# brotli 10/11 级对 30KB 的 JSON 需要数十毫秒，而检索类接口的版本随收藏数变化较频繁，
+# 未命中的请求要同步承担这次压缩，因此缓存也只用到 9 级 (约 5ms，体积只比 11 级大一成左右)
+CACHED_LEVELS = {ENCODING_BROTLI: 9, ENCODING_GZIP: 9}
+DYNAMIC_LEVELS = {ENCODING_BROTLI: 4, ENCODING_GZIP: 6}
+
+
+def choose_encoding(accept_encodings):
+    """从 werkzeug 的 request.accept_encodings 中选出编码，客户端都不接受时返回 None。"""
+    candidates = [ENCODING_BROTLI, ENCODING_GZIP] if BROTLI_AVAILABLE else [ENCODING_GZIP]
+    best, best_quality = None, 0
+    for encoding in candidates:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level):
+    """按指定编码与级别压缩 bytes。"""
+    if encoding == ENCODING_BROTLI:
+        return brotli.compress(data, quality=level)
+    # mtime=0 使相同输入得到相同输出
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class CompressionStats:
+    """压缩相关的累计统计 (线程安全)。"""
+
+    FIELDS = ('responses', 'cache_hits', 'bytes_original', 'bytes_sent', 'compress_seconds', 'saved_seconds')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self._values[field] += amount
+
+    def snapshot(self):
+        """返回统计副本，附带节省的字节数与压缩率。"""
+        with self._lock:
+            values = dict(self._values)
+        values['bytes_saved'] = values['bytes_original'] - values['bytes_sent']
+        values['ratio'] = values['bytes_sent'] / values['bytes_original'] if values['bytes_original'] else None
+        return values
+
+
+class CompressedCache:
+    """(ETag, 编码) -> 压缩后字节 的 LRU 缓存。"""
+
+    def __init__(self, max_entries=256, stats=None):
+        self.max_entries = max_entries
+        self.stats = stats or CompressionStats()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # (etag, encoding) -> (body, mimetype, 原始字节数, 压缩耗时)
+
+    def get(self, etag, encoding):
+        """返回 (压缩后字节, mimetype)，不存在时返回 None。命中时计入节省的压缩耗时。"""
+        key = (etag, encoding)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        body, mimetype, original_size, seconds = entry
+        self.stats.add(responses=1, cache_hits=1, bytes_original=original_size, bytes_sent=len(body),
+                       saved_seconds=seconds)
+        return body, mimetype
+
+    def put(self, etag, encoding, data, mimetype):
+        """压缩 data 并存入缓存，返回压缩后的字节。"""
+        start = time.perf_counter()
+        body = compress(data, encoding, CACHED_LEVELS[encoding])
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._entries[(etag, encoding)] = (body, mimetype, len(data), seconds)
+            self._entries.move_to_end((etag, encoding))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self.stats.add(responses=1, bytes_original=len(data), bytes_sent=len(body), compress_seconds=seconds)
+        return body
+
+    def compress_dynamic(self, data, encoding):
+        """即时压缩 (不缓存) 并计入统计。"""
+        start = time.perf_counter()
+        body = compress(data, encoding, DYNAMIC_LEVELS[encoding])
+        self.stats.add(responses=1, bytes_original=len(data), bytes_sent=len(body),
+                       compress_seconds=time.perf_counter() - start)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
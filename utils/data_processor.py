@@ -4,6 +4,11 @@ import os
 import re # 用于后续的正则提取
 import math # For isnan check if not using pandas
 
+try:
+    from utils.data_store import save_json
+except ImportError: # 直接以脚本方式运行 (python utils/data_processor.py) 时
+    from data_store import save_json
+
 # 定义文件路径
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # 获取项目根目录
 EXCEL_PATH = os.path.join(BASE_DIR, "择校文档.xlsx") # Primary input Excel file
@@ -102,12 +107,12 @@ def extract_school_level(school_name, school_type_str, intro_str=None):
     """根据学校名称、类型字符串和简介提取学校等级。优先级：985>211>双一流>普通院校"""
     # 1. 先用school_type_str
     if isinstance(school_type_str, str):
-    if "985" in school_type_str:
-        return "985"
-    if "211" in school_type_str:
-        return "211"
-    if "一流学科建设高校" in school_type_str or "双一流" in school_type_str:
-        return "双一流"
+        if "985" in school_type_str:
+            return "985"
+        if "211" in school_type_str:
+            return "211"
+        if "一流学科建设高校" in school_type_str or "双一流" in school_type_str:
+            return "双一流"
     # 2. intro_str和school_name兜底
     check_strs = [str(intro_str or ""), str(school_name or "")]
     for s in check_strs:
@@ -627,8 +632,7 @@ def main_process_excel_file(excel_file_path, output_json_path):
 
     os.makedirs(DATA_DIR, exist_ok=True)
     try:
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_school_list, f, ensure_ascii=False, indent=2)
+        save_json(output_json_path, cleaned_school_list, indent=2) # 原子写入，运行中的应用不会读到半个文件
         print(f"\n成功将处理后的数据写入到: {output_json_path}")
     except IOError as e: print(f"写入 JSON 文件时出错: {e}")
     except Exception as e: print(f"转换或写入 JSON 时发生未知错误: {e}")
@@ -0,0 +1,152 @@
+"""
+统一的数据文件存储模块。
+
+所有 JSON 数据文件的写入都经过本模块：先写入同目录下的临时文件并 fsync，
+再用 os.replace 原子替换目标文件。读取方因此无需加锁，也不会读到写了一半的文件。
+
+写入方之间通过旁路锁文件 (<文件名>.lock) 串行化，锁只覆盖"读取-修改-写回"
+这一小段，不会阻塞读取方。优先使用 portalocker，其次 fcntl，两者都不可用时
+只做进程内的线程互斥。
+
+JSON 的解析与序列化经由 utils/json_codec.py (有 orjson 时使用 orjson)。
+"""
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    from utils import json_codec
+except ImportError: # 作为脚本在 utils/ 目录内运行时
+    import json_codec
+
+try:
+    import portalocker
+except ImportError:
+    portalocker = None
+
+try:
+    import fcntl # 仅 POSIX 系统可用
+except ImportError:
+    fcntl = None
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def read_json(file_path, default=None):
+    """读取 JSON 文件。文件不存在或内容为空时返回 default；内容无法解析时抛出 json.JSONDecodeError。"""
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return default
+    if not content.strip():
+        return default
+    return json_codec.loads(content)
+
+
+def write_json_atomic(file_path, data, indent=2):
+    """将 data 原子地写入 file_path：临时文件 -> fsync -> os.replace。失败时抛出异常且不影响原文件。"""
+    dir_name = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix='.tmp', dir=dir_name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json_codec.dumps_bytes(data, indent=indent))
+            f.flush()
+            os.fsync(f.fileno())
+        _copy_file_mode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(dir_name)
+
+
+@contextmanager
+def writer_lock(file_path):
+    """写入方互斥锁：进程内线程锁 + 跨进程的旁路锁文件。读取方不需要获取此锁。"""
+    with _get_thread_lock(file_path):
+        lock_path = f"{file_path}.lock"
+        os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+        with open(lock_path, 'a', encoding='utf-8') as lock_file:
+            _lock_exclusive(lock_file)
+            try:
+                yield
+            finally:
+                _unlock(lock_file)
+
+
+def save_json(file_path, data, indent=2):
+    """在写入锁保护下整体覆盖写入 JSON 文件。"""
+    with writer_lock(file_path):
+        write_json_atomic(file_path, data, indent=indent)
+
+
+def update_json(file_path, mutate, default=None, indent=2):
+    """在写入锁保护下执行"读取-修改-写回"。
+
+    mutate(current_data) 返回要写回的新数据；返回 None 表示无需写入。
+    返回值表示是否发生了写入。
+    """
+    with writer_lock(file_path):
+        current = read_json(file_path, default=default)
+        new_data = mutate(current)
+        if new_data is None:
+            return False
+        write_json_atomic(file_path, new_data, indent=indent)
+        return True
+
+
+# --- 内部辅助函数 ---
+def _get_thread_lock(file_path):
+    key = os.path.abspath(file_path)
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = _thread_locks[key] = threading.Lock()
+        return lock
+
+
+def _lock_exclusive(f):
+    if portalocker is not None:
+        portalocker.lock(f, portalocker.LOCK_EX)
+    elif fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(f):
+    if portalocker is not None:
+        portalocker.unlock(f)
+    elif fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _copy_file_mode(src_path, dst_path):
+    """mkstemp 创建的临时文件权限为 0600，替换前沿用原文件的权限 (新文件使用 0644)。"""
+    try:
+        mode = stat.S_IMODE(os.stat(src_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    os.chmod(dst_path, mode)
+
+
+def _fsync_directory(dir_name):
+    """fsync 目录以持久化 rename；Windows 等不支持的平台直接跳过。"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        dir_fd = os.open(dir_name, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,45 @@
+"""
+初试科目的结构化解析。
+
+major['exam_subjects'] 是人工整理的自由文本，例如:
+    "① 101 思想政治理论\\n② 202英语（二）\\n③ 302数学（二）\\n④ 408计算机学科专业基础"
+extract_subject_codes 提取其中的 3 位科目代码 (上例为 101、202、302、408)，exam_types 据此判断考试类型：
+专业课中 408 为计算机统考，8xx / 9xx 为院校自命题。文本中没有代码的科目无法识别。
+科目代码不写回数据文件，由 MajorIndex 在每个数据版本构建时提取一次 (见 utils/major_index.py)。
+"""
+import re
+
+EXAM_TYPE_408 = '408统考'
+EXAM_TYPE_SELF = '自命题'
+UNIFIED_CS_CODE = '408'
+
+# 3 位科目代码，前后不能紧跟其他数字 (排除 "2024" 之类的年份)
+_SUBJECT_CODE = re.compile(r'(?<!\d)(\d{3})(?!\d)')
+
+
+def extract_subject_codes(exam_subjects):
+    """返回初试科目文本中出现的 3 位科目代码元组 (按出现顺序去重)。"""
+    if not isinstance(exam_subjects, str):
+        return ()
+    return tuple(dict.fromkeys(_SUBJECT_CODE.findall(exam_subjects)))
+
+
+def is_self_set_code(code):
+    """8xx / 9xx 为院校自命题的专业课代码。"""
+    return code[:1] in ('8', '9')
+
+
+def exam_types(codes):
+    """根据科目代码判断专业课考试类型，返回取值元组 (可能同时包含统考与自命题)。"""
+    types = []
+    if UNIFIED_CS_CODE in codes:
+        types.append(EXAM_TYPE_408)
+    if any(is_self_set_code(code) for code in codes):
+        types.append(EXAM_TYPE_SELF)
+    return tuple(types)
+
+
+def major_subject_codes(major):
+    """专业的科目代码元组。"""
+    return extract_subject_codes(major.get('exam_subjects'))
+
@@ -0,0 +1,240 @@
+"""
+收藏事件日志。
+
+每次收藏/取消收藏只向 data/favorites_events.log 追加一行事件 (JSON Lines):
+    {"ts": "2024-05-01T12:00:00", "user": "alice", "school": "四川大学", "delta": 1}
+全局收藏数 = favorites_count.json (上次压缩的结果) + 日志中尚未压缩的事件。
+每个进程在内存中维护聚合结果，读取前只解析日志新增的部分。
+
+日志累积到一定条数或最早的未压缩事件超过一定时间后，会被压缩回
+favorites_count.json：写入新的计数文件，再用一个空文件替换日志。
+其他进程发现日志文件被替换 (inode 变化) 时，重新读取计数文件并从头跟读新日志。
+
+追加与压缩都在日志文件的写入锁 (utils/data_store.writer_lock) 内进行，
+锁只覆盖一次很小的追加写，不再对整个计数文件做"读取-修改-写回"。
+
+每次计数变化都会递增内存中的 epoch 并记入一个有界的变更队列，
+依赖收藏数的派生结构 (如按收藏数预排序的院校顺序) 可以用 changes_since() 只处理变化的学校。
+epoch 只在本进程内有意义；需要跨进程一致的版本 (如 HTTP ETag) 时使用 version()。
+"""
+import collections
+import datetime
+import os
+import threading
+import time
+
+from utils import json_codec
+from utils.data_store import read_json, write_json_atomic, writer_lock
+from utils.snapshot_cache import get_file_identity
+
+COMPACT_EVERY_EVENTS = 200 # 未压缩事件达到该条数时压缩
+COMPACT_INTERVAL_SECONDS = 600 # 最早的未压缩事件超过该秒数时压缩
+CHANGE_FEED_SIZE = 1024 # 保留最近多少次计数变化，落后更多的调用方需要整体重建
+
+
+class FavoritesLedger:
+    """收藏数的内存聚合 + 追加日志 + 定期压缩。"""
+
+    def __init__(self, counts_path, log_path, compact_every=COMPACT_EVERY_EVENTS,
+                 compact_interval=COMPACT_INTERVAL_SECONDS):
+        self.counts_path = counts_path
+        self.log_path = log_path
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self._lock = threading.RLock()
+        self._counts = None # 已加载时为 {school_id: count}
+        self._counts_identity = None # 加载/写入计数文件时的文件身份
+        self._log_inode = None
+        self._offset = 0 # 已应用到 _counts 的日志字节数
+        self._pending_events = 0 # 当前日志中的事件条数
+        self._first_pending_at = None # 当前日志中最早事件被本进程看到的时间 (time.monotonic)
+        self._epoch = 0 # 每次计数变化递增
+        self._reset_epoch = 0 # 首次加载时的 epoch，更早的 epoch 无法增量同步
+        self._changes = collections.deque(maxlen=CHANGE_FEED_SIZE) # (epoch, school_id)
+
+    # --- 读取 ---
+    def counts(self):
+        """返回当前全局收藏数 {school_id: count} 的副本。"""
+        with self._lock:
+            self._refresh()
+            return {school_id: max(0, count) for school_id, count in self._counts.items()}
+
+    def counts_for(self, school_ids):
+        """返回给定学校的当前收藏数 {school_id: count}，只复制这些学校 (不复制整张计数表)。"""
+        with self._lock:
+            self._refresh()
+            return {school_id: max(0, self._counts.get(school_id, 0)) for school_id in school_ids}
+
+    def count(self, school_id):
+        """返回单个学校的当前收藏数。"""
+        with self._lock:
+            self._refresh()
+            return max(0, self._counts.get(school_id, 0))
+
+    def epoch(self):
+        """返回当前的计数版本号，任何学校的收藏数变化后都会变大。"""
+        with self._lock:
+            self._refresh()
+            return self._epoch
+
+    def version(self):
+        """返回与进程无关的计数版本 (计数文件身份, 日志 inode, 已读取的日志字节数)。
+
+        不同进程读到同一版本时计数必定相同，可作为 ETag 等跨进程缓存键的一部分。
+        """
+        with self._lock:
+            self._refresh()
+            return (self._counts_identity, self._log_inode, self._offset)
+
+    def snapshot(self):
+        """返回 (epoch, 收藏数副本)，两者对应同一时刻。"""
+        with self._lock:
+            self._refresh()
+            return self._epoch, {school_id: max(0, count) for school_id, count in self._counts.items()}
+
+    def changes_since(self, epoch):
+        """返回 (当前 epoch, {school_id: 当前收藏数})，只包含 epoch 之后变化过的学校。
+
+        epoch 太旧 (早于首次加载或已超出变更队列) 时第二项为 None，调用方应改用 snapshot() 整体重建。
+        """
+        with self._lock:
+            self._refresh()
+            if epoch == self._epoch:
+                return self._epoch, {}
+            oldest = self._changes[0][0] if self._changes else self._epoch + 1
+            if epoch < self._reset_epoch or epoch > self._epoch or oldest > epoch + 1:
+                return self._epoch, None
+            changed = {school_id for change_epoch, school_id in self._changes if change_epoch > epoch}
+            return self._epoch, {school_id: max(0, self._counts.get(school_id, 0)) for school_id in changed}
+
+    # --- 写入 ---
+    def record(self, username, school_id, delta):
+        """追加一条收藏事件 (delta 为 +1 或 -1)，返回该学校更新后的收藏数。"""
+        event = {
+            'ts': datetime.datetime.now().isoformat(timespec='seconds'),
+            'user': username,
+            'school': school_id,
+            'delta': delta,
+        }
+        line = json_codec.dumps(event) + '\n'
+        with self._lock, writer_lock(self.log_path):
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh(have_writer_lock=True) # 应用本条以及其他进程追加的事件
+            new_count = max(0, self._counts.get(school_id, 0))
+            if self._should_compact():
+                self._compact_locked()
+            return new_count
+
+    def compact(self):
+        """立即把日志压缩进计数文件。"""
+        with self._lock, writer_lock(self.log_path):
+            self._refresh(have_writer_lock=True)
+            self._compact_locked()
+
+    def reset(self, counts):
+        """用给定的计数整体替换当前数据 (例如从用户收藏夹重新统计后)，并清空日志。"""
+        with self._lock, writer_lock(self.log_path):
+            write_json_atomic(self.counts_path, counts)
+            self._replace_log()
+            self._reload_locked()
+
+    # --- 内部实现 ---
+    def _refresh(self, have_writer_lock=False):
+        """把日志中新增的事件应用到内存聚合；日志被其他进程压缩替换后重新加载。"""
+        inode, size = _inode_and_size(self.log_path)
+        # inode 可能被复用，文件比已读取的位置还短同样说明日志已被替换
+        if self._counts is None or inode != self._log_inode or size < self._offset:
+            # 完整重新加载需要与压缩互斥，避免读到新计数 + 旧日志 (writer_lock 不可重入)
+            if have_writer_lock:
+                self._reload_locked()
+            else:
+                with writer_lock(self.log_path):
+                    self._reload_locked()
+            return
+        self._apply_new_events()
+
+    def _reload_locked(self):
+        previous = self._counts
+        self._counts_identity = get_file_identity(self.counts_path)
+        counts = read_json(self.counts_path, default={})
+        self._counts = dict(counts) if isinstance(counts, dict) else {}
+        self._log_inode = _inode_and_size(self.log_path)[0]
+        self._offset = 0
+        self._pending_events = 0
+        self._first_pending_at = None
+        self._apply_new_events(record_changes=False)
+        if previous is None:
+            self._epoch += 1
+            self._reset_epoch = self._epoch
+            return
+        # 日志被压缩或计数被整体重置：与重新加载前逐个比较，只记录真正变化的学校
+        for school_id in previous.keys() | self._counts.keys():
+            if previous.get(school_id, 0) != self._counts.get(school_id, 0):
+                self._record_change(school_id)
+
+    def _record_change(self, school_id):
+        self._epoch += 1
+        self._changes.append((self._epoch, school_id))
+
+    def _apply_new_events(self, record_changes=True):
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except FileNotFoundError:
+            return
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return # 只有写了一半的行，等写完再读
+        for raw_line in chunk[:end].splitlines():
+            if not raw_line.strip():
+                continue
+            try:
+                event = json_codec.loads(raw_line)
+                school_id = event['school']
+                delta = int(event['delta'])
+            except (ValueError, KeyError, TypeError):
+                continue # 跳过损坏的行
+            self._counts[school_id] = self._counts.get(school_id, 0) + delta
+            if record_changes:
+                self._record_change(school_id)
+            self._pending_events += 1
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+        self._offset += end + 1
+
+    def _should_compact(self):
+        if self._pending_events >= self.compact_every:
+            return True
+        return (self._first_pending_at is not None
+                and time.monotonic() - self._first_pending_at >= self.compact_interval)
+
+    def _compact_locked(self):
+        # 原样写回聚合结果 (不截断负数)，保证压缩前后的计数完全一致
+        counts = dict(self._counts)
+        # 先写计数文件再替换日志：其他进程只在看到新日志后才会重新读取计数文件
+        write_json_atomic(self.counts_path, counts)
+        self._counts_identity = get_file_identity(self.counts_path)
+        self._replace_log()
+        self._counts = counts
+        self._log_inode = _inode_and_size(self.log_path)[0]
+        self._offset = 0
+        self._pending_events = 0
+        self._first_pending_at = None
+
+    def _replace_log(self):
+        tmp_path = f"{self.log_path}.new"
+        with open(tmp_path, 'w', encoding='utf-8'):
+            pass
+        os.replace(tmp_path, self.log_path)
+
+
+def _inode_and_size(file_path):
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None, 0
+    return st.st_ino, st.st_size
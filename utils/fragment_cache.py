@@ -0,0 +1,45 @@
+"""
+渲染结果 (HTML 片段) 的内存缓存。
+
+院校库页面中与用户无关的部分 (筛选表单、结果表格、分页) 只取决于查询参数、院校数据版本与收藏数，
+FragmentCache 以查询参数为键、以 (数据版本, 收藏数 epoch) 为版本保存渲染好的片段：
+版本一致时直接返回，版本变化后的第一次访问重新渲染并覆盖旧条目。条目数超过上限时按 LRU 淘汰。
+"""
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """键 -> (版本, 片段) 的 LRU 缓存 (线程安全)，并统计命中次数。"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, version):
+        """返回版本一致的片段，不存在或版本已过期时返回 None。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, fragment):
+        with self._lock:
+            self._entries[key] = (version, fragment)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,78 @@
+"""
+统一的 JSON 编解码层。
+
+安装了 orjson 时使用 orjson (解析与序列化都明显更快)，否则回退到标准库 json。
+数据文件的读写 (utils/data_store.py)、收藏事件日志以及 Flask 的 JSON provider
+都经由本模块，调用方不需要关心当前使用的是哪个实现。
+
+两种实现的输出约定一致：UTF-8、不转义非 ASCII 字符 (ensure_ascii=False)。
+orjson 只支持 2 空格缩进，其他缩进以及 orjson 无法处理的数据 (如超出 64 位的整数)
+会自动回退到标准库。解析失败时两者都抛出 json.JSONDecodeError (orjson 的异常是其子类)。
+"""
+import json
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _to_builtin(obj):
+    """把只读记录/视图与 MappingProxyType 转换为普通 dict，其他类型返回 NotImplemented。"""
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    to_dict = getattr(obj, 'to_dict', None)
+    if callable(to_dict):
+        return to_dict()
+    return NotImplemented
+
+
+def _make_default(default):
+    def _default(obj):
+        value = _to_builtin(obj)
+        if value is not NotImplemented:
+            return value
+        if default is not None:
+            return default(obj)
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return _default
+
+
+def loads(data):
+    """解析 JSON 文本 (str 或 bytes)。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def dumps_bytes(obj, indent=None, sort_keys=False, default=None):
+    """序列化为 UTF-8 编码的 bytes。indent 为 None 时输出紧凑格式。"""
+    if orjson is not None and indent in (None, 2):
+        option = 0
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=_make_default(default), option=option)
+        except TypeError: # orjson.JSONEncodeError 是 TypeError 的子类
+            pass # 例如超出 64 位的整数或非字符串键，交给标准库处理
+    return _stdlib_dumps(obj, indent, sort_keys, default).encode('utf-8')
+
+
+def dumps(obj, indent=None, sort_keys=False, default=None):
+    """序列化为 str。"""
+    if orjson is not None and indent in (None, 2):
+        return dumps_bytes(obj, indent=indent, sort_keys=sort_keys, default=default).decode('utf-8')
+    return _stdlib_dumps(obj, indent, sort_keys, default)
+
+
+def _stdlib_dumps(obj, indent, sort_keys, default):
+    separators = None if indent is not None else (',', ':')
+    return json.dumps(obj, ensure_ascii=False, indent=indent, sort_keys=sort_keys,
+                      separators=separators, default=_make_default(default))
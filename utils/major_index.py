@@ -0,0 +1,256 @@
+"""
+按数据版本构建的专业 (招生方向) 索引。
+
+院校数据按 学校 -> departments[] -> majors[] 嵌套保存，"哪些学校的 085404 考 408、2024 年招生不少于
+20 人" 这类查询原本需要遍历每所学校的全部院系专业。MajorIndex 在每个数据版本首次访问时
+(见 SchoolRepository.major_index()) 把所有专业展开为一张扁平表，每行一个专业：
+
+* 专业代码：优先取 major_code，为空时从专业名称中提取 6 位代码 (如 "电子信息(085404)-计算机技术")；
+* 初试科目代码：从 exam_subjects 中提取的 3 位代码 (utils/exam_subjects.py)，如 101、302、408、8xx；
+* 各年份招生人数与复试线总分 (由 utils/score_lines.py 解析 score_lines 得到)。
+
+筛选与 school_bitsets.py 相同，用 Python 整数位图表示命中的行：专业代码、科目代码各有倒排位图，
+招生人数/分数线下限按年份预先排好序，用 bisect 取出满足条件的行。同一学校的专业行是连续的，
+学校层面的筛选 (省份、等级等，复用 SchoolIndex.bitmaps) 转换为行区间的位图。
+科目代码的倒排位图同时用于统计首页"自命题 vs 408"饼图的专业数量 (exam_type_counts)；
+详情页的分数线/招生人数图表 (utils/school_charts.py) 也由这张表逐校生成，见 charts。
+"""
+import bisect
+import heapq
+import re
+
+from utils.exam_subjects import EXAM_TYPE_408, EXAM_TYPE_SELF, UNIFIED_CS_CODE, is_self_set_code, major_subject_codes
+from utils.school_bitsets import bits_from_positions, positions_from_bits
+from utils.score_lines import parse_score_lines
+from utils.school_charts import SchoolChartPayloads
+
+# 6 位专业代码，前后不能紧跟其他数字
+_MAJOR_CODE = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+
+MAJOR_SORT_ENROLLMENT = 'enrollment' # 招生人数降序
+MAJOR_SORT_SCORE = 'score' # 分数线升序
+MAJOR_SORT_SCORE_DESC = 'score_desc' # 分数线降序
+MAJOR_SORT_DEFAULT = 'default' # 学校原始顺序
+MAJOR_SORTS = (MAJOR_SORT_DEFAULT, MAJOR_SORT_ENROLLMENT, MAJOR_SORT_SCORE, MAJOR_SORT_SCORE_DESC)
+
+
+def extract_major_code(major):
+    """返回专业的 6 位代码：major_code 非空时直接使用，否则从专业名称中提取，都没有时返回空字符串。"""
+    code = str(major.get('major_code') or '').strip()
+    if code:
+        return code
+    match = _MAJOR_CODE.search(major.get('major_name') or '')
+    return match.group(1) if match else ''
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _score_totals(major):
+    """返回 {年份: 复试线总分}，没有解析结果的年份不包含在内。"""
+    totals = {}
+    for year, parsed in parse_score_lines(major.get('score_lines')).items():
+        total = _int_or_none(parsed.get('total')) if parsed else None
+        if total is not None:
+            totals[str(year)] = total
+    return totals
+
+
+class MajorEntry:
+    """扁平表中的一行 (一个学校院系下的一个专业)。"""
+
+    __slots__ = ('school_position', 'school', 'department_name', 'major_code', 'major_name',
+                 'subject_codes', 'enrollment', 'score_totals')
+
+    def __init__(self, school_position, school, department_name, major):
+        self.school_position = school_position
+        self.school = school
+        self.department_name = department_name
+        self.major_code = extract_major_code(major)
+        self.major_name = major.get('major_name') or ''
+        self.subject_codes = major_subject_codes(major)
+        self.enrollment = {str(year): int(count) for year, count in (major.get('enrollment') or {}).items()
+                           if _int_or_none(count) is not None}
+        self.score_totals = _score_totals(major)
+
+    def to_dict(self):
+        school = self.school
+        return {
+            'school_id': school.get('id'),
+            'school_name': school.get('name'),
+            'province': school.get('province'),
+            'level': school.get('level'),
+            'region': school.get('region'),
+            'computer_rank': school.get('computer_rank'),
+            'department_name': self.department_name,
+            'major_code': self.major_code,
+            'major_name': self.major_name,
+            'subject_codes': list(self.subject_codes),
+            'enrollment': dict(self.enrollment),
+            'score_lines': dict(self.score_totals),
+        }
+
+
+class _YearColumn:
+    """某一年份的数值列：按数值排好序的 (值, 行号)，用于范围条件与排序。"""
+
+    def __init__(self, values_by_row):
+        self.values = values_by_row # {行号: 值}
+        self._sorted = sorted((value, row) for row, value in values_by_row.items())
+        self._keys = [value for value, _ in self._sorted]
+
+    def at_least(self, minimum):
+        start = bisect.bisect_left(self._keys, minimum)
+        return bits_from_positions(row for _, row in self._sorted[start:])
+
+    def at_most(self, maximum):
+        end = bisect.bisect_right(self._keys, maximum)
+        return bits_from_positions(row for _, row in self._sorted[:end])
+
+
+class MajorIndex:
+    """单个数据版本的专业扁平表及其倒排位图。schools 为含院系专业明细的完整学校列表。"""
+
+    def __init__(self, schools):
+        entries = []
+        school_ranges = []
+        for position, school in enumerate(schools):
+            start = len(entries)
+            for department in school.get('departments') or ():
+                department_name = department.get('department_name') or ''
+                for major in department.get('majors') or ():
+                    entries.append(MajorEntry(position, school, department_name, major))
+            school_ranges.append((start, len(entries)))
+        self.entries = tuple(entries)
+        self._school_ranges = school_ranges
+        self.all_bits = (1 << len(self.entries)) - 1
+        # 第 i 所学校的专业行是 [start, end)，对应的位图为一段连续的 1
+        self._school_bits = [((1 << end) - 1) ^ ((1 << start) - 1) for start, end in school_ranges]
+
+        code_rows, subject_rows, enrollment, scores = {}, {}, {}, {}
+        for row, entry in enumerate(self.entries):
+            if entry.major_code:
+                code_rows.setdefault(entry.major_code, []).append(row)
+            for code in entry.subject_codes:
+                subject_rows.setdefault(code, []).append(row)
+            for year, count in entry.enrollment.items():
+                enrollment.setdefault(year, {})[row] = count
+            for year, total in entry.score_totals.items():
+                scores.setdefault(year, {})[row] = total
+        self._code_bits = {code: bits_from_positions(rows) for code, rows in code_rows.items()}
+        self._subject_bits = {code: bits_from_positions(rows) for code, rows in subject_rows.items()}
+        self._enrollment = {year: _YearColumn(values) for year, values in enrollment.items()}
+        self._scores = {year: _YearColumn(values) for year, values in scores.items()}
+        self.major_codes = sorted(self._code_bits)
+        self.subject_codes = sorted(self._subject_bits)
+        self.years = sorted(set(self._enrollment) | set(self._scores), reverse=True)
+        self._charts = None
+
+        self_set_bits = 0
+        for code, code_bits in self._subject_bits.items():
+            if is_self_set_code(code):
+                self_set_bits |= code_bits
+        # 同时考 408 与自命题科目的专业 (极少) 两边都计入
+        self.exam_type_counts = {
+            EXAM_TYPE_SELF: self_set_bits.bit_count(),
+            EXAM_TYPE_408: self._subject_bits.get(UNIFIED_CS_CODE, 0).bit_count(),
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def school_entries(self, school_position):
+        """第 school_position 所学校的全部专业行 (按院系、专业的原始顺序)。"""
+        start, end = self._school_ranges[school_position]
+        return self.entries[start:end]
+
+    @property
+    def charts(self):
+        """各学校详情页的图表配置 (SchoolChartPayloads)，首次使用时生成。"""
+        if self._charts is None:
+            # 并发时可能重复生成，结果相同，后赋值的覆盖先赋值的即可
+            self._charts = SchoolChartPayloads(self, len(self._school_ranges))
+        return self._charts
+
+    @property
+    def latest_year(self):
+        return self.years[0] if self.years else None
+
+    def school_bits(self, school_positions):
+        """把学校位置转换为这些学校全部专业行的位图。"""
+        bits = 0
+        for position in school_positions:
+            bits |= self._school_bits[position]
+        return bits
+
+    def code_bits(self, codes):
+        """专业代码以 codes 中任一值开头的行 (如 "0854" 匹配 085400、085404 等)；codes 为空时返回全部。"""
+        codes = [code for code in codes or () if code]
+        if not codes:
+            return self.all_bits
+        bits = 0
+        for major_code, code_bits in self._code_bits.items():
+            if major_code.startswith(tuple(codes)):
+                bits |= code_bits
+        return bits
+
+    def subject_bits(self, codes):
+        """初试科目包含 codes 中全部科目代码的行；codes 为空时返回全部。"""
+        bits = self.all_bits
+        for code in codes or ():
+            if code:
+                bits &= self._subject_bits.get(code, 0)
+        return bits
+
+    def select(self, school_positions=None, codes=None, subjects=None, major_query=None, year=None,
+               min_enrollment=None, min_score=None, max_score=None):
+        """返回满足全部条件的专业行位图。
+
+        school_positions 为学校层面筛选命中的学校位置 (None 表示不限)；codes 为专业代码前缀 (多选为"或")；
+        subjects 为必须包含的初试科目代码；major_query 为专业名称子串；
+        min_enrollment / min_score / max_score 针对 year 年的招生人数与复试线总分，没有该年数据的行不命中。
+        """
+        bits = self.all_bits if school_positions is None else self.school_bits(school_positions)
+        if codes:
+            bits &= self.code_bits(codes)
+        if subjects:
+            bits &= self.subject_bits(subjects)
+        year = year or self.latest_year
+        if min_enrollment is not None:
+            column = self._enrollment.get(year)
+            bits &= column.at_least(min_enrollment) if column else 0
+        if min_score is not None:
+            column = self._scores.get(year)
+            bits &= column.at_least(min_score) if column else 0
+        if max_score is not None:
+            column = self._scores.get(year)
+            bits &= column.at_most(max_score) if column else 0
+        if major_query and bits:
+            query = major_query.lower()
+            bits = bits_from_positions(row for row in positions_from_bits(bits)
+                                       if query in self.entries[row].major_name.lower())
+        return bits
+
+    def page(self, bits, sort_by=MAJOR_SORT_DEFAULT, year=None, offset=0, limit=20):
+        """返回按 sort_by 排序后命中 bits 的第 offset 个起的 limit 个专业行。没有该年数值的行排在最后。"""
+        if limit <= 0 or offset < 0:
+            return []
+        rows = positions_from_bits(bits)
+        if sort_by == MAJOR_SORT_DEFAULT:
+            return [self.entries[row] for row in rows[offset:offset + limit]]
+        year = year or self.latest_year
+        if sort_by == MAJOR_SORT_ENROLLMENT:
+            values, sign = self._enrollment.get(year), -1
+        else:
+            values, sign = self._scores.get(year), (-1 if sort_by == MAJOR_SORT_SCORE_DESC else 1)
+        values = values.values if values else {}
+
+        def sort_key(row):
+            value = values.get(row)
+            return (value is None, sign * value if value is not None else 0, row)
+
+        return [self.entries[row] for row in heapq.nsmallest(offset + limit, rows, key=sort_key)[offset:]]
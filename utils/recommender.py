@@ -0,0 +1,139 @@
+"""
+院校推荐的向量化打分。
+
+推荐分数 = 0.4 × 分数相似度 + 0.2 × 院校等级相似度 + 0.2 × 计算机等级相似度 + 0.2 × 地区相似度，
+相似度为 max(0, 100 - |目标 - 学校|) (地区为完全一致 100、否则 0)，学校或目标缺少该项时为 0。
+
+原先每次推荐都逐校遍历全部院系专业、查映射表、调用相似度函数。RecommendationScorer 在每个数据版本
+首次使用时 (见 SchoolRepository.recommender()) 把每所学校的特征放进 NumPy 数组：
+* 代表分数线：各专业参考分数线 (utils/score_lines.reference_score_value) 的平均值，没有时为 NaN；
+* 院校等级分数、计算机等级分数：不在映射表中的取值为 NaN；
+* 省份、地区：取值编码为整数。
+一次推荐只做几次整列运算，再用 np.partition 取第 k 高的分数作为门槛，只对门槛以上的少数学校排序。
+结果与逐校计算完全一致：按保留两位小数后的分数降序，分数相同时保持学校的原始顺序
+(tests/test_recommender.py 在 data/schools.json 上逐项对比)。
+"""
+import numpy as np
+
+from utils.score_lines import reference_score_value
+
+# 院校等级分数映射
+LEVEL_SCORES = {"985": 60, "211": 40, "双一流": 20, "普通院校": 0, None: 0, "": 0}
+# 计算机等级分数映射
+RANK_SCORES = {"A+": 100, "A": 80, "A-": 70, "B+": 60, "B": 50, "B-": 40, "C+": 30, "C": 20, "C-": 10, "无": 0,
+               None: 0, "": 0}
+# 权重
+WEIGHTS = {"score_similarity": 0.4, "level": 0.2, "rank": 0.2, "location": 0.2}
+DEFAULT_LIMIT = 20
+
+_LOCATION_MATCH = 100.0
+
+
+def _lookup(mapping, value):
+    """映射表中的分数，不存在 (或取值不可哈希) 时返回 None。"""
+    try:
+        return mapping.get(value)
+    except TypeError:
+        return None
+
+
+def representative_score_line(school):
+    """学校各专业参考分数线的平均值，没有任何分数线时返回 None。"""
+    scores = [score for department in school.get('departments') or ()
+              for major in department.get('majors') or ()
+              for score in (reference_score_value(major),) if score is not None]
+    return sum(scores) / len(scores) if scores else None
+
+
+def _similarity(target, values):
+    """max(0, 100 - |target - values|)；values 中的 NaN (学校缺少该项) 得到 0。"""
+    # np.fmax 在一侧为 NaN 时返回另一侧，即 0
+    return np.fmax(0.0, 100.0 - np.abs(target - values))
+
+
+class RecommendationScorer:
+    """单个数据版本的推荐特征数组。schools 为含院系专业明细的完整学校列表。"""
+
+    def __init__(self, schools):
+        self.schools = tuple(schools)
+        nan = float('nan')
+        score_lines, levels, ranks, provinces, regions = [], [], [], [], []
+        self._province_codes, self._region_codes = {}, {}
+        for school in self.schools:
+            score_line = representative_score_line(school)
+            score_lines.append(nan if score_line is None else score_line)
+            level = _lookup(LEVEL_SCORES, school.get('level'))
+            levels.append(nan if level is None else level)
+            rank = _lookup(RANK_SCORES, school.get('computer_rank'))
+            ranks.append(nan if rank is None else rank)
+            provinces.append(self._encode(self._province_codes, school.get('province')))
+            regions.append(self._encode(self._region_codes, school.get('region')))
+        self.score_lines = np.array(score_lines, dtype=np.float64)
+        self.level_scores = np.array(levels, dtype=np.float64)
+        self.rank_scores = np.array(ranks, dtype=np.float64)
+        self.provinces = np.array(provinces, dtype=np.int32)
+        self.regions = np.array(regions, dtype=np.int32)
+
+    @staticmethod
+    def _encode(codes, value):
+        if value is None:
+            return -1
+        try:
+            return codes.setdefault(value, len(codes))
+        except TypeError:
+            return -1
+
+    def scores(self, target_score, target_level, target_rank, target_location):
+        """所有学校的推荐分数 (未取整)，顺序与 schools 一致。"""
+        total = np.zeros(len(self.schools), dtype=np.float64)
+        # 各项依次累加，与逐校计算的浮点运算顺序一致
+        if target_score is not None:
+            total += WEIGHTS["score_similarity"] * _similarity(target_score, self.score_lines)
+        target_level_score = _lookup(LEVEL_SCORES, target_level)
+        if target_level_score is not None:
+            total += WEIGHTS["level"] * _similarity(target_level_score, self.level_scores)
+        target_rank_score = _lookup(RANK_SCORES, target_rank)
+        if target_rank_score is not None:
+            total += WEIGHTS["rank"] * _similarity(target_rank_score, self.rank_scores)
+        if target_location:
+            matched = ((self.provinces == self._province_codes.get(target_location, -2))
+                       | (self.regions == self._region_codes.get(target_location, -2)))
+            total += WEIGHTS["location"] * np.where(matched, _LOCATION_MATCH, 0.0)
+        return total
+
+    def top_positions(self, total, limit=DEFAULT_LIMIT):
+        """推荐分数最高的 limit 所学校的位置：按两位小数的分数降序，分数相同时按位置升序。"""
+        count = len(total)
+        k = min(limit, count)
+        if k <= 0:
+            return []
+        kth = float(np.partition(total, count - k)[count - k]) # 第 k 高的分数
+        threshold = round(kth, 2)
+        # 取整是单调的：前 k 名取整后都不低于 threshold；取整后不低于 threshold 的学校，
+        # 原始分数一定不低于 threshold - 0.005，多留一点余量避免浮点误差
+        candidates = np.flatnonzero(total >= threshold - 0.006)
+        # 分数相同的学校可能很多 (如只按地区推荐)，只对不同的分数值做 Python 的 round
+        uniques, inverse = np.unique(total[candidates], return_inverse=True)
+        rounded = np.array([round(float(value), 2) for value in uniques])[inverse]
+        keep = rounded >= threshold
+        candidates, rounded = candidates[keep], rounded[keep]
+        order = np.lexsort((candidates, -rounded))[:k] # 先按分数降序，再按位置升序
+        return candidates[order].tolist()
+
+    def recommend(self, target_score, target_level, target_rank, target_location, limit=DEFAULT_LIMIT):
+        """返回推荐结果列表 (每项为学校基本信息 + recommend_score)。"""
+        total = self.scores(target_score, target_level, target_rank, target_location)
+        recommendations = []
+        for position in self.top_positions(total, limit):
+            school = self.schools[position]
+            recommendations.append({
+                "id": school.get('id', school.get('name')),
+                "name": school.get("name"),
+                "level": school.get("level"),
+                "province": school.get("province"),
+                "region": school.get("region"),
+                "computer_rank": school.get("computer_rank"),
+                "enrollment_24_school_total": school.get("enrollment_24_school_total", "未知"),
+                "recommend_score": round(float(total[position]), 2),
+            })
+        return recommendations
@@ -0,0 +1,71 @@
+"""
+基于位图的院校多选筛选。
+
+每个数据版本构建一次 (见 SchoolIndex.bitmaps)：对每个筛选字段的每个取值保存一个位图，
+第 i 位表示 load_summaries() 中第 i 所学校是否具有该取值。位图用 Python 整数表示。
+任意组合的多选条件都归结为位运算：同一字段的多个取值按位或，不同字段之间按位与，
+名称检索命中的学校也先转换为位图再参与按位与。条件叠加时每个条件只增加一次整数位运算。
+"""
+from utils.school_facets import FACET_FIELDS, field_values, normalize_selection
+
+
+def bits_from_positions(positions):
+    """把学校位置集合转换为位图。"""
+    bits = 0
+    for position in positions:
+        bits |= 1 << position
+    return bits
+
+
+def positions_from_bits(bits):
+    """按升序返回位图中置位的学校位置。"""
+    # bin() 与字符串遍历在 C 层完成，比逐位移位快得多
+    reversed_digits = bin(bits)[:1:-1]
+    return [position for position, digit in enumerate(reversed_digits) if digit == '1']
+
+
+class FilterBitmaps:
+    """一组学校摘要上的筛选位图。"""
+
+    FIELDS = FACET_FIELDS
+
+    def __init__(self, schools):
+        self.size = len(schools)
+        self.all_bits = (1 << self.size) - 1
+        positions_by_value = {field: {} for field in self.FIELDS}
+        for position, school in enumerate(schools):
+            for field in self.FIELDS:
+                for value in field_values(school, field):
+                    positions_by_value[field].setdefault(value, []).append(position)
+        self._bitmaps = {
+            field: {value: bits_from_positions(positions) for value, positions in values.items()}
+            for field, values in positions_by_value.items()
+        }
+
+    def bitmap(self, field, selection):
+        """返回字段取值为 selection 中任一值的学校位图；selection 为空时返回全部学校。"""
+        selection = normalize_selection(selection)
+        if not selection:
+            return self.all_bits
+        bitmaps = self._bitmaps[field]
+        bits = 0
+        for value in selection:
+            bits |= bitmaps.get(value, 0)
+        return bits
+
+    def select(self, filters=None, positions=None):
+        """返回满足全部筛选条件的学校位图。
+
+        filters 为 {字段: 取值或取值列表}；positions 为名称检索命中的学校位置 (None 表示无名称条件)。
+        """
+        bits = self.all_bits if positions is None else bits_from_positions(positions)
+        for field, selection in (filters or {}).items():
+            if normalize_selection(selection):
+                bits &= self.bitmap(field, selection)
+                if not bits:
+                    break
+        return bits
+
+    @staticmethod
+    def count(bits):
+        return bits.bit_count()
@@ -0,0 +1,92 @@
+"""
+学校详情页的 ECharts 配置 (复试分数线趋势、招生人数历史)。
+
+配置只依赖院校数据，每个数据版本生成一次：SchoolChartPayloads 用 MajorIndex 中已经解析好的
+各专业复试线总分与招生人数逐校构建配置，并预先序列化为可直接嵌入
+<script> 的 JSON (与 Jinja 的 tojson 过滤器相同的 HTML 转义)，详情页请求只按学校位置取出字符串。
+"""
+from jinja2.utils import htmlsafe_json_dumps
+
+from utils import json_codec
+
+# 与首页图表 (static/js/main.js) 一致的深色主题配色
+_TEXT_STYLE = {'color': '#ccc'}
+
+
+def _series_names(entries):
+    """每个专业的图例名称；同一学校内专业名称重复时附加院系名称。"""
+    # 原始数据的专业名称中可能带有换行备注 (如 "...\n24新增")，合并为单个空格
+    names = [' '.join((entry.major_name or entry.major_code or '未命名专业').split()) for entry in entries]
+    duplicated = {name for name in names if names.count(name) > 1}
+    result = []
+    for name, entry in zip(names, entries):
+        if name in duplicated and entry.department_name:
+            name = f"{name} ({' '.join(entry.department_name.split())})"
+        result.append(name)
+    return result
+
+
+def _base_options(title, years, series, y_name):
+    return {
+        'title': {'text': title, 'left': 'center', 'top': 10, 'textStyle': _TEXT_STYLE},
+        'tooltip': {'trigger': 'axis'},
+        'legend': {'type': 'scroll', 'bottom': 10, 'textStyle': _TEXT_STYLE,
+                   'data': [item['name'] for item in series]},
+        'grid': {'left': '3%', 'right': '4%', 'top': '50px', 'bottom': '60px', 'containLabel': True},
+        'xAxis': {'type': 'category', 'data': years, 'axisLabel': _TEXT_STYLE,
+                  'boundaryGap': any(item['type'] == 'bar' for item in series)},
+        'yAxis': {'type': 'value', 'name': y_name, 'scale': True, 'axisLabel': _TEXT_STYLE},
+        'series': series,
+    }
+
+
+def score_trend_options(entries):
+    """各专业复试线总分的折线图配置；没有任何分数线时返回 None。"""
+    entries = [entry for entry in entries if entry.score_totals]
+    if not entries:
+        return None
+    years = sorted({year for entry in entries for year in entry.score_totals})
+    series = [
+        {'name': name, 'type': 'line', 'connectNulls': True,
+         'data': [entry.score_totals.get(year) for year in years]}
+        for name, entry in zip(_series_names(entries), entries)
+    ]
+    return _base_options('复试分数线趋势 (总分)', years, series, '分数')
+
+
+def enrollment_history_options(entries):
+    """各专业招生人数的柱状图配置；只包含有非零人数的年份与专业，都没有时返回 None。"""
+    entries = [entry for entry in entries if any(entry.enrollment.values())]
+    if not entries:
+        return None
+    years = sorted({year for entry in entries for year, count in entry.enrollment.items() if count})
+    series = [
+        {'name': name, 'type': 'bar', 'data': [entry.enrollment.get(year) for year in years]}
+        for name, entry in zip(_series_names(entries), entries)
+    ]
+    return _base_options('招生人数', years, series, '人数')
+
+
+def embed_json(options):
+    """把配置序列化为可直接写进 <script> 的 JSON (Markup)，None 输出为 null。"""
+    return htmlsafe_json_dumps(options, dumps=json_codec.dumps)
+
+
+class SchoolChartPayloads:
+    """单个数据版本的全部学校详情页图表配置，按学校位置保存预先序列化的 JSON。"""
+
+    def __init__(self, major_index, school_count):
+        self._payloads = []
+        for position in range(school_count):
+            entries = major_index.school_entries(position)
+            self._payloads.append({
+                'score': embed_json(score_trend_options(entries)),
+                'enrollment': embed_json(enrollment_history_options(entries)),
+            })
+        self._empty = {'score': embed_json(None), 'enrollment': embed_json(None)}
+
+    def get(self, position):
+        """返回 {'score': JSON, 'enrollment': JSON}；位置无效时两者均为 null。"""
+        if position is None or not 0 <= position < len(self._payloads):
+            return self._empty
+        return self._payloads[position]
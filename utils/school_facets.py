@@ -0,0 +1,91 @@
+"""
+院校列表页筛选项 (facet) 的取值与计数。
+
+每个数据版本构建一次 (见 SchoolIndex.facets)：
+* values: 省份、等级、计算机评级、A/B 区、考试类型的可选值，已按页面显示顺序排好；
+* 分组计数表: 以 (省份, 等级, 评级, 地区, 考试类型) 组合为键的学校数量，
+  组合数远小于学校数，统计各筛选项的计数时只遍历这张表。
+
+计数采用"其他条件生效"的口径：统计省份各取值的数量时应用等级/评级/地区/名称条件，
+但不应用省份本身的条件，这样下拉框中的 "四川 (12)" 表示切换到四川后能看到的学校数。
+"""
+from collections import Counter
+
+from utils.exam_subjects import exam_types, extract_subject_codes
+
+# 参与筛选/分面的字段，顺序即分组计数表键中的顺序。
+# exam_type 不是原始字段，由初试科目汇总推导，一所学校可以同时属于多个取值。
+FACET_FIELDS = ('province', 'level', 'computer_rank', 'region', 'exam_type')
+
+
+def level_sort_key(level):
+    """院校等级的显示顺序：985、211、双一流在前，其余按名称。"""
+    return (level != '985', level != '211', level != '双一流', level)
+
+
+def school_exam_types(school):
+    """根据初试科目汇总判断学校的专业课考试类型，返回取值元组 (可能同时包含统考与自命题)。"""
+    return exam_types(extract_subject_codes(school.get('exam_subjects_summary')))
+
+
+def field_values(school, field):
+    """学校在某个筛选字段上的取值元组；空值返回空元组 (不匹配任何筛选条件)。"""
+    if field == 'exam_type':
+        return school_exam_types(school)
+    value = school.get(field)
+    return (value,) if value else ()
+
+
+def normalize_selection(selection):
+    """把筛选条件 (单个取值、取值列表或空值) 统一为去掉空值的 frozenset，空集表示不筛选。"""
+    if not selection:
+        return frozenset()
+    if isinstance(selection, str):
+        return frozenset((selection,))
+    return frozenset(value for value in selection if value)
+
+
+def facet_key(school):
+    """学校在分组计数表中的键：每个字段一个取值元组。"""
+    return tuple(field_values(school, field) for field in FACET_FIELDS)
+
+
+class SchoolFacets:
+    """一组学校摘要上的筛选项取值与分组计数表。"""
+
+    def __init__(self, schools):
+        self.schools = schools
+        self._group_counts = Counter(facet_key(school) for school in schools)
+        self.values = {}
+        for i, field in enumerate(FACET_FIELDS):
+            present = {value for key in self._group_counts for value in key[i]}
+            self.values[field] = sorted(present, key=level_sort_key if field == 'level' else None)
+
+    def counts(self, filters=None, positions=None):
+        """返回 {字段: {取值: 学校数}}，每个字段的计数应用除该字段以外的全部筛选条件。
+
+        filters 为 {字段: 取值或取值列表}，同一字段的多个取值之间为"或"，空值表示不筛选；
+        positions 为名称检索命中的学校位置，为 None 时表示没有名称条件，直接使用预先统计的分组计数表。
+        """
+        filters = filters or {}
+        active = [(i, normalize_selection(filters.get(field))) for i, field in enumerate(FACET_FIELDS)]
+        active = [(i, selection) for i, selection in active if selection]
+        if positions is None:
+            groups = self._group_counts.items()
+        else:
+            groups = Counter(facet_key(self.schools[p]) for p in positions).items()
+
+        result = {field: Counter() for field in FACET_FIELDS}
+        for key, count in groups:
+            mismatched = [i for i, selection in active if selection.isdisjoint(key[i])]
+            if not mismatched:
+                # 满足全部条件：计入每个字段
+                for i, field in enumerate(FACET_FIELDS):
+                    for value in key[i]:
+                        result[field][value] += count
+            elif len(mismatched) == 1:
+                # 只有一个条件不满足：只计入该字段 (去掉这个条件后它会出现)
+                i = mismatched[0]
+                for value in key[i]:
+                    result[FACET_FIELDS[i]][value] += count
+        return {field: dict(counter) for field, counter in result.items()}
@@ -0,0 +1,129 @@
+"""
+学校身份索引：把 id、名称与别名映射到学校位置 (load_summaries() 中的下标)。
+
+详情页、收藏、后台编辑与爬虫合并都需要"按 id 或名称找到学校"，原先每次都线性扫描学校列表。
+SchoolIdentityIndex 每个数据版本构建一次 (见 SchoolIndex.identity)，查找为常数时间。
+
+resolve() 的匹配顺序：
+1. id 完全相同；
+2. 名称完全相同 (同名时取第一个，与原先的线性查找一致)；
+3. 规范化后 (全角转半角、去空白、小写) 的 id、名称或别名。别名包括：
+   * 去掉括号中校区说明的名称，如 "中国地质大学（武汉）" -> "中国地质大学"、"中国地质大学武汉"；
+   * COMMON_ALIASES 中的常用简称，如 "川大" -> 四川大学、"成电" -> 电子科技大学；
+   * 学校数据中可选的 aliases 字段 (字符串列表)。
+   同一个别名对应多所学校时视为有歧义，不参与匹配；别名不会覆盖其他学校的 id 或名称。
+"""
+import re
+import unicodedata
+
+# 常用简称 -> 学校全称；只有数据中存在该学校时才生效
+COMMON_ALIASES = {
+    '四川大学': ('川大',),
+    '电子科技大学': ('成电', '电子科大', 'UESTC'),
+    '西南交通大学': ('西南交大',),
+    '西南财经大学': ('西财',),
+    '重庆大学': ('重大',),
+    '重庆邮电大学': ('重邮',),
+    '清华大学': ('清华',),
+    '北京大学': ('北大',),
+    '北京航空航天大学': ('北航',),
+    '北京邮电大学': ('北邮',),
+    '北京理工大学': ('北理工',),
+    '哈尔滨工业大学': ('哈工大',),
+    '华中科技大学': ('华科', '华中大'),
+    '浙江大学': ('浙大',),
+    '上海交通大学': ('上交', '上海交大'),
+    '西安交通大学': ('西交', '西安交大'),
+    '西安电子科技大学': ('西电',),
+    '南京航空航天大学': ('南航',),
+    '中国科学技术大学': ('中科大',),
+    '武汉大学': ('武大',),
+    '中山大学': ('中大',),
+    '南京大学': ('南大',),
+}
+
+# 匹配优先级：数字越小越优先
+_PRIORITY_ID = 0
+_PRIORITY_NAME = 1
+_PRIORITY_ALIAS = 2
+
+_PARENTHESIZED = re.compile(r'\([^()]*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_identity(value):
+    """把 id、名称或别名转换为匹配用的形式：全角转半角 (含括号)、去掉空白、小写。"""
+    if value is None:
+        return ''
+    text = unicodedata.normalize('NFKC', str(value))
+    return _WHITESPACE.sub('', text).lower()
+
+
+def campus_aliases(name):
+    """去掉括号中校区说明后的名称别名 (已规范化)，名称中没有括号时返回空元组。"""
+    normalized = normalize_identity(name)
+    if '(' not in normalized:
+        return ()
+    base = _PARENTHESIZED.sub('', normalized)
+    joined = normalized.replace('(', '').replace(')', '')
+    return tuple(alias for alias in dict.fromkeys((base, joined)) if alias and alias != normalized)
+
+
+def school_aliases(school):
+    """学校的全部别名 (已规范化、去重)，不含 id 与名称本身。"""
+    name = school.get('name')
+    aliases = list(campus_aliases(name))
+    aliases.extend(normalize_identity(alias) for alias in COMMON_ALIASES.get(name, ()))
+    extra = school.get('aliases')
+    if isinstance(extra, (list, tuple)):
+        aliases.extend(normalize_identity(alias) for alias in extra)
+    return tuple(alias for alias in dict.fromkeys(aliases) if alias)
+
+
+class SchoolIdentityIndex:
+    """一组学校摘要上的 id / 名称 / 别名 -> 位置 映射。"""
+
+    def __init__(self, schools):
+        self._by_id = {}
+        self._by_name = {}
+        candidates = {} # 规范化键 -> (优先级, 位置集合)
+        for position, school in enumerate(schools):
+            school_id, name = school.get('id'), school.get('name')
+            if school_id is not None:
+                self._by_id.setdefault(school_id, position)
+            if name is not None:
+                self._by_name.setdefault(name, position)
+            keys = [(normalize_identity(school_id), _PRIORITY_ID), (normalize_identity(name), _PRIORITY_NAME)]
+            keys.extend((alias, _PRIORITY_ALIAS) for alias in school_aliases(school))
+            for key, priority in keys:
+                if not key:
+                    continue
+                current = candidates.get(key)
+                if current is None or priority < current[0]:
+                    candidates[key] = (priority, {position})
+                elif priority == current[0]:
+                    current[1].add(position)
+        self._by_key = {}
+        for key, (priority, positions) in candidates.items():
+            if len(positions) == 1:
+                self._by_key[key] = next(iter(positions))
+            elif priority != _PRIORITY_ALIAS:
+                # 规范化后重名的 id / 名称：取最靠前的学校，与线性查找一致
+                self._by_key[key] = min(positions)
+
+    def position_of_id(self, school_id):
+        """id 完全相同的学校位置，不存在时返回 None。"""
+        return self._by_id.get(school_id)
+
+    def position_of_name(self, name):
+        """名称完全相同的第一所学校的位置，不存在时返回 None。"""
+        return self._by_name.get(name)
+
+    def resolve(self, key):
+        """按 id、名称、规范化后的 id / 名称 / 别名依次匹配，返回学校位置或 None。"""
+        position = self._by_id.get(key)
+        if position is None:
+            position = self._by_name.get(key)
+        if position is None:
+            position = self._by_key.get(normalize_identity(key))
+        return position
@@ -0,0 +1,122 @@
+"""
+按数据版本构建的院校内存索引。
+
+SchoolRepository.index() 在每个数据版本首次访问时用学校摘要构建一个 SchoolIndex，
+之后同一版本的所有请求共享该索引，数据变化 (版本号变化) 后重新构建。
+索引中的位置 (position) 即学校在 load_summaries() 列表中的下标。
+
+文本检索使用字符 n-gram 倒排索引 (1~3 字)：
+* 查询长度不超过 3 时，对应 n-gram 的倒排表就是精确结果；
+* 更长的查询对其所有 3-gram 的倒排表求交集得到候选，再逐个确认子串，
+  候选数量只与匹配的学校数有关，学校总数增加时检索耗时基本不变。
+匹配规则与原先的线性扫描一致：不区分大小写的子串匹配。
+
+同一版本的其他派生结构也挂在 SchoolIndex 上：筛选项取值与计数 (school_facets.py)、
+多选筛选位图 (school_bitsets.py)、预排序顺序 (school_orderings.py)、名称联想前缀树 (school_suggest.py)、
+id / 名称 / 别名查找 (school_identity.py)。
+"""
+import hashlib
+from itertools import islice
+
+from utils.school_bitsets import FilterBitmaps
+from utils.school_facets import SchoolFacets
+from utils.school_identity import SchoolIdentityIndex
+from utils.school_orderings import SchoolOrderings
+from utils.school_suggest import SchoolSuggester
+
+NGRAM_MAX = 3
+# 后台院校管理的搜索框同时匹配名称、id、省份与计算机评级
+ADMIN_SEARCH_FIELDS = ('name', 'id', 'province', 'computer_rank')
+
+
+def normalize_text(value):
+    """把字段值转换为用于检索的小写字符串，空值返回空字符串。"""
+    if value is None:
+        return ''
+    return str(value).lower()
+
+
+def _ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    """一组文本 (按位置编号) 上的字符 n-gram 倒排索引，支持子串查询。"""
+
+    def __init__(self, texts, max_n=NGRAM_MAX):
+        self.max_n = max_n
+        self._texts = tuple(texts)
+        postings = {}
+        for position, text in enumerate(self._texts):
+            for n in range(1, max_n + 1):
+                for gram in _ngrams(text, n):
+                    postings.setdefault(gram, set()).add(position)
+        self._postings = {gram: frozenset(positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self._texts)
+
+    def search(self, query):
+        """返回包含 query (已小写) 的文本位置集合。空查询匹配全部。"""
+        if not query:
+            return set(range(len(self._texts)))
+        if len(query) <= self.max_n:
+            return set(self._postings.get(query, ()))
+        posting_lists = []
+        for gram in _ngrams(query, self.max_n):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            posting_lists.append(posting)
+        posting_lists.sort(key=len)
+        candidates = set(posting_lists[0])
+        for posting in islice(posting_lists, 1, None):
+            candidates &= posting
+            if not candidates:
+                return candidates
+        return {position for position in candidates if query in self._texts[position]}
+
+
+class SchoolIndex:
+    """单个数据版本的院校索引集合。schools 为只读的学校摘要元组。"""
+
+    TEXT_FIELDS = ADMIN_SEARCH_FIELDS
+
+    def __init__(self, summaries, version=None):
+        self.schools = tuple(summaries)
+        # 数据版本的短标识，可放进游标、缓存键等需要字符串的地方
+        self.version_tag = hashlib.sha1(repr(version).encode('utf-8')).hexdigest()[:16]
+        self._text_indexes = {
+            field: NgramIndex(normalize_text(school.get(field)) for school in self.schools)
+            for field in self.TEXT_FIELDS
+        }
+        self.facets = SchoolFacets(self.schools)
+        self.bitmaps = FilterBitmaps(self.schools)
+        self.orderings = SchoolOrderings(self.schools)
+        self.identity = SchoolIdentityIndex(self.schools)
+        self._suggester = None
+
+    def __len__(self):
+        return len(self.schools)
+
+    def search(self, query, fields=('name',)):
+        """在指定字段中做不区分大小写的子串检索，返回按原始顺序排列的位置列表。"""
+        query = normalize_text(query)
+        if not query:
+            return list(range(len(self.schools)))
+        matched = set()
+        for field in fields:
+            matched |= self._text_indexes[field].search(query)
+        return sorted(matched)
+
+    @property
+    def suggester(self):
+        """名称自动补全的前缀树，首次使用时构建 (生成拼音相对较慢)。"""
+        if self._suggester is None:
+            # 并发时可能重复构建，结果相同，后赋值的覆盖先赋值的即可
+            self._suggester = SchoolSuggester(self.schools)
+        return self._suggester
+
+    def records(self, positions):
+        """按位置列表取出学校摘要。"""
+        return [self.schools[position] for position in positions]
@@ -0,0 +1,170 @@
+"""
+院校列表的预排序顺序与分页。
+
+每个数据版本构建一次 (见 SchoolIndex.orderings)，列表页不再对筛选结果整体排序：
+* default: 按 (地区, 省份, 名称) 排好的位置排列，数据不变就不会变化；
+* favorites: 按收藏数降序 (同数保持原始顺序) 的有序列表，收藏数变化时
+  通过 FavoritesLedger.changes_since() 只移动变化的学校 (bisect 删除 + 插入)。
+
+取一页时：筛选条件较宽 (命中学校多) 就沿预排序顺序走，用筛选位图判断是否命中，
+凑够一页即停止；条件很窄时直接对命中的少量学校用 heapq.nsmallest 取前若干个。
+两种方式的结果与"先筛选再稳定排序再切片"完全一致。
+
+page_after() 提供键集 (keyset) 分页：以上一页最后一所学校的排序键为起点，
+收藏数在翻页期间变化时也不会重复或跳过未变化的学校 (供 /api/schools/search 的游标使用)。
+"""
+import bisect
+import heapq
+import threading
+from itertools import islice
+
+from utils.school_bitsets import positions_from_bits
+
+SORT_FAVORITES = 'favorites'
+SORT_DEFAULT = 'default'
+
+
+def favorites_key(school):
+    """收藏数统计中学校的键 (与 favorites_count.json 一致：优先 id，没有 id 时用名称)。"""
+    return str(school.get('id', school.get('name')))
+
+
+def default_sort_key(school):
+    return (school.get('region') or '', school.get('province') or '', school.get('name') or '')
+
+
+def _walk_page(order, bits, offset, limit):
+    """沿排列 order 逐个检查位图，返回命中的第 offset 个起的 limit 个位置。"""
+    hits = (position for position in order if (bits >> position) & 1)
+    return list(islice(hits, offset, offset + limit))
+
+
+def _should_walk(size, matched, offset, limit):
+    # 沿顺序走预计要检查 (offset + limit) * size / matched 个位置；超过命中数时改为只处理命中的学校
+    return (offset + limit) * size <= matched * matched
+
+
+class StaticOrdering:
+    """数据版本内不变的排序 (如默认排序)。"""
+
+    def __init__(self, schools, key):
+        self.size = len(schools)
+        self.order = sorted(range(self.size), key=lambda position: key(schools[position]))
+        self._rank = [0] * self.size
+        for rank, position in enumerate(self.order):
+            self._rank[position] = rank
+
+    def page(self, bits, offset, limit):
+        matched = bits.bit_count()
+        if offset >= matched or limit <= 0:
+            return []
+        if _should_walk(self.size, matched, offset, limit):
+            return _walk_page(self.order, bits, offset, limit)
+        return heapq.nsmallest(offset + limit, positions_from_bits(bits), key=self._rank.__getitem__)[offset:]
+
+    def key(self, position):
+        """学校在该排序中的键 (名次)。"""
+        return self._rank[position]
+
+    def page_after(self, bits, after_key, limit):
+        """返回排序键大于 after_key (None 表示从头开始) 且命中 bits 的前 limit 个位置。"""
+        start = 0 if after_key is None else after_key + 1
+        if limit <= 0 or start >= self.size:
+            return []
+        if _should_walk(self.size, bits.bit_count(), 0, limit):
+            return _walk_page(islice(self.order, start, None), bits, 0, limit)
+        candidates = (p for p in positions_from_bits(bits) if self._rank[p] >= start)
+        return heapq.nsmallest(limit, candidates, key=self._rank.__getitem__)
+
+
+class FavoritesOrdering:
+    """按收藏数降序的顺序，随收藏数变化增量维护。"""
+
+    def __init__(self, schools):
+        self.size = len(schools)
+        self._positions_by_key = {}
+        for position, school in enumerate(schools):
+            self._positions_by_key.setdefault(favorites_key(school), []).append(position)
+        self._counts = [0] * self.size
+        self._sorted = [(0, position) for position in range(self.size)] # (-收藏数, 位置)
+        self._lock = threading.Lock()
+        self.epoch = None # 已同步到的 FavoritesLedger epoch
+
+    def sync(self, ledger):
+        """与收藏数日志同步：首次或落后太多时整体重建，否则只移动变化的学校。"""
+        with self._lock:
+            changes = None
+            if self.epoch is not None:
+                epoch, changes = ledger.changes_since(self.epoch)
+            if changes is None:
+                epoch, counts = ledger.snapshot()
+                self._rebuild(counts)
+            else:
+                for school_key, count in changes.items():
+                    for position in self._positions_by_key.get(school_key, ()):
+                        self._move(position, count)
+            self.epoch = epoch
+
+    def _rebuild(self, counts):
+        for school_key, positions in self._positions_by_key.items():
+            for position in positions:
+                self._counts[position] = counts.get(school_key, 0)
+        self._sorted = sorted((-count, position) for position, count in enumerate(self._counts))
+
+    def _move(self, position, count):
+        old_entry = (-self._counts[position], position)
+        if old_entry[0] == -count:
+            return
+        del self._sorted[bisect.bisect_left(self._sorted, old_entry)]
+        bisect.insort(self._sorted, (-count, position))
+        self._counts[position] = count
+
+    def count(self, position):
+        """返回同步时记录的该学校收藏数。"""
+        return self._counts[position]
+
+    def key(self, position):
+        """学校在该排序中的键 (-收藏数, 位置)。"""
+        return (-self._counts[position], position)
+
+    def page_after(self, bits, after_key, limit):
+        """返回排序键大于 after_key (None 表示从头开始) 且命中 bits 的前 limit 个位置。"""
+        if limit <= 0:
+            return []
+        after_key = None if after_key is None else tuple(after_key)
+        with self._lock:
+            if _should_walk(self.size, bits.bit_count(), 0, limit):
+                start = 0 if after_key is None else bisect.bisect_right(self._sorted, after_key)
+                return _walk_page((position for _, position in islice(self._sorted, start, None)), bits, 0, limit)
+            counts = self._counts
+            candidates = positions_from_bits(bits)
+            if after_key is not None:
+                candidates = (p for p in candidates if (-counts[p], p) > after_key)
+            return heapq.nsmallest(limit, candidates, key=lambda position: (-counts[position], position))
+
+    def page(self, bits, offset, limit):
+        matched = bits.bit_count()
+        if offset >= matched or limit <= 0:
+            return []
+        with self._lock:
+            if _should_walk(self.size, matched, offset, limit):
+                return _walk_page((position for _, position in self._sorted), bits, offset, limit)
+            counts = self._counts
+            return heapq.nsmallest(offset + limit, positions_from_bits(bits),
+                                   key=lambda position: (-counts[position], position))[offset:]
+
+
+class SchoolOrderings:
+    """列表页支持的全部排序方式。"""
+
+    def __init__(self, schools):
+        self.default = StaticOrdering(schools, default_sort_key)
+        self.favorites = FavoritesOrdering(schools)
+
+    def get(self, sort_by):
+        """返回 sort_by 对应的排序；未知的排序方式按收藏数。"""
+        return self.default if sort_by == SORT_DEFAULT else self.favorites
+
+    def page(self, sort_by, bits, offset, limit):
+        """返回按 sort_by 排序后命中 bits 的第 offset 个起的 limit 个学校位置。"""
+        return self.get(sort_by).page(bits, offset, limit)
@@ -0,0 +1,193 @@
+"""
+学校数据仓库 (repository) 接口与默认的 JSON 文件实现。
+
+app.py 中的路由只通过 SchoolRepository 访问院校数据，具体存储可以是
+data/schools.json (JsonSchoolRepository) 或 SQLite (utils/sqlite_repository.py)。
+
+约定：
+* load_schools / load_summaries / get_school 返回不可变的
+  SchoolRecord (utils/catalog.py)，可在多个请求间共享；需要修改时先用 thaw() 复制。
+* 写入方法接受 SchoolRecord 或普通 dict。
+* 写入方法失败时直接抛出异常，由调用方记录日志。
+* index() 返回当前数据版本的内存索引 (utils/school_index.py)，每个版本只构建一次；
+  major_index() 同理返回展开到专业一级的索引 (utils/major_index.py)，
+  recommender() 返回推荐打分用的特征数组 (utils/recommender.py)。
+"""
+import threading
+
+from utils.catalog import SchoolRecord, thaw
+from utils.data_store import read_json, write_json_atomic, writer_lock
+from utils.major_index import MajorIndex
+from utils.recommender import RecommendationScorer
+from utils.school_index import SchoolIndex
+from utils.snapshot_cache import FileSnapshotCache
+
+# 列表页等只需要顶层字段，department/major 明细不属于摘要
+DETAIL_ONLY_FIELDS = ('departments',)
+
+
+def make_summary(school):
+    """返回学校的摘要字典 (去掉院系专业明细)。"""
+    return {key: value for key, value in school.items() if key not in DETAIL_ONLY_FIELDS}
+
+
+def make_records(schools):
+    """把加载得到的学校字典列表转换为 SchoolRecord 列表，跳过格式不正确的条目。"""
+    return [SchoolRecord(s) for s in schools if isinstance(s, dict)]
+
+
+class SchoolRepository:
+    """院校数据仓库接口。"""
+
+    _index_lock = threading.Lock()
+    _index_cache = None # (数据版本, SchoolIndex)
+    _major_index_cache = None # (数据版本, MajorIndex)
+    _recommender_cache = None # (数据版本, RecommendationScorer)
+
+    def version(self):
+        """返回当前数据版本标识 (可哈希，数据变化时必定变化)。"""
+        raise NotImplementedError
+
+    def load_schools(self):
+        """返回包含院系专业明细的完整学校列表。"""
+        raise NotImplementedError
+
+    def load_summaries(self):
+        """返回只含顶层字段的学校摘要列表，顺序与 load_schools 一致。"""
+        raise NotImplementedError
+
+    def index(self):
+        """返回当前数据版本的 SchoolIndex，版本变化后重新构建。"""
+        version = self.version()
+        cached = self._index_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._index_lock:
+            cached = self._index_cache
+            if cached is None or cached[0] != version:
+                # 先取版本再加载：加载期间数据若又被修改，下次访问时版本不一致会再次构建
+                cached = (version, SchoolIndex(self.load_summaries(), version=version))
+                self._index_cache = cached
+            return cached[1]
+
+    def major_index(self):
+        """返回当前数据版本的 MajorIndex (需要加载院系专业明细)，版本变化后重新构建。"""
+        version = self.version()
+        cached = self._major_index_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._index_lock:
+            cached = self._major_index_cache
+            if cached is None or cached[0] != version:
+                cached = (version, MajorIndex(self.load_schools()))
+                self._major_index_cache = cached
+            return cached[1]
+
+    def recommender(self):
+        """返回当前数据版本的 RecommendationScorer (需要加载院系专业明细)，版本变化后重新构建。"""
+        version = self.version()
+        cached = self._recommender_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._index_lock:
+            cached = self._recommender_cache
+            if cached is None or cached[0] != version:
+                cached = (version, RecommendationScorer(self.load_schools()))
+                self._recommender_cache = cached
+            return cached[1]
+
+    def get_school(self, school_id):
+        """按 id 返回完整的学校数据，不存在时返回 None。"""
+        raise NotImplementedError
+
+    def resolve_school(self, key):
+        """按 id、名称或别名 (如 "川大"、去掉校区括号的名称) 返回完整的学校数据，不存在时返回 None。"""
+        index = self.index()
+        position = index.identity.resolve(key)
+        if position is None:
+            return None
+        summary = index.schools[position]
+        if summary.get('id') is not None:
+            return self.get_school(summary.get('id'))
+        return self.find_school_by_name(summary.get('name'))
+
+    def find_school_by_name(self, name):
+        """按名称返回完整的学校数据，不存在时返回 None。"""
+        raise NotImplementedError
+
+    def save_school(self, school):
+        """更新单个学校 (按 school['id'] 匹配)。学校不存在时抛出 KeyError。"""
+        raise NotImplementedError
+
+    def save_all(self, schools):
+        """整体替换全部学校数据。"""
+        raise NotImplementedError
+
+
+class JsonSchoolRepository(SchoolRepository):
+    """基于 data/schools.json 的仓库实现，解析结果按文件身份缓存。"""
+
+    def __init__(self, file_path, loader=None, indent=2):
+        self.file_path = file_path
+        self.indent = indent
+        self._loader = loader or (lambda path: read_json(path, default=[]))
+        self._cache = FileSnapshotCache(file_path, self._load_snapshot)
+
+    def _load_snapshot(self, path):
+        schools = self._loader(path)
+        if not isinstance(schools, list):
+            schools = []
+        records = make_records(schools)
+        return records, [r.summary() for r in records]
+
+    def version(self):
+        self._cache.get()
+        return ('json', self._cache.identity)
+
+    def load_schools(self):
+        return self._cache.get()[0]
+
+    def load_summaries(self):
+        return self._cache.get()[1]
+
+    def _school_at(self, position, field, value):
+        if position is None:
+            return None
+        schools = self.load_schools()
+        school = schools[position] if position < len(schools) else None
+        if school is None or school.get(field) != value:
+            # 取索引与取数据之间文件被替换，位置已不可信，退回线性查找
+            return next((s for s in schools if s.get(field) == value), None)
+        return school
+
+    def get_school(self, school_id):
+        return self._school_at(self.index().identity.position_of_id(school_id), 'id', school_id)
+
+    def find_school_by_name(self, name):
+        return self._school_at(self.index().identity.position_of_name(name), 'name', name)
+
+    def save_school(self, school):
+        school_id = school.get('id')
+        # 读取-替换-写回都在写入锁内完成，并发的两次后台修改不会互相覆盖
+        with writer_lock(self.file_path):
+            # 快照缓存按文件身份校验，其他写入方替换文件后这里读到的是新内容
+            schools = list(self.load_schools())
+            position = self.index().identity.position_of_id(school_id)
+            if position is None or position >= len(schools) or schools[position].get('id') != school_id:
+                # 索引与锁内读到的数据不是同一版本，位置已不可信，退回线性查找
+                position = next((i for i, s in enumerate(schools) if s.get('id') == school_id), None)
+                if position is None:
+                    raise KeyError(school_id)
+            schools[position] = school
+            self._write_locked(schools)
+
+    def save_all(self, schools):
+        with writer_lock(self.file_path):
+            self._write_locked(schools)
+
+    def _write_locked(self, schools):
+        """调用方已持有 writer_lock(self.file_path)。"""
+        try:
+            write_json_atomic(self.file_path, [thaw(s) for s in schools], indent=self.indent)
+        finally:
+            self._cache.invalidate()
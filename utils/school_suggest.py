@@ -0,0 +1,112 @@
+"""
+院校名称自动补全 (search-as-you-type) 的前缀树。
+
+每所学校以多个键插入前缀树：
+* 中文名称 (小写)，如 "四川大学"
+* 全拼，如 "sichuandaxue"
+* 拼音首字母，如 "scdx"
+* 学校 id (小写)
+前缀树的每个节点记录其子树中的全部学校位置，查询只需沿输入的前缀走到对应节点，
+不扫描学校列表；再按收藏数取前 k 个。
+
+拼音由可选依赖 pypinyin 生成；未安装时只支持中文名称与 id 前缀。
+"""
+import heapq
+import re
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+PINYIN_AVAILABLE = lazy_pinyin is not None
+DEFAULT_SUGGEST_LIMIT = 8
+MAX_SUGGEST_LIMIT = 20
+
+# 输入中的空格、撇号、连字符 (如 "si chuan"、"xi'an") 不参与匹配
+_SEPARATORS = re.compile(r"[\s'’\-_]+")
+
+
+def normalize_query(text):
+    """把查询或键转换为匹配用的形式：小写并去掉分隔符。"""
+    if text is None:
+        return ''
+    return _SEPARATORS.sub('', str(text)).lower()
+
+
+def pinyin_keys(name):
+    """返回名称的 (全拼, 首字母)；未安装 pypinyin 或名称为空时返回空元组。"""
+    if not PINYIN_AVAILABLE or not name:
+        return ()
+    syllables = [normalize_query(s) for s in lazy_pinyin(name)]
+    initials = [normalize_query(s) for s in lazy_pinyin(name, style=Style.FIRST_LETTER)]
+    return (''.join(syllables), ''.join(initials))
+
+
+def suggest_keys(school):
+    """返回学校在前缀树中的全部键 (已规范化、去重)。"""
+    name = school.get('name') or ''
+    keys = {normalize_query(name), normalize_query(school.get('id'))}
+    keys.update(pinyin_keys(name))
+    keys.discard('')
+    return keys
+
+
+class _TrieNode:
+    __slots__ = ('children', 'positions')
+
+    def __init__(self):
+        self.children = {}
+        self.positions = set()
+
+
+class PrefixTrie:
+    """字符前缀树，节点保存子树内所有值，prefix_values 的耗时只与前缀长度有关。"""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, key, value):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.positions.add(value)
+
+    def prefix_values(self, prefix):
+        """返回以 prefix 开头的所有键对应的值集合 (只读)。"""
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return frozenset()
+        return node.positions
+
+
+class SchoolSuggester:
+    """基于一组学校摘要 (SchoolIndex.schools) 构建的自动补全器。"""
+
+    def __init__(self, schools):
+        self.schools = schools
+        self._trie = PrefixTrie()
+        for position, school in enumerate(schools):
+            for key in suggest_keys(school):
+                self._trie.insert(key, position)
+
+    def suggest(self, query, count_favorites=None, limit=DEFAULT_SUGGEST_LIMIT):
+        """返回 [(学校摘要, 收藏数)]，按收藏数降序、原始顺序升序排列，最多 limit 条。
+
+        count_favorites(school_ids) 返回 {school_id: 收藏数}，只会传入前缀命中的学校。
+        """
+        prefix = normalize_query(query)
+        if not prefix or limit <= 0:
+            return []
+        positions = self._trie.prefix_values(prefix)
+        keys = {position: str(self.schools[position].get('id', self.schools[position].get('name')))
+                for position in positions}
+        favorites_counts = count_favorites(set(keys.values())) if count_favorites and keys else {}
+
+        def rank_key(position):
+            return (-favorites_counts.get(keys[position], 0), position)
+
+        top = heapq.nsmallest(limit, positions, key=rank_key)
+        return [(self.schools[p], -rank_key(p)[0]) for p in top]
@@ -0,0 +1,111 @@
+"""
+复试分数线的结构化解析。
+
+major['score_lines'] 中保存的是人工整理的原始字符串，格式不统一，例如:
+    "328/37/56"            总分/单科(满分100)/单科(满分>100)
+    "335/50/50/80/70"      总分/政治/英语/数学/专业课
+    "67/66/87/95/340"      政治/英语/数学/专业课/总分
+    "290"、"最低分274"      只有总分
+    "277-361"              进复试的总分区间
+parse_score_lines 把每年的字符串解析为结构化结果:
+    {
+        "2024": {"total": 328, "politics": 37, "english": 37, "math": 56, "specialty": 56, "max_value": 328},
+        "2023": None
+    }
+无法识别的字段为 None；原始值为空的年份整体为 None。
+解析结果不写回数据文件，只在每个数据版本构建一次的结构中使用 (MajorIndex、RecommendationScorer)，
+因此后台或爬虫修改了原始字符串后不会残留过期的解析结果。
+max_value 是字符串中所有数字的最大值，推荐算法沿用这一口径 (见 README 的权重规则)。
+"""
+import re
+from collections.abc import Mapping
+
+SCORE_FIELDS = ('total', 'politics', 'english', 'math', 'specialty')
+# 推荐算法使用的年份优先级：有 2024 年的数据就用 2024 年，否则用 2023 年
+REFERENCE_YEARS = ('2024', '2023')
+
+_NUMBER = re.compile(r'\d+')
+_SLASH_LINE = re.compile(r'^\s*\d+(?:\s*/+\s*\d+)+')
+_RANGE = re.compile(r'^\s*(\d+)\s*[-~～—]\s*(\d+)\s*$')
+_SINGLE = re.compile(r'^\s*(\d+)\s*$')
+_MINIMUM = re.compile(r'最低(?:分)?[^\d\n]{0,4}(\d+)')
+# 总分的合理范围，用于排除 "24改考了408" 之类备注中的数字
+_TOTAL_RANGE = (100, 500)
+
+
+def _plausible_total(value):
+    return value is not None and _TOTAL_RANGE[0] <= value <= _TOTAL_RANGE[1]
+
+
+def _parse_slash_parts(parts):
+    """按斜杠分隔的各段数字推断总分与单科线。"""
+    result = {}
+    if len(parts) == 3:
+        # 总分 / 满分 100 的单科 (政治、英语) / 满分 150 的单科 (数学、专业课)
+        result.update(total=parts[0], politics=parts[1], english=parts[1], math=parts[2], specialty=parts[2])
+    elif len(parts) == 5:
+        if parts[-1] == max(parts): # 各科在前、总分在后
+            result.update(politics=parts[0], english=parts[1], math=parts[2], specialty=parts[3], total=parts[4])
+        else:
+            result.update(total=parts[0], politics=parts[1], english=parts[2], math=parts[3], specialty=parts[4])
+    else:
+        # 其他段数含义不明确，只取最大值作为总分
+        result['total'] = max(parts)
+    if not _plausible_total(result.get('total')):
+        result['total'] = None
+    return result
+
+
+def parse_score_line(raw):
+    """把一条原始分数线解析为 {total, politics, english, math, specialty, max_value}。
+
+    原始值为空 (None、空字符串) 时返回 None。
+    """
+    if not raw:
+        return None
+    parsed = dict.fromkeys(SCORE_FIELDS)
+    parsed['max_value'] = None
+    if not isinstance(raw, str):
+        return parsed
+
+    numbers = [int(n) for n in _NUMBER.findall(raw)]
+    if not numbers:
+        return parsed
+    parsed['max_value'] = max(numbers)
+
+    first_line = raw.strip().splitlines()[0]
+    slash_match = _SLASH_LINE.match(first_line)
+    range_match = _RANGE.match(first_line)
+    minimum_match = _MINIMUM.search(raw)
+    single_match = _SINGLE.match(first_line)
+    if slash_match:
+        parts = [int(n) for n in _NUMBER.findall(slash_match.group(0))]
+        parsed.update(_parse_slash_parts(parts))
+    elif range_match:
+        # 区间的下限即进入复试的最低总分
+        parsed['total'] = int(range_match.group(1))
+    elif minimum_match:
+        parsed['total'] = int(minimum_match.group(1))
+    elif single_match:
+        parsed['total'] = int(single_match.group(1))
+    if not _plausible_total(parsed['total']):
+        parsed['total'] = None
+    return parsed
+
+
+def parse_score_lines(score_lines):
+    """解析一个专业各年份的分数线，返回 {year: 解析结果或 None}。"""
+    if not isinstance(score_lines, Mapping): # 运行时的学校数据是冻结的 MappingProxyType
+        return {}
+    return {year: parse_score_line(raw) for year, raw in score_lines.items()}
+
+
+def reference_score_value(major):
+    """推荐算法使用的专业分数线：优先 2024 年，否则 2023 年，取该年字符串中数字的最大值。"""
+    parsed = parse_score_lines(major.get('score_lines'))
+    for year in REFERENCE_YEARS:
+        entry = parsed.get(year)
+        if entry is not None:
+            return entry.get('max_value')
+    return None
+
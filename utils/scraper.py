@@ -14,6 +14,9 @@ import csv # 导入csv模块用于导出CSV文件
 from datetime import datetime
 import importlib
 
+from utils.data_store import read_json, save_json
+from utils.school_identity import SchoolIdentityIndex
+
 # --- Selenium Imports ---
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -115,26 +118,20 @@ SCHOOL_MODULE_MAPPING = {
 
 # --- Data Loading and Saving Functions ---
 def load_existing_schools():
-    if os.path.exists(SCHOOLS_FILE):
-        with open(SCHOOLS_FILE, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                return data if isinstance(data, list) else []
-            except json.JSONDecodeError:
-                print(f"Error: 无法解析 {SCHOOLS_FILE}")
-                return []
-    return []
+    try:
+        data = read_json(SCHOOLS_FILE, default=[])
+        return data if isinstance(data, list) else []
+    except json.JSONDecodeError:
+        print(f"Error: 无法解析 {SCHOOLS_FILE}")
+        return []
 
 def save_schools_data(data_list):
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(SCHOOLS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data_list, f, ensure_ascii=False, indent=4)
+    # 原子写入 schools.json，运行中的 Web 应用不会读到写了一半的文件
+    save_json(SCHOOLS_FILE, data_list, indent=4)
     print(f"数据已保存到 {SCHOOLS_FILE}")
 
 def save_crawler_raw_data(data_dict):
-    os.makedirs(CRAWLER_DIR, exist_ok=True)
-    with open(CRAWLER_RAW_DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data_dict, f, ensure_ascii=False, indent=4)
+    save_json(CRAWLER_RAW_DATA_FILE, data_dict, indent=4)
     print(f"爬虫原始数据已保存到 {CRAWLER_RAW_DATA_FILE}")
 
 def save_crawler_schools_csv(schools_info):
@@ -152,9 +149,7 @@ def save_crawler_schools_csv(schools_info):
     print(f"学校URL信息已保存到 {CRAWLER_SCHOOLS_CSV_FILE}")
 
 def save_crawler_summary(summary_data):
-    os.makedirs(CRAWLER_DIR, exist_ok=True)
-    with open(CRAWLER_SUMMARY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(summary_data, f, ensure_ascii=False, indent=4)
+    save_json(CRAWLER_SUMMARY_FILE, summary_data, indent=4)
     print(f"爬虫汇总数据已保存到 {CRAWLER_SUMMARY_FILE}")
 
 # --- Generic Link Finder ---
@@ -495,18 +490,17 @@ def fetch_dynamic_page_with_selenium(url, school_name, page_type_suffix, seleniu
 # 该函数已被删除，其功能已由各个学校独立的爬虫模块和 run_scraper 中的动态调用取代。
 # 旧的 parse_school_data 函数 (原行号 405-1307) 已移除。
 
-def update_school_data(existing_schools_list, school_name, update_data):
+def update_school_data(existing_schools_list, school_name, update_data, identity=None):
     """
     将爬取到的单个学校数据(update_data)合并到现有学校列表(existing_schools_list)中。
     尝试按 院系名称 和 专业代码 进行匹配和更新。
+    identity 为 existing_schools_list 上的 SchoolIdentityIndex (按名称或别名常数时间定位学校)，
+    批量合并时由调用方构建一次传入；为 None 时临时构建。
     """
-    school_entry = None
-    entry_index = -1
-    for i, school in enumerate(existing_schools_list):
-        if school.get('name') == school_name:
-            school_entry = school
-            entry_index = i
-            break
+    if identity is None:
+        identity = SchoolIdentityIndex(existing_schools_list)
+    entry_index = identity.resolve(school_name)
+    school_entry = existing_schools_list[entry_index] if entry_index is not None else None
 
     if not school_entry:
         print(f"![{school_name}] 未在现有数据中找到，无法合并。")
@@ -628,6 +622,8 @@ def run_scraper(target_school_name=None): # Added optional parameter
         schools_list = []
     elif not schools_list:
         print("警告：现有学校数据为空。爬取结果将作为新数据保存。")
+    # 合并过程中只替换列表中的条目、不改变顺序，身份索引构建一次即可
+    schools_identity = SchoolIdentityIndex(schools_list)
 
     raw_crawler_data = {}
     schools_info_for_csv = [] 
@@ -727,7 +723,7 @@ def run_scraper(target_school_name=None): # Added optional parameter
             else:
                 print(f"  ![{school_name}] 警告: 'departments' data is not a list, skipping summary.")
 
-            if update_school_data(schools_list, school_name, update_data): # update_school_data 函数保持不变
+            if update_school_data(schools_list, school_name, update_data, identity=schools_identity): # update_school_data 函数保持不变
                 successful_updates += 1
                 summary_data["schools_updated"] += 1
         else:
@@ -0,0 +1,215 @@
+"""
+按学校分片的院校数据存储。
+
+目录结构 (默认 data/schools/):
+    manifest.json          # 所有学校的摘要字段 + 分片文件映射 + 修订号
+    shards/<学校>.json     # 单个学校的 departments 明细
+
+列表页只读取体积很小的 manifest；详情页按需加载单个分片；后台编辑一所学校
+只重写该学校的分片和 manifest，不再重新序列化全部学校。
+每次写入都会递增 manifest 中的 revision，因此 manifest 的文件身份即数据版本。
+
+一次性迁移 (从项目根目录运行):
+    python -m utils.sharded_repository [data/schools.json] [data/schools]
+"""
+import os
+import re
+import sys
+import threading
+
+from utils.catalog import freeze, thaw
+from utils.data_store import read_json, write_json_atomic, writer_lock
+from utils.school_repository import SchoolRepository, make_records, make_summary
+from utils.snapshot_cache import FileSnapshotCache
+
+MANIFEST_FORMAT_VERSION = 1
+MANIFEST_FILE_NAME = 'manifest.json'
+SHARDS_DIR_NAME = 'shards'
+
+# 文件名中不允许出现的字符 (兼顾 Windows)
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def shard_file_name(school_id, used_names=()):
+    """根据学校 id 生成可读的分片文件名，与已用名称冲突时追加序号。"""
+    base = _UNSAFE_FILENAME_CHARS.sub('_', str(school_id)).strip('._') or 'school'
+    name = f"{base}.json"
+    suffix = 2
+    while name in used_names:
+        name = f"{base}_{suffix}.json"
+        suffix += 1
+    return name
+
+
+class ShardedSchoolRepository(SchoolRepository):
+    """分片仓库实现。manifest 与各分片分别按文件身份缓存。"""
+
+    def __init__(self, base_dir, indent=2):
+        self.base_dir = base_dir
+        self.manifest_path = os.path.join(base_dir, MANIFEST_FILE_NAME)
+        self.shards_dir = os.path.join(base_dir, SHARDS_DIR_NAME)
+        self.indent = indent
+        self._manifest_cache = FileSnapshotCache(self.manifest_path, self._load_manifest)
+        self._shard_caches = {}
+        self._shard_caches_lock = threading.Lock()
+        self._full_lock = threading.Lock()
+        self._full_version = None
+        self._full_schools = None
+
+    # --- manifest 与分片读取 ---
+    def _load_manifest(self, path):
+        manifest = read_json(path, default=None) or {}
+        summaries = make_records(manifest.get('schools') or [])
+        shards = manifest.get('shards') or {}
+        by_id = {}
+        for summary in summaries:
+            by_id.setdefault(summary.get('id'), summary)
+        return {
+            'revision': manifest.get('revision', 0),
+            'summaries': summaries,
+            'shards': shards,
+            'by_id': by_id,
+        }
+
+    def _manifest(self):
+        return self._manifest_cache.get()
+
+    def _shard_cache(self, file_name):
+        cache = self._shard_caches.get(file_name)
+        if cache is None:
+            with self._shard_caches_lock:
+                cache = self._shard_caches.get(file_name)
+                if cache is None:
+                    cache = FileSnapshotCache(os.path.join(self.shards_dir, file_name), _load_shard_departments)
+                    self._shard_caches[file_name] = cache
+        return cache
+
+    def _load_departments(self, manifest, school_id):
+        file_name = manifest['shards'].get(school_id)
+        if not file_name:
+            return []
+        return self._shard_cache(file_name).get()
+
+    def _with_departments(self, manifest, summary):
+        return summary.with_departments(self._load_departments(manifest, summary.get('id')))
+
+    # --- 仓库接口 ---
+    def version(self):
+        self._manifest()
+        return ('sharded', self._manifest_cache.identity)
+
+    def load_summaries(self):
+        return self._manifest()['summaries']
+
+    def load_schools(self):
+        # 需要全部明细的场景 (推荐计算、后台列表) 才会加载所有分片，结果按 manifest 版本缓存
+        version = self.version()
+        if version == self._full_version:
+            return self._full_schools
+        with self._full_lock:
+            if version != self._full_version:
+                manifest = self._manifest()
+                self._full_schools = [self._with_departments(manifest, s) for s in manifest['summaries']]
+                self._full_version = version
+            return self._full_schools
+
+    def get_school(self, school_id):
+        manifest = self._manifest()
+        summary = manifest['by_id'].get(school_id)
+        return self._with_departments(manifest, summary) if summary is not None else None
+
+    def find_school_by_name(self, name):
+        manifest = self._manifest()
+        position = self.index().identity.position_of_name(name)
+        summaries = manifest['summaries']
+        summary = summaries[position] if position is not None and position < len(summaries) else None
+        if summary is None or summary.get('name') != name:
+            summary = next((s for s in summaries if s.get('name') == name), None)
+        return self._with_departments(manifest, summary) if summary is not None else None
+
+    # --- 写入 ---
+    def save_school(self, school):
+        school = thaw(school)
+        school_id = school.get('id')
+        with writer_lock(self.manifest_path):
+            manifest = read_json(self.manifest_path, default=None) or {}
+            summaries = list(manifest.get('schools') or [])
+            shards = dict(manifest.get('shards') or {})
+            index = next((i for i, s in enumerate(summaries) if s.get('id') == school_id), None)
+            if index is None:
+                raise KeyError(school_id)
+            file_name = shards.get(school_id) or shard_file_name(school_id, set(shards.values()))
+            # 先写分片再写 manifest：manifest 被替换后读取方才会看到新版本
+            self._write_shard(file_name, school)
+            summaries[index] = make_summary(school)
+            shards[school_id] = file_name
+            self._write_manifest(manifest.get('revision', 0) + 1, summaries, shards)
+
+    def save_all(self, schools):
+        with writer_lock(self.manifest_path):
+            manifest = read_json(self.manifest_path, default=None) or {}
+            old_shards = manifest.get('shards') or {}
+            schools = [thaw(s) for s in schools]
+            shards = {}
+            for school in schools:
+                school_id = school.get('id')
+                file_name = old_shards.get(school_id)
+                if not file_name or file_name in shards.values():
+                    file_name = shard_file_name(school_id, set(shards.values()))
+                self._write_shard(file_name, school)
+                shards[school_id] = file_name
+            self._write_manifest(manifest.get('revision', 0) + 1, [make_summary(s) for s in schools], shards)
+            self._remove_orphan_shards(set(shards.values()))
+
+    def _write_shard(self, file_name, school):
+        os.makedirs(self.shards_dir, exist_ok=True)
+        shard = {'id': school.get('id'), 'departments': school.get('departments') or []}
+        write_json_atomic(os.path.join(self.shards_dir, file_name), shard, indent=self.indent)
+
+    def _write_manifest(self, revision, summaries, shards):
+        manifest = {
+            'format_version': MANIFEST_FORMAT_VERSION,
+            'revision': revision,
+            'schools': summaries,
+            'shards': shards,
+        }
+        try:
+            write_json_atomic(self.manifest_path, manifest, indent=self.indent)
+        finally:
+            self._manifest_cache.invalidate()
+
+    def _remove_orphan_shards(self, live_names):
+        try:
+            names = os.listdir(self.shards_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith('.json') and name not in live_names:
+                try:
+                    os.remove(os.path.join(self.shards_dir, name))
+                except OSError:
+                    pass
+
+
+def _load_shard_departments(path):
+    shard = read_json(path, default=None) or {}
+    return freeze(shard.get('departments') or [])
+
+
+def migrate_json_to_shards(json_path, base_dir):
+    """把 schools.json 拆分为 manifest + 分片 (覆盖已有的分片数据)，返回导入的学校数量。"""
+    schools = read_json(json_path, default=None)
+    if not isinstance(schools, list):
+        raise ValueError(f"{json_path} 的顶层结构应为列表")
+    repository = ShardedSchoolRepository(base_dir)
+    repository.save_all(schools)
+    return len(schools)
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "data", "schools.json")
+    target_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(base_dir, "data", "schools")
+    print(f"开始把 {source_path} 拆分为分片存储 {target_dir} ...")
+    count = migrate_json_to_shards(source_path, target_dir)
+    print(f"拆分完成，共写入 {count} 个学校分片。")
@@ -0,0 +1,72 @@
+"""
+数据文件快照缓存。
+
+按文件身份 (mtime / size / inode) 缓存已解析的数据：文件未变化时直接返回
+上一次解析的结果，文件被替换或修改后在下一次访问时重新加载。
+设置 revalidate_interval 后，两次 stat 之间至少间隔该秒数 (适合很少变化的小配置文件)，
+间隔内的访问直接返回缓存；本进程内的写入方应调用 invalidate() 使修改立即可见。
+缓存中的数据在多个请求/线程间共享，调用方必须将其视为只读。
+"""
+import os
+import threading
+import time
+
+
+def get_file_identity(file_path):
+    """返回文件身份元组 (st_mtime_ns, st_size, st_ino)，文件不存在时返回 None。"""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileSnapshotCache:
+    """单个数据文件的快照缓存。
+
+    loader(file_path) 负责真正的读取与解析，只在文件身份变化或显式失效后调用。
+    revalidate_interval 为 0 (默认) 时每次访问都检查文件身份。
+    """
+
+    def __init__(self, file_path, loader, revalidate_interval=0):
+        self.file_path = file_path
+        self._loader = loader
+        self.revalidate_interval = revalidate_interval
+        self._lock = threading.Lock()
+        # (身份, 数据, 上次检查时间) 整体替换发布，读取方只读一次该属性，不会看到新旧混合的状态
+        self._state = None
+
+    @property
+    def identity(self):
+        """当前快照对应的文件身份 (未加载时为 None)。"""
+        state = self._state
+        return state[0] if state is not None else None
+
+    def get(self):
+        """返回当前快照；文件身份变化时重新加载。"""
+        state = self._state
+        if state is not None and self.revalidate_interval > 0:
+            if time.monotonic() - state[2] < self.revalidate_interval:
+                return state[1]
+        identity = get_file_identity(self.file_path)
+        if state is not None and identity == state[0]:
+            if self.revalidate_interval > 0:
+                with self._lock:
+                    # 只刷新仍是当前发布的状态，避免把 invalidate() 之后的旧快照重新发布
+                    if self._state is state:
+                        self._state = (state[0], state[1], time.monotonic())
+            return state[1]
+        with self._lock:
+            # 双重检查：等待锁期间其他线程可能已完成加载
+            state = self._state
+            if state is not None and identity == state[0]:
+                return state[1]
+            # 先取身份再读取：若读取期间文件又被替换，下次访问时身份不一致会再次加载
+            data = self._loader(self.file_path)
+            self._state = (identity, data, time.monotonic())
+            return data
+
+    def invalidate(self):
+        """使快照失效，下一次 get() 必定重新加载。"""
+        with self._lock:
+            self._state = None
@@ -0,0 +1,275 @@
+"""
+可选的 SQLite 院校数据存储。
+
+把 schools.json 的嵌套结构拆成规范化的表：
+    school -> department -> major -> score_line / enrollment_year
+并在 province / level / region / computer_rank / major_code 上建立索引，
+使详情查询成为索引查询，后台编辑单个学校只改写该学校的行。
+列表筛选与其他后端一样使用按数据版本构建的内存索引 (SchoolRepository.index())。
+
+一次性迁移 (从项目根目录运行):
+    python -m utils.sqlite_repository [data/schools.json] [data/schools.db]
+"""
+import os
+import sqlite3
+import sys
+import threading
+
+from utils import json_codec
+from utils.catalog import SchoolRecord, thaw
+from utils.data_store import read_json
+from utils.school_repository import SchoolRepository, make_records
+
+SCHEMA_VERSION = 1
+
+# 有独立列的顶层字段；其余字段 (如果有) 原样存入 extra_json
+SCHOOL_COLUMNS = (
+    'id', 'name', 'level', 'province', 'region', 'computer_rank', 'intro',
+    'exam_subjects_summary', 'enrollment_24_school_total',
+    'enrollment_24_academic', 'enrollment_24_professional',
+)
+MAJOR_COLUMNS = (
+    'major_code', 'major_name', 'exam_subjects', 'reference_books', 'retrial_subjects',
+    'tuition_duration', 'admission_info_23', 'admission_info_24',
+)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS school (
+    id TEXT PRIMARY KEY,
+    ordinal INTEGER NOT NULL,
+    name TEXT,
+    level TEXT,
+    province TEXT,
+    region TEXT,
+    computer_rank TEXT,
+    intro TEXT,
+    exam_subjects_summary TEXT,
+    enrollment_24_school_total,
+    enrollment_24_academic,
+    enrollment_24_professional,
+    extra_json TEXT
+);
+CREATE TABLE IF NOT EXISTS department (
+    id INTEGER PRIMARY KEY,
+    school_id TEXT NOT NULL REFERENCES school(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    department_name TEXT,
+    extra_json TEXT
+);
+CREATE TABLE IF NOT EXISTS major (
+    id INTEGER PRIMARY KEY,
+    department_id INTEGER NOT NULL REFERENCES department(id) ON DELETE CASCADE,
+    school_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    major_code TEXT,
+    major_name TEXT,
+    exam_subjects TEXT,
+    reference_books TEXT,
+    retrial_subjects TEXT,
+    tuition_duration TEXT,
+    admission_info_23 TEXT,
+    admission_info_24 TEXT,
+    extra_json TEXT
+);
+CREATE TABLE IF NOT EXISTS score_line (
+    major_id INTEGER NOT NULL REFERENCES major(id) ON DELETE CASCADE,
+    year TEXT NOT NULL,
+    raw TEXT,
+    PRIMARY KEY (major_id, year)
+);
+CREATE TABLE IF NOT EXISTS enrollment_year (
+    major_id INTEGER NOT NULL REFERENCES major(id) ON DELETE CASCADE,
+    year TEXT NOT NULL,
+    count,
+    PRIMARY KEY (major_id, year)
+);
+CREATE INDEX IF NOT EXISTS idx_school_province ON school(province);
+CREATE INDEX IF NOT EXISTS idx_school_level ON school(level);
+CREATE INDEX IF NOT EXISTS idx_school_region ON school(region);
+CREATE INDEX IF NOT EXISTS idx_school_computer_rank ON school(computer_rank);
+CREATE INDEX IF NOT EXISTS idx_school_name ON school(name);
+CREATE INDEX IF NOT EXISTS idx_department_school ON department(school_id, position);
+CREATE INDEX IF NOT EXISTS idx_major_department ON major(department_id, position);
+CREATE INDEX IF NOT EXISTS idx_major_code ON major(major_code);
+"""
+
+
+class SqliteSchoolRepository(SchoolRepository):
+    """SQLite 仓库实现。完整数据按 meta.data_version 缓存，每次写入事务都会递增该版本号。"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cached_version = None
+        self._cached_schools = None
+        self._cached_summaries = None
+        self._ensure_schema()
+
+    # --- 连接与事务 ---
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA foreign_keys = ON')
+            conn.execute('PRAGMA journal_mode = WAL') # 读取方不会被写事务阻塞
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.executescript(SCHEMA_SQL)
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+            conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('data_version', '0')")
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'")
+
+    # --- 读取 ---
+    def version(self):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+        return ('sqlite', self.db_path, int(row['value']) if row else 0)
+
+    def _snapshot(self):
+        version = self.version()
+        if version == self._cached_version:
+            return self._cached_schools, self._cached_summaries
+        with self._cache_lock:
+            if version != self._cached_version:
+                schools = make_records(self._read_all())
+                self._cached_schools = schools
+                self._cached_summaries = [s.summary() for s in schools]
+                self._cached_version = version
+            return self._cached_schools, self._cached_summaries
+
+    def load_schools(self):
+        return self._snapshot()[0]
+
+    def load_summaries(self):
+        return self._snapshot()[1]
+
+    def get_school(self, school_id):
+        row = self._connect().execute("SELECT * FROM school WHERE id = ?", (school_id,)).fetchone()
+        return SchoolRecord(self._read_school(row)) if row else None
+
+    def find_school_by_name(self, name):
+        row = self._connect().execute("SELECT * FROM school WHERE name = ? ORDER BY ordinal LIMIT 1", (name,)).fetchone()
+        return SchoolRecord(self._read_school(row)) if row else None
+
+    def _read_school(self, row):
+        conn = self._connect()
+        school = _school_from_row(row)
+        departments = []
+        for dept_row in conn.execute("SELECT * FROM department WHERE school_id = ? ORDER BY position", (row['id'],)):
+            department = {'department_name': dept_row['department_name']}
+            department.update(_load_extra(dept_row['extra_json']))
+            major_rows = conn.execute("SELECT * FROM major WHERE department_id = ? ORDER BY position", (dept_row['id'],)).fetchall()
+            department['majors'] = [self._read_major(conn, major_row) for major_row in major_rows]
+            departments.append(department)
+        school['departments'] = departments
+        return school
+
+    def _read_major(self, conn, major_row):
+        major = {column: major_row[column] for column in MAJOR_COLUMNS}
+        major['enrollment'] = {r['year']: r['count'] for r in conn.execute(
+            "SELECT year, count FROM enrollment_year WHERE major_id = ? ORDER BY year DESC", (major_row['id'],))}
+        major['score_lines'] = {r['year']: r['raw'] for r in conn.execute(
+            "SELECT year, raw FROM score_line WHERE major_id = ? ORDER BY year DESC", (major_row['id'],))}
+        major.update(_load_extra(major_row['extra_json']))
+        return major
+
+    def _read_all(self):
+        conn = self._connect()
+        rows = conn.execute("SELECT * FROM school ORDER BY ordinal").fetchall()
+        return [self._read_school(row) for row in rows]
+
+    # --- 写入 ---
+    def save_school(self, school):
+        school = thaw(school)
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT ordinal FROM school WHERE id = ?", (school.get('id'),)).fetchone()
+            if row is None:
+                raise KeyError(school.get('id'))
+            # 只删除并重写该学校的院系/专业行 (级联删除 major/score_line/enrollment_year)
+            conn.execute("DELETE FROM department WHERE school_id = ?", (school['id'],))
+            conn.execute("DELETE FROM school WHERE id = ?", (school['id'],))
+            _insert_school(conn, school, row['ordinal'])
+            self._bump_version(conn)
+
+    def save_all(self, schools):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM department")
+            conn.execute("DELETE FROM school")
+            for ordinal, school in enumerate(schools):
+                _insert_school(conn, thaw(school), ordinal)
+            self._bump_version(conn)
+
+
+# --- 行与字典之间的转换 ---
+def _load_extra(extra_json):
+    return json_codec.loads(extra_json) if extra_json else {}
+
+
+def _dump_extra(record, known_keys):
+    extra = {k: v for k, v in record.items() if k not in known_keys}
+    return json_codec.dumps(extra) if extra else None
+
+
+def _school_from_row(row):
+    school = {column: row[column] for column in SCHOOL_COLUMNS}
+    school.update(_load_extra(row['extra_json']))
+    return school
+
+
+def _insert_school(conn, school, ordinal):
+    values = [school.get(column) for column in SCHOOL_COLUMNS]
+    conn.execute(
+        f"INSERT INTO school ({', '.join(SCHOOL_COLUMNS)}, ordinal, extra_json) "
+        f"VALUES ({', '.join('?' * len(SCHOOL_COLUMNS))}, ?, ?)",
+        values + [ordinal, _dump_extra(school, SCHOOL_COLUMNS + ('departments',))])
+    for dept_position, department in enumerate(school.get('departments') or []):
+        cursor = conn.execute(
+            "INSERT INTO department (school_id, position, department_name, extra_json) VALUES (?, ?, ?, ?)",
+            (school['id'], dept_position, department.get('department_name'),
+             _dump_extra(department, ('department_name', 'majors'))))
+        department_id = cursor.lastrowid
+        for major_position, major in enumerate(department.get('majors') or []):
+            cursor = conn.execute(
+                f"INSERT INTO major (department_id, school_id, position, {', '.join(MAJOR_COLUMNS)}, extra_json) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(MAJOR_COLUMNS))}, ?)",
+                [department_id, school['id'], major_position] + [major.get(c) for c in MAJOR_COLUMNS]
+                + [_dump_extra(major, MAJOR_COLUMNS + ('enrollment', 'score_lines'))])
+            major_id = cursor.lastrowid
+            conn.executemany("INSERT INTO score_line (major_id, year, raw) VALUES (?, ?, ?)",
+                             [(major_id, year, raw) for year, raw in (major.get('score_lines') or {}).items()])
+            conn.executemany("INSERT INTO enrollment_year (major_id, year, count) VALUES (?, ?, ?)",
+                             [(major_id, year, count) for year, count in (major.get('enrollment') or {}).items()])
+
+
+# --- 一次性迁移 ---
+def migrate_json_to_sqlite(json_path, db_path):
+    """把 schools.json 导入 SQLite 数据库 (覆盖库中已有的学校数据)，返回导入的学校数量。"""
+    schools = read_json(json_path, default=None)
+    if not isinstance(schools, list):
+        raise ValueError(f"{json_path} 的顶层结构应为列表")
+    repository = SqliteSchoolRepository(db_path)
+    repository.save_all(schools)
+    return len(schools)
+
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "data", "schools.json")
+    target_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(base_dir, "data", "schools.db")
+    print(f"开始从 {source_path} 迁移院校数据到 {target_path} ...")
+    count = migrate_json_to_sqlite(source_path, target_path)
+    print(f"迁移完成，共导入 {count} 所学校。")